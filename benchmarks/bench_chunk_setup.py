@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Compare per-chunk setup cost and throughput across chunk sizes.
+
+Per-chunk setup is the two HMAC derivations (k and seed) plus the k warm-up
+steps; it is paid once per chunk, so large chunks amortise it away.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_chunk_setup.py [--size BYTES]
+"""
+import argparse
+import time
+
+from src.core import ChaosEncrypt
+
+CONFIGS = [
+    (16, 'length'),
+    (1024, 'length'),
+    (64 * 1024, 'compact'),
+    (1024 * 1024, 'compact'),
+]
+
+
+def setup_cost(encryptor: ChaosEncrypt, n_chunks: int = 2000) -> float:
+    """Return the mean per-chunk setup time in microseconds."""
+    start = time.perf_counter()
+    for chunk_index in range(n_chunks):
+        k = encryptor.derive_k(chunk_index)
+        encryptor.warm_state(encryptor.derive_seed(chunk_index), k)
+    return (time.perf_counter() - start) / n_chunks * 1e6
+
+
+def run(size: int):
+    plaintext = 'a' * size
+    print(f"Payload: {size} bytes")
+    print(f"{'chunk_size':>10} {'framing':>8} {'chunks':>8} {'setup us':>9} "
+          f"{'setup %':>8} {'overhead':>9} {'MB/s':>7}")
+    for chunk_size, framing in CONFIGS:
+        encryptor = ChaosEncrypt(shared_secret="bench", chunk_size=chunk_size, framing=framing)
+        per_chunk = setup_cost(encryptor)
+
+        start = time.perf_counter()
+        ciphertext, mac = encryptor.encrypt(plaintext)
+        elapsed = time.perf_counter() - start
+        assert encryptor.decrypt(ciphertext, mac) == plaintext
+
+        n_chunks = -(-size // chunk_size)
+        setup_share = per_chunk * n_chunks / 1e6 / elapsed * 100
+        print(f"{chunk_size:>10} {framing:>8} {n_chunks:>8} {per_chunk:>9.1f} "
+              f"{setup_share:>7.1f}% {len(ciphertext) - size:>9} {size / elapsed / 1e6:>7.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=1024 * 1024, help='Payload size in bytes')
+    run(parser.parse_args().size)
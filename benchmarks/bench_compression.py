@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compare encryption throughput with and without pre-encryption compression.
+
+The payload is synthetic log text, the case compression is meant for.
+Throughput is plaintext bytes per second, so a codec pays off when its
+compression time is below the keystream work it saves.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_compression.py [--size BYTES] [--chunk-size BYTES]
+"""
+import argparse
+import random
+import time
+
+from src.core import ChaosEncrypt
+from src.compression import COMPRESSIONS
+
+LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARN', 'ERROR')
+PATHS = ('/api/items', '/api/users', '/health', '/login', '/static/app.js')
+
+
+def log_payload(size: int, seed: int = 0) -> str:
+    """Return about size bytes of access-log-like text."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = (f"2025-03-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:"
+                f"{rng.randint(0, 59):02d}Z {rng.choice(LEVELS)} worker-{rng.randint(1, 8)} "
+                f"GET {rng.choice(PATHS)} status={rng.choice((200, 200, 200, 304, 404, 500))} "
+                f"duration_ms={rng.randint(1, 900)} request_id={rng.getrandbits(32):08x}\n")
+        lines.append(line)
+        total += len(line)
+    return ''.join(lines)[:size]
+
+
+def run(size: int, chunk_size: int):
+    text = log_payload(size)
+    print(f"Payload: {size} bytes of log text, chunk size {chunk_size}")
+    print(f"{'compression':>11} {'ciphertext':>11} {'ratio':>6} {'enc MB/s':>9} {'dec MB/s':>9}")
+    for compression in (None,) + COMPRESSIONS:
+        encryptor = ChaosEncrypt(shared_secret="bench", chunk_size=chunk_size, framing='compact',
+                                 compression=compression)
+        start = time.perf_counter()
+        ciphertext, mac = encryptor.encrypt(text)
+        encrypt_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert encryptor.decrypt(ciphertext, mac) == text
+        decrypt_time = time.perf_counter() - start
+        print(f"{compression or 'none':>11} {len(ciphertext):>11} {size / len(ciphertext):>5.1f}x "
+              f"{size / encrypt_time / 1e6:>9.2f} {size / decrypt_time / 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=8 * 1024 * 1024, help='Payload size in bytes')
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024, help='Chunk size in bytes')
+    args = parser.parse_args()
+    run(args.size, args.chunk_size)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Measure the throughput cost of the online keystream health tests.
+
+Each configuration is timed with and without a KeystreamHealth monitor
+attached (failures are counted, not raised), and the run fails if any
+overhead exceeds the budget.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_health.py [--size BYTES] [--budget PERCENT]
+"""
+import argparse
+import sys
+import time
+
+from src.core import ChaosEncrypt
+from src.health import KeystreamHealth
+
+CONFIGS = [
+    (16, 'length', 'text'),
+    (1024, 'length', 'bytes'),
+    (64 * 1024, 'compact', 'bytes'),
+    (1024 * 1024, 'compact', 'bytes'),
+]
+DEFAULT_BUDGET = 5.0
+REPEATS = 15
+
+
+def compare(encryptor: ChaosEncrypt, func, repeats: int = REPEATS):
+    """Return the best (plain, monitored) times, alternating runs so drift hits both alike."""
+    monitor = KeystreamHealth(on_failure=lambda failure: None)
+    plain = monitored = float('inf')
+    for _ in range(repeats):
+        for attached in (False, True):
+            encryptor.health_monitor = monitor if attached else None
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if attached:
+                monitored = min(monitored, elapsed)
+            else:
+                plain = min(plain, elapsed)
+    encryptor.health_monitor = None
+    return plain, monitored
+
+
+def run(size: int, budget: float) -> bool:
+    print(f"Payload: {size} bytes")
+    print(f"{'chunk_size':>10} {'framing':>8} {'input':>6} {'MB/s':>7} {'monitored':>10} {'overhead':>9}")
+    ok = True
+    for chunk_size, framing, kind in CONFIGS:
+        encryptor = ChaosEncrypt(shared_secret="bench", chunk_size=chunk_size, framing=framing)
+        # Short chunks are slow per byte; keep their runs comparable in time
+        n = size // 16 if chunk_size < 1024 else size
+        if kind == 'text':
+            text = 'a' * n
+            func = lambda: encryptor.encrypt(text)
+        else:
+            data = bytes(n)
+            func = lambda: encryptor.encrypt_bytes(data)
+
+        plain, monitored = compare(encryptor, func)
+
+        overhead = (monitored / plain - 1) * 100
+        ok = ok and overhead <= budget
+        flag = '' if overhead <= budget else '  OVER BUDGET'
+        print(f"{chunk_size:>10} {framing:>8} {kind:>6} {n / plain / 1e6:>7.1f} "
+              f"{n / monitored / 1e6:>10.1f} {overhead:>8.1f}%{flag}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=8 * 1024 * 1024, help='Payload size in bytes')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='Maximum overhead in percent')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.size, args.budget) else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Measure start-up cost of the library and CLI entry points against budgets.
+
+Each case runs in a fresh interpreter and is timed as wall time over a bare
+``python -c pass``, best of several runs. The child also reports which of
+the heavy optional dependencies (click, NumPy, gmpy2, ...) it loaded; a case
+fails if it exceeds its time budget or loads a module it must not need.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_import.py [--repeats N]
+        [--budget import_core=60 --budget cli_help=150 ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Heavy modules whose presence is reported for every case
+HEAVY_MODULES = ('click', 'numpy', 'gmpy2', 'lzma', 'bz2', 'concurrent.futures')
+# Python statement per case, and the heavy modules it must not load
+CASES = {
+    'import_core': ('import src.core', HEAVY_MODULES),
+    'import_package': ('import src; src.ChaosEncrypt', HEAVY_MODULES),
+    'encrypt_short': ("import src; e = src.ChaosEncrypt(shared_secret='s'); e.decrypt(*e.encrypt('hello'))",
+                      HEAVY_MODULES),
+    'cli_help': ("import sys; sys.argv = ['chaosencrypt', '--help']; import runpy\n"
+                 "try: runpy.run_module('src', run_name='__main__')\nexcept SystemExit: pass",
+                 # click itself imports shutil, which loads lzma and bz2
+                 ('numpy', 'gmpy2', 'concurrent.futures')),
+}
+# Budgets in milliseconds of start-up time over a bare interpreter
+DEFAULT_BUDGETS = {
+    'import_core': 80.0,
+    'import_package': 80.0,
+    'encrypt_short': 100.0,
+    'cli_help': 250.0,
+}
+DEFAULT_REPEATS = 5
+_REPORT = "\nimport sys; print(','.join(m for m in {modules!r} if m in sys.modules))"
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    env['CHAOSENCRYPT_NO_PROFILE'] = '1'
+    return env
+
+
+def _time_child(code: str, env: Dict[str, str], repeats: int) -> Tuple[float, str]:
+    """Return the best wall time of running code and the child's last output line."""
+    best = float('inf')
+    output = ''
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{code!r} failed: {result.stderr}")
+        output = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+    return best, output
+
+
+def run(budgets: Dict[str, float], repeats: int = DEFAULT_REPEATS) -> List[Dict]:
+    """Measure every case.
+
+    Returns:
+        One result dictionary per case with the start-up time, the heavy
+        modules loaded, those among them the case must not load, the budget
+        and whether the case passed
+    """
+    env = _child_env()
+    interpreter, _ = _time_child('pass', env, repeats)
+    results = []
+    for name, (code, forbidden) in CASES.items():
+        seconds, loaded = _time_child(code + _REPORT.format(modules=HEAVY_MODULES), env, repeats)
+        loaded = [m for m in loaded.split(',') if m]
+        milliseconds = max(seconds - interpreter, 0.0) * 1000
+        budget = budgets.get(name)
+        unwanted = [m for m in loaded if m in forbidden]
+        results.append({
+            'case': name,
+            'ms': milliseconds,
+            'loaded': loaded,
+            'unwanted': unwanted,
+            'budget': budget,
+            'ok': not unwanted and (budget is None or milliseconds <= budget),
+        })
+    return results
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values:
+        name, sep, limit = value.partition('=')
+        if not sep or name not in DEFAULT_BUDGETS:
+            raise ValueError(f"Budget must be CASE=MILLISECONDS with CASE in: {', '.join(DEFAULT_BUDGETS)}")
+        budgets[name] = float(limit)
+    return budgets
+
+
+def print_report(results: List[Dict]):
+    print(f"{'case':>15} {'ms':>7} {'budget':>7}  loaded")
+    for r in results:
+        budget = f"{r['budget']:.0f}" if r['budget'] is not None else '-'
+        status = '' if r['ok'] else '  OVER BUDGET' if not r['unwanted'] else \
+            f"  UNWANTED {','.join(r['unwanted'])}"
+        print(f"{r['case']:>15} {r['ms']:>7.1f} {budget:>7}  {','.join(r['loaded']) or '-'}{status}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='Runs per case, best is kept')
+    parser.add_argument('--budget', action='append', default=[], help='Override a budget: CASE=MILLISECONDS')
+    args = parser.parse_args()
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as e:
+        parser.error(str(e))
+    results = run(budgets, args.repeats)
+    print_report(results)
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
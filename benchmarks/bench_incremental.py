@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare full encryption with incremental chunk store updates across file sizes.
+
+For every size a random file is stored once, then a small edit in the
+middle is applied with edit() (re-cuts only the chunks next to it) and with
+write() (re-scans the whole input but encrypts only changed chunks). The
+edit should take about the same time at every size.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_incremental.py [--sizes 16777216,67108864] [--edit BYTES]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from src.core import ChaosEncrypt
+from src.chunk_store import ChunkStore
+
+
+def run(sizes, edit_size: int):
+    encryptor = ChaosEncrypt(shared_secret="bench", chunk_size=64 * 1024, framing='compact')
+    print(f"{'size MiB':>9} {'chunks':>7} {'full s':>8} {'edit ms':>8} {'edit chunks':>12} {'rescan s':>9}")
+    for size in sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            data = bytearray(os.urandom(size))
+            store = ChunkStore(os.path.join(directory, 'store'), encryptor)
+            start = time.perf_counter()
+            store.write(bytes(data))
+            full = time.perf_counter() - start
+
+            insert = os.urandom(edit_size)
+            start = time.perf_counter()
+            stats = store.edit(size // 2, edit_size, insert)
+            edit = time.perf_counter() - start
+            data[size // 2:size // 2 + edit_size] = insert
+
+            data[size // 3:size // 3 + edit_size] = os.urandom(edit_size)
+            start = time.perf_counter()
+            store.write(bytes(data))
+            rescan = time.perf_counter() - start
+            assert store.read(size // 3, edit_size) == bytes(data[size // 3:size // 3 + edit_size])
+        finally:
+            shutil.rmtree(directory)
+        print(f"{size / 2 ** 20:>9.0f} {stats['chunks']:>7} {full:>8.2f} {edit * 1000:>8.1f} "
+              f"{stats['encrypted']:>12} {rescan:>9.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='16777216,67108864', help='Comma-separated file sizes in bytes')
+    parser.add_argument('--edit', type=int, default=100, help='Bytes replaced by each edit')
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(',')], args.edit)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Measure peak memory against input size and enforce per-byte budgets.
+
+Each case is measured with tracemalloc (peak Python allocations) and by
+sampling the process RSS; CLI cases run in a child process whose peak RSS
+(VmHWM) is recorded at exit. Results are reported as bytes per input byte,
+or per matrix cell for the quadratic clustering cases, and the run fails
+if any case exceeds its budget.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_memory.py [--sizes 262144,1048576]
+        [--budget encrypt=8 --budget similarities=64 ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core import ChaosEncrypt
+from src.semantic_clustering import SemanticClustering
+
+# Budgets in peak bytes per unit (see CASE_UNITS): tracemalloc peak for
+# in-process cases, RSS growth over a baseline CLI process for CLI cases
+DEFAULT_BUDGETS = {
+    'encrypt': 6.0,
+    'decrypt': 6.0,
+    'encrypt_bytes': 6.0,
+    'cli_encrypt': 12.0,
+    'cli_decrypt': 12.0,
+    'similarities': 64.0,
+    'cluster_stability': 48.0,
+}
+DEFAULT_SIZES = (256 * 1024, 1024 * 1024)
+# Clustering cases are quadratic in the number of texts, so they are
+# budgeted per similarity-matrix cell rather than per input byte
+CASE_UNITS = {'similarities': 'cell', 'cluster_stability': 'cell'}
+SIMILARITY_TEXT_SIZE = 64
+# One text per this many input bytes, capped to keep runs short
+BYTES_PER_SIMILARITY_TEXT = 2048
+MAX_SIMILARITY_TEXTS = 256
+SAMPLE_INTERVAL = 0.001
+SECRET = 'bench-memory'
+CLI_MODULE = 'src.chaosencrypt_cli'
+CLI_CHUNK_SIZE = 1024
+
+
+def _rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class RssSampler:
+    """Track the peak RSS of this process from a background thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.available = os.path.exists('/proc/self/statm')
+        self.baseline = self.peak = _rss_bytes() if self.available else 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        if self.available:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.available:
+            self._thread.join()
+            self.peak = max(self.peak, _rss_bytes())
+
+    @property
+    def growth(self) -> Optional[int]:
+        return self.peak - self.baseline if self.available else None
+
+
+def measure(func: Callable[[], object]) -> Tuple[int, Optional[int]]:
+    """Return (tracemalloc peak, RSS growth) in bytes while running func."""
+    tracemalloc.start()
+    try:
+        with RssSampler() as sampler:
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, sampler.growth
+
+
+# Runs a module as __main__ and records its VmHWM at exit. ru_maxrss from
+# wait4() is unusable here: Linux carries the parent's high-water mark
+# across exec, so every child would report at least the parent's RSS.
+_CHILD_WRAPPER = """
+import atexit, runpy, sys
+report = sys.argv.pop(1)
+def _record():
+    with open('/proc/self/status') as f:
+        hwm = next(line for line in f if line.startswith('VmHWM:'))
+    with open(report, 'w') as f:
+        f.write(str(int(hwm.split()[1]) * 1024))
+atexit.register(_record)
+module = sys.argv.pop(1)
+runpy.run_module(module, run_name='__main__', alter_sys=True)
+"""
+
+
+def measure_child(module: str, args: List[str]) -> int:
+    """Run ``python -m module args`` in a child process and return its peak RSS in bytes."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, ['.', os.environ.get('PYTHONPATH')])))
+    with tempfile.TemporaryDirectory() as workdir:
+        report = os.path.join(workdir, 'peak')
+        result = subprocess.run([sys.executable, '-c', _CHILD_WRAPPER, report, module] + args,
+                                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"{module} {' '.join(args)} failed: {result.stderr.decode()}")
+        with open(report) as f:
+            return int(f.read())
+
+
+def _text(size: int) -> str:
+    words = ('chaos', 'orbit', 'prime', 'stream', 'key', 'state', 'ünïcödé', 'map')
+    out = []
+    total = 0
+    i = 0
+    while total < size:
+        word = words[i % len(words)] + (',' if i % 7 == 0 else '') + ' '
+        out.append(word)
+        total += len(word.encode('utf-8'))
+        i += 1
+    return ''.join(out)
+
+
+def _similarity_texts(n_texts: int) -> List[str]:
+    clustering = SemanticClustering()
+    text = _text(n_texts * SIMILARITY_TEXT_SIZE)
+    return [clustering.encrypt(text[i * SIMILARITY_TEXT_SIZE:(i + 1) * SIMILARITY_TEXT_SIZE])
+            for i in range(n_texts)]
+
+
+def library_cases(size: int) -> Dict[str, Tuple[int, Callable[[], object]]]:
+    """Return in-process cases as name -> (input units, callable)."""
+    encryptor = ChaosEncrypt(shared_secret=SECRET, chunk_size=1024)
+    text = _text(size)
+    data = text.encode('utf-8')
+    ciphertext, mac = encryptor.encrypt(text)
+    clustering = SemanticClustering()
+
+    n_texts = max(2, min(size // BYTES_PER_SIMILARITY_TEXT, MAX_SIMILARITY_TEXTS))
+    texts = _similarity_texts(n_texts)
+    matrices = [clustering.calculate_similarities(texts) for _ in range(3)]
+    return {
+        'encrypt': (len(data), lambda: encryptor.encrypt(text)),
+        'decrypt': (len(data), lambda: encryptor.decrypt(ciphertext, mac)),
+        'encrypt_bytes': (len(data), lambda: encryptor.encrypt_bytes(data)),
+        'similarities': (n_texts ** 2, lambda: clustering.calculate_similarities(texts)),
+        'cluster_stability': (n_texts ** 2, lambda: clustering.calculate_cluster_stability(matrices)),
+    }
+
+
+def cli_cases(size: int, workdir: str) -> Dict[str, Tuple[int, List[str]]]:
+    """Return CLI cases as name -> (input bytes, arguments to src.chaosencrypt_cli)."""
+    plain = os.path.join(workdir, 'plain.txt')
+    encrypted = os.path.join(workdir, 'plain.enc')
+    text = _text(size)
+    with open(plain, 'w', encoding='utf-8') as f:
+        f.write(text)
+    encryptor = ChaosEncrypt(shared_secret=SECRET, chunk_size=1024)
+    ciphertext, mac = encryptor.encrypt(text)
+    with open(encrypted, 'w') as f:
+        f.write(ciphertext.hex())
+
+    options = ['--secret', SECRET, '--chunk-size', str(CLI_CHUNK_SIZE)]
+    return {
+        'cli_encrypt': (len(text.encode('utf-8')), ['encrypt'] + options + [
+            '--input-file', plain, '--output-file', os.path.join(workdir, 'out.enc')]),
+        'cli_decrypt': (len(text.encode('utf-8')), ['decrypt'] + options + [
+            '--mac-value', str(mac), '--input-file', encrypted,
+            '--output-file', os.path.join(workdir, 'out.txt')]),
+    }
+
+
+def run(sizes, budgets: Dict[str, float], include_cli: bool = True) -> List[Dict]:
+    """Measure every case at every size.
+
+    Returns:
+        One result dictionary per case and size with the peak, the peak per
+        input unit, the budget and whether it was exceeded
+    """
+    results = []
+    # The baseline encrypts one chunk, which loads the lazily imported NumPy
+    # backend, so that import is not counted as per-byte growth
+    baseline_args = ['encrypt', '--secret', SECRET, '--chunk-size', str(CLI_CHUNK_SIZE), 'x' * CLI_CHUNK_SIZE]
+    idle_rss = measure_child(CLI_MODULE, baseline_args) if include_cli else 0
+    for size in sizes:
+        for name, (units, func) in library_cases(size).items():
+            peak, rss = measure(func)
+            results.append(_result(name, size, units, peak, rss, budgets))
+        if include_cli:
+            with tempfile.TemporaryDirectory() as workdir:
+                for name, (units, args) in cli_cases(size, workdir).items():
+                    rss = max(measure_child(CLI_MODULE, args) - idle_rss, 0)
+                    results.append(_result(name, size, units, rss, rss, budgets))
+    return results
+
+
+def _result(name, size, units, peak, rss, budgets) -> Dict:
+    per_unit = peak / max(units, 1)
+    budget = budgets.get(name)
+    return {
+        'case': name,
+        'size': size,
+        'units': units,
+        'unit': CASE_UNITS.get(name, 'byte'),
+        'peak_bytes': peak,
+        'rss_bytes': rss,
+        'bytes_per_unit': per_unit,
+        'budget': budget,
+        'ok': budget is None or per_unit <= budget,
+    }
+
+
+def print_report(results: List[Dict]):
+    print(f"{'case':>18} {'input':>14} {'peak MiB':>9} {'rss MiB':>8} {'B/unit':>8} {'budget':>7}")
+    for r in results:
+        rss = '-' if r['rss_bytes'] is None else f"{r['rss_bytes'] / 2 ** 20:.1f}"
+        budget = '-' if r['budget'] is None else f"{r['budget']:g}"
+        flag = '' if r['ok'] else '  OVER BUDGET'
+        units = f"{r['units']} {r['unit']}s"
+        print(f"{r['case']:>18} {units:>14} {r['peak_bytes'] / 2 ** 20:>9.1f} "
+              f"{rss:>8} {r['bytes_per_unit']:>8.2f} {budget:>7}{flag}")
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values:
+        name, sep, limit = value.partition('=')
+        if not sep or name not in DEFAULT_BUDGETS:
+            raise ValueError(f"Budget must be CASE=BYTES_PER_UNIT with CASE in: {', '.join(DEFAULT_BUDGETS)}")
+        budgets[name] = float(limit)
+    return budgets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated input sizes in bytes')
+    parser.add_argument('--budget', action='append', default=[],
+                        help='Override a budget, e.g. encrypt=12 (repeatable)')
+    parser.add_argument('--no-cli', action='store_true', help='Skip the CLI subprocess cases')
+    args = parser.parse_args()
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as e:
+        parser.error(str(e))
+    results = run([int(s) for s in args.sizes.split(',')], budgets, include_cli=not args.no_cli)
+    print_report(results)
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare ChaosRandom throughput with NumPy's and the standard library's generators.
+
+Bulk methods (randbytes, random_floats, fill) go through the engine's NumPy
+backends; scalar random() calls pay the Python method overhead like
+random.Random does.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_prng.py [--size BYTES] [--calls N]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from src.prng import ChaosRandom
+
+
+def rate(fn, amount: float) -> float:
+    """Return amount per second for the best of three calls of fn."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return amount / best
+
+
+def run(size: int, calls: int):
+    chaos = ChaosRandom(42)
+    generator = np.random.default_rng(42)
+    mt = random.Random(42)
+    n = size // 8
+    out = np.empty(size // 4, dtype=np.uint32)
+    print(f"{'case':<22} {'ChaosRandom':>12} {'numpy':>12} {'random':>12}")
+    rows = [
+        ('randbytes MB/s', rate(lambda: chaos.randbytes(size), size / 1e6),
+         rate(lambda: generator.bytes(size), size / 1e6), rate(lambda: mt.randbytes(size), size / 1e6)),
+        ('float64 M/s', rate(lambda: chaos.random_floats(n), n / 1e6),
+         rate(lambda: generator.random(n), n / 1e6), None),
+        ('fill uint32 MB/s', rate(lambda: chaos.fill(out), size / 1e6),
+         rate(lambda: generator.integers(0, 1 << 32, out.size, dtype=np.uint32), size / 1e6), None),
+        ('random() M calls/s', rate(lambda: [chaos.random() for _ in range(calls)], calls / 1e6),
+         None, rate(lambda: [mt.random() for _ in range(calls)], calls / 1e6)),
+    ]
+    for name, *values in rows:
+        print(f"{name:<22} " + ' '.join(f"{v:>12.1f}" if v is not None else f"{'-':>12}" for v in values))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=64 * 1024 * 1024, help='Bytes per bulk call')
+    parser.add_argument('--calls', type=int, default=1_000_000, help='Scalar random() calls')
+    args = parser.parse_args()
+    run(args.size, args.calls)
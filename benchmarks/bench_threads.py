@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Measure encrypt_parallel throughput against thread count on one shared engine.
+
+Every run encrypts the same payload with a single engine shared by all
+threads and checks the ciphertext equals serial encryption. On a GIL build
+only the NumPy keystream kernels run in parallel; on free-threaded CPython
+(3.13t and later) the per-chunk HMAC derivations and framing do as well.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_threads.py [--size BYTES] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import time
+
+from src.core import ChaosEncrypt, MAP_BINARY64
+
+CONFIGS = {
+    'decimal': {'framing': 'compact', 'chunk_size': 64 * 1024},
+    'binary64': {'framing': 'compact', 'chunk_size': 64 * 1024, 'chaotic_map': MAP_BINARY64,
+                 'primes': [9973, 10007, 10009]},
+}
+
+
+def gil_status() -> str:
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_enabled is None:
+        return 'GIL build'
+    return 'free-threaded, GIL enabled' if is_enabled() else 'free-threaded, GIL disabled'
+
+
+def run(size: int, workers_list):
+    data = os.urandom(size)
+    print(f"Payload: {size} bytes, {os.cpu_count()} CPUs, {gil_status()}")
+    print(f"{'map':>9} {'workers':>8} {'MB/s':>8} {'speedup':>8}")
+    for name, config in CONFIGS.items():
+        engine = ChaosEncrypt(shared_secret="bench", **config)
+        expected = engine.encrypt_bytes(data)
+        baseline = None
+        for workers in workers_list:
+            start = time.perf_counter()
+            result = engine.encrypt_parallel(data, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert result == expected
+            baseline = baseline or elapsed
+            print(f"{name:>9} {workers:>8} {size / elapsed / 1e6:>8.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=16 * 1024 * 1024, help='Payload size in bytes')
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated thread counts')
+    args = parser.parse_args()
+    run(args.size, [int(w) for w in args.workers.split(',')])
@@ -1,3 +1,24 @@
-from .chaosencrypt_cli import ChaosEncrypt, encrypt, decrypt, validate_input
+import importlib
 
-__all__ = ['ChaosEncrypt', 'encrypt', 'decrypt', 'validate_input'] 
\ No newline at end of file
+# Names are resolved on first access, so that importing the package (or the
+# engine in src.core) does not load click and the CLI
+_EXPORTS = {
+    'ChaosEncrypt': '.core',
+    'validate_input': '.core',
+    'encrypt': '.chaosencrypt_cli',
+    'decrypt': '.chaosencrypt_cli',
+}
+
+__all__ = ['ChaosEncrypt', 'encrypt', 'decrypt', 'validate_input']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
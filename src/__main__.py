@@ -0,0 +1,4 @@
+from .chaosencrypt_cli import cli
+
+if __name__ == '__main__':
+    cli()
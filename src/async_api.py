@@ -0,0 +1,321 @@
+import asyncio
+import codecs
+from collections import deque
+from concurrent.futures import Executor
+from typing import Deque, List, Optional, Tuple
+
+from .core import ChaosEncrypt
+from .framing import FRAMING_COMPACT, MAGIC, pack_compact
+from .tuning import tuned_value
+
+DEFAULT_BATCH_CHUNKS = 256
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_READ_SIZE = 64 * 1024
+
+
+def _split_chunks(encryptor: ChaosEncrypt, text: str) -> List[str]:
+    return encryptor._split_into_chunks(text)
+
+
+def _encrypt_batch(encryptor: ChaosEncrypt, chunks: List[str], start_index: int):
+    """Encrypt a batch of text chunks whose first chunk has index start_index.
+
+    Returns the framed bytes for length framing, or the list of payloads for
+    compact framing, whose length table can only be built once all are known.
+    """
+    payloads = [
+        encryptor.encrypt_chunk(chunk.encode('utf-8'), start_index + i)
+        for i, chunk in enumerate(chunks)
+    ]
+    if encryptor.framing == FRAMING_COMPACT:
+        return payloads
+    return b''.join(encryptor.frame_chunk(payload) for payload in payloads)
+
+
+def _pack_compact(encryptor: ChaosEncrypt, parts: List[List[bytes]]) -> bytes:
+    return pack_compact([payload for part in parts for payload in part], encryptor.header_flags())
+
+
+def _decrypt_batch(encryptor: ChaosEncrypt, frames: List[bytes], start_index: int,
+                   width: Optional[int] = None) -> bytes:
+    """Decrypt a batch of chunk payloads whose first chunk has index start_index.
+
+    Chunks may end inside a multi-byte character, so the plaintext bytes are
+    returned undecoded.
+    """
+    return b''.join(
+        encryptor.decrypt_chunk(frame, start_index + i, width) for i, frame in enumerate(frames)
+    )
+
+
+def _verify_mac(encryptor: ChaosEncrypt, ciphertext: bytes, mac: Optional[int]) -> bool:
+    return encryptor.verify_mac(ciphertext, mac)
+
+
+def _encrypt_compressed(encryptor: ChaosEncrypt, plaintext: str) -> Tuple[bytes, Optional[int]]:
+    return encryptor.encrypt(plaintext)
+
+
+def _decrypt_compressed(encryptor: ChaosEncrypt, ciphertext: bytes) -> str:
+    return encryptor.decrypt(ciphertext)
+
+
+def _frames(encryptor: ChaosEncrypt, ciphertext: bytes) -> List[bytes]:
+    # Compact framing yields memoryviews, which cannot be pickled for a
+    # process executor
+    return [bytes(frame) for frame in encryptor.iter_frames(ciphertext)]
+
+
+class AsyncChaosEncrypt:
+    def __init__(self,
+                 encryptor: ChaosEncrypt,
+                 executor: Optional[Executor] = None,
+                 batch_chunks: Optional[int] = None,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        """Initialize an asyncio front end for a ChaosEncrypt instance.
+
+        CPU work runs in batches of chunks on the executor, never on the event
+        loop. At most max_in_flight batches are outstanding at once; producing
+        more waits for the oldest to finish, which bounds memory and applies
+        backpressure to stream readers.
+
+        Args:
+            encryptor: Configured ChaosEncrypt instance
+            executor: Thread or process pool executor; None uses the loop's default
+            batch_chunks: Number of chunks per executor job; None uses the
+                tuning profile's value or DEFAULT_BATCH_CHUNKS
+            max_in_flight: Maximum number of outstanding executor jobs
+        """
+        if batch_chunks is None:
+            batch_chunks = tuned_value('batch_chunks', DEFAULT_BATCH_CHUNKS)
+        if batch_chunks < 1:
+            raise ValueError("batch_chunks must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.encryptor = encryptor
+        self.executor = executor
+        self.batch_chunks = batch_chunks
+        self.max_in_flight = max_in_flight
+
+    def _run(self, func, *args) -> "asyncio.Future":
+        return asyncio.get_running_loop().run_in_executor(self.executor, func, self.encryptor, *args)
+
+    @staticmethod
+    async def _cancel(pending: Deque["asyncio.Future"]):
+        """Cancel outstanding jobs and retrieve their results after a failure."""
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        pending.clear()
+
+    async def _submit(self, pending: Deque["asyncio.Future"], func, *args):
+        """Queue a job, first draining the oldest one if the window is full.
+
+        Returns the drained job's result, or None if nothing was drained.
+        """
+        result = None
+        if len(pending) >= self.max_in_flight:
+            result = await pending.popleft()
+        pending.append(self._run(func, *args))
+        return result
+
+    async def encrypt(self, plaintext: str) -> Tuple[bytes, Optional[int]]:
+        """Encrypt plaintext without blocking the event loop.
+
+        Returns:
+            Tuple of (ciphertext, MAC), identical to ChaosEncrypt.encrypt
+        """
+        if self.encryptor.compression is not None:
+            # The compressed stream is sequential, so it is one job
+            return await self._run(_encrypt_compressed, plaintext)
+        chunks = await self._run(_split_chunks, plaintext)
+        pending: Deque[asyncio.Future] = deque()
+        parts = []
+        try:
+            for start in range(0, len(chunks), self.batch_chunks):
+                done = await self._submit(pending, _encrypt_batch, chunks[start:start + self.batch_chunks], start)
+                if done is not None:
+                    parts.append(done)
+            while pending:
+                parts.append(await pending.popleft())
+        except BaseException:
+            await self._cancel(pending)
+            raise
+
+        if self.encryptor.framing == FRAMING_COMPACT:
+            ciphertext = await self._run(_pack_compact, parts)
+        else:
+            ciphertext = b''.join(parts)
+        mac = await self._run(ChaosEncrypt.calculate_mac, ciphertext) if self.encryptor.use_mac else None
+        return ciphertext, mac
+
+    async def decrypt(self, ciphertext: bytes, mac: Optional[int] = None) -> str:
+        """Decrypt ciphertext without blocking the event loop.
+
+        Raises:
+            ValueError: If MAC verification or decoding fails
+        """
+        if self.encryptor.use_mac and mac is not None:
+            if not await self._run(_verify_mac, ciphertext, mac):
+                raise ValueError("MAC verification failed")
+        if self.encryptor.ciphertext_codec(ciphertext) is not None:
+            return await self._run(_decrypt_compressed, ciphertext)
+
+        frames = await self._run(_frames, ciphertext)
+        width = self.encryptor.ciphertext_width(ciphertext)
+        pending: Deque[asyncio.Future] = deque()
+        parts = []
+        try:
+            for start in range(0, len(frames), self.batch_chunks):
+                done = await self._submit(pending, _decrypt_batch, frames[start:start + self.batch_chunks],
+                                          start, width)
+                if done is not None:
+                    parts.append(done)
+            while pending:
+                parts.append(await pending.popleft())
+        except BaseException:
+            await self._cancel(pending)
+            raise
+        # Decoded once, as ChaosEncrypt.decrypt does
+        try:
+            return b''.join(parts).decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError("Decryption failed: Invalid key or corrupted data")
+
+    async def encrypt_stream(self,
+                             reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter,
+                             read_size: int = DEFAULT_READ_SIZE) -> Optional[int]:
+        """Encrypt UTF-8 text from reader to writer until EOF.
+
+        The bytes written are identical to ChaosEncrypt.encrypt on the whole
+        input. The writer is drained after every batch but not closed. Only
+        length framing can be streamed.
+
+        Returns:
+            MAC over the written ciphertext, or None if MAC is disabled
+        """
+        if self.encryptor.framing == FRAMING_COMPACT:
+            raise ValueError("Compact framing cannot be streamed; use encrypt()")
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        mac_ctx = self.encryptor.new_mac() if self.encryptor.use_mac else None
+        pending: Deque[asyncio.Future] = deque()
+        carry = ''
+        chunk_index = 0
+
+        async def emit(part: Optional[bytes]):
+            if part:
+                writer.write(part)
+                if mac_ctx is not None:
+                    mac_ctx.update(part)
+                await writer.drain()
+
+        try:
+            while True:
+                block = await reader.read(read_size)
+                eof = not block
+                try:
+                    text = carry + decoder.decode(block, final=eof)
+                except UnicodeDecodeError:
+                    raise ValueError("Input is not valid UTF-8 text")
+                chunks = await self._run(_split_chunks, text) if text else []
+                # The last chunk may still grow with the next block
+                carry = '' if eof or not chunks else chunks.pop()
+
+                for start in range(0, len(chunks), self.batch_chunks):
+                    batch = chunks[start:start + self.batch_chunks]
+                    await emit(await self._submit(pending, _encrypt_batch, batch, chunk_index))
+                    chunk_index += len(batch)
+                if eof:
+                    break
+
+            while pending:
+                await emit(await pending.popleft())
+        except BaseException:
+            await self._cancel(pending)
+            raise
+        return self.encryptor.finalize_mac(mac_ctx) if mac_ctx is not None else None
+
+    async def decrypt_stream(self,
+                             reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter,
+                             mac: Optional[int] = None) -> None:
+        """Decrypt ciphertext from reader to writer until EOF.
+
+        Plaintext is written as it is decrypted, so the MAC can only be checked
+        once the stream ends; callers must discard the output if this raises.
+
+        Raises:
+            ValueError: If the stream is truncated, decoding fails or the MAC does not match
+        """
+        verify = self.encryptor.use_mac and mac is not None
+        mac_ctx = self.encryptor.new_mac() if verify else None
+        pending: Deque[asyncio.Future] = deque()
+        frames: List[bytes] = []
+        chunk_index = 0
+        # Batches may end inside a multi-byte character, so the output is
+        # checked as one UTF-8 stream across them
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        async def emit(plaintext: Optional[bytes], final: bool = False):
+            try:
+                decoder.decode(plaintext or b'', final=final)
+            except UnicodeDecodeError:
+                raise ValueError("Decryption failed: Invalid key or corrupted data")
+            if plaintext:
+                writer.write(plaintext)
+                await writer.drain()
+
+        async def flush():
+            nonlocal frames, chunk_index
+            await emit(await self._submit(pending, _decrypt_batch, frames, chunk_index))
+            chunk_index += len(frames)
+            frames = []
+
+        try:
+            while True:
+                frame = await self._read_frame(reader)
+                if frame is None:
+                    break
+                raw, payload = frame
+                if mac_ctx is not None:
+                    mac_ctx.update(raw)
+                frames.append(payload)
+                if len(frames) >= self.batch_chunks:
+                    await flush()
+
+            if frames:
+                await flush()
+            while pending:
+                await emit(await pending.popleft())
+        except BaseException:
+            await self._cancel(pending)
+            raise
+        await emit(None, final=True)
+
+        if mac_ctx is not None and self.encryptor.finalize_mac(mac_ctx) != mac:
+            raise ValueError("MAC verification failed")
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Optional[Tuple[bytes, bytes]]:
+        """Read one chunk as (raw bytes including framing, payload); None at EOF."""
+        if not self.encryptor.embed_length:
+            # fallback: read chunk_size or until end
+            try:
+                payload = await reader.readexactly(self.encryptor.chunk_size)
+            except asyncio.IncompleteReadError as e:
+                payload = e.partial
+            return (payload, payload) if payload else None
+
+        try:
+            length_field = await reader.readexactly(2)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise ValueError("Ciphertext truncated. No space for chunk length.")
+            return None
+        if length_field[0] == MAGIC:
+            raise ValueError("Compact framing cannot be streamed; use decrypt()")
+        try:
+            payload = await reader.readexactly(int.from_bytes(length_field, 'big'))
+        except asyncio.IncompleteReadError:
+            raise ValueError("Ciphertext truncated. Chunk length extends beyond buffer.")
+        return length_field + payload, payload
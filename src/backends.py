@@ -0,0 +1,351 @@
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+# NumPy is imported on first use, so engines that only take the pure-Python
+# paths (short keystreams, high precisions) never load it
+if TYPE_CHECKING:
+    import numpy as np
+
+_UNLOADED = object()
+_gmpy2 = _UNLOADED
+# Per-thread scratch buffers of the NumPy backends (see _scratch)
+_local = threading.local()
+
+
+def load_gmpy2():
+    """Import the optional gmpy2 module on first use, returning None if it is not installed."""
+    global _gmpy2
+    if _gmpy2 is _UNLOADED:
+        try:
+            import gmpy2 as _gmpy2
+        except ImportError:  # pragma: no cover - optional dependency
+            _gmpy2 = None
+    return _gmpy2
+
+
+def __getattr__(name: str):
+    # ``backends.gmpy2`` stays available without importing gmpy2 eagerly
+    if name == 'gmpy2':
+        return load_gmpy2()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Largest modulus bit length handled by the uint64 path. Smaller moduli leave
+# wider limbs for mulmod_u64, so precision <= 15 needs at most five passes.
+MAX_UINT64_MODULUS_BITS = 52
+# Below this many bytes the per-call NumPy overhead outweighs the loop it saves
+NUMPY_MIN_LENGTH = 64
+DEFAULT_BLOCK_SIZE = 4096
+# Modulus of the power-of-two map. Low bits of its states have short periods
+# (bit j repeats within 2**(j+1) steps), so keystream bytes come from the top.
+BINARY_MODULUS = 1 << 64
+# Steps per wrapping-multiply block; one block covers a whole SUB_CHUNK_SIZE
+UINT64_BLOCK_SIZE = 64 * 1024
+# Larger keystreams get a fresh array rather than pinning a per-thread buffer
+MAX_SCRATCH_BYTES = 1 << 20
+
+
+def top_bytes(states: List[int], width: int, length: int) -> bytes:
+    """Return the top width bytes of each 64-bit state, most significant first, cut to length."""
+    shift = 64 - 8 * width
+    return b''.join([(s >> shift).to_bytes(width, 'big') for s in states])[:length]
+
+
+def mulmod_u64(a: "np.ndarray", b: "np.ndarray", modulus: int,
+               out: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """Compute (a * b) % modulus elementwise without overflowing uint64.
+
+    ``b`` is consumed in limbs small enough that every intermediate product
+    stays below 2**64, so the result is exact for any modulus whose bit
+    length is at most 62.
+
+    Args:
+        a: uint64 array of values below modulus
+        b: uint64 array of values below modulus (broadcastable against a)
+        modulus: Modulus of the chaotic map
+        out: Optional uint64 array of the broadcast shape to write into;
+            the limb arithmetic then runs in place with one temporary
+
+    Returns:
+        uint64 array of products reduced modulo modulus
+    """
+    import numpy as np
+
+    bits = modulus.bit_length()
+    shift = 63 - bits
+    limbs = -(-bits // shift)
+    mask = np.uint64((1 << shift) - 1)
+    m = np.uint64(modulus)
+    s = np.uint64(shift)
+
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+    result = np.empty(a.shape, dtype=np.uint64) if out is None else out
+    result.fill(0)
+    limb = np.empty(a.shape, dtype=np.uint64)
+    for i in reversed(range(limbs)):
+        # result = ((result << s) % m + a * limb) % m
+        np.right_shift(b, np.uint64(i * shift), out=limb)
+        np.bitwise_and(limb, mask, out=limb)
+        np.multiply(limb, a, out=limb)
+        np.left_shift(result, s, out=result)
+        np.remainder(result, m, out=result)
+        np.add(result, limb, out=result)
+        np.remainder(result, m, out=result)
+    return result
+
+
+def _scratch(name: str, size: int, dtype) -> "np.ndarray":
+    """Return this thread's scratch array called name, with at least size elements.
+
+    Keystream calls never nest, so backends share the buffers; reusing them
+    saves an allocation (and its page faults) per call, and threads never
+    see each other's buffers.
+    """
+    import numpy as np
+
+    if size * np.dtype(dtype).itemsize > MAX_SCRATCH_BYTES:
+        return np.empty(size, dtype=dtype)
+    buffer = getattr(_local, name, None)
+    if buffer is None or len(buffer) < size:
+        buffer = np.empty(size, dtype=dtype)
+        setattr(_local, name, buffer)
+    return buffer[:size]
+
+
+class PythonBackend:
+    """Reference backend: one arbitrary-precision multiplication per byte."""
+
+    name = 'python'
+
+    def supports(self, modulus: int) -> bool:
+        return True
+
+    def prepare(self, multiplier: int, modulus: int):
+        """Build any tables keystream(multiplier, modulus) needs (none for this backend)."""
+
+    def keystream(self, state: int, multiplier: int, length: int, modulus: int, width: int = 1) -> bytes:
+        """Return the low width bytes of state * multiplier**i % modulus for each step i.
+
+        Each step contributes ``width`` bytes, least significant first, and the
+        result is cut to length bytes. Width 1 gives
+        [(state * multiplier**i) % modulus % 256 for i in range(length)].
+        For BINARY_MODULUS the top width bytes are taken instead (see top_bytes).
+        """
+        if width == 1 and modulus != BINARY_MODULUS:
+            keystream = bytearray(length)
+            for i in range(length):
+                keystream[i] = state % 256
+                state = (state * multiplier) % modulus
+            return bytes(keystream)
+
+        states = [0] * -(-length // width)
+        for i in range(len(states)):
+            states[i] = state
+            state = (state * multiplier) % modulus
+        if modulus == BINARY_MODULUS:
+            return top_bytes(states, width, length)
+        mask = (1 << 8 * width) - 1
+        return b''.join([(s & mask).to_bytes(width, 'little') for s in states])[:length]
+
+
+class NumpyBackend:
+    """Vectorised uint64 backend for moduli of at most MAX_UINT64_MODULUS_BITS bits.
+
+    A block of keystream is ``state * P`` where ``P[i] = multiplier**i`` is a
+    cached power table, and consecutive blocks are linked by jump-ahead.
+
+    Instances are shared by every engine and safe to use from many threads:
+    power tables are read-only once published (two threads racing on a
+    first build compute identical tables), and intermediate arrays are
+    per-thread scratch buffers.
+    """
+
+    name = 'numpy'
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, min_length: int = NUMPY_MIN_LENGTH):
+        self.block_size = block_size
+        self.min_length = min_length
+        self._tables: Dict[Tuple[int, int], Tuple["np.ndarray", int]] = {}
+
+    def supports(self, modulus: int) -> bool:
+        return modulus.bit_length() <= MAX_UINT64_MODULUS_BITS
+
+    def prepare(self, multiplier: int, modulus: int):
+        self.power_table(multiplier, modulus)
+
+    def power_table(self, multiplier: int, modulus: int) -> Tuple["np.ndarray", int]:
+        """Return (multiplier**i % modulus for i < block_size, multiplier**block_size % modulus)."""
+        key = (multiplier, modulus)
+        cached = self._tables.get(key)
+        if cached is not None:
+            return cached
+
+        import numpy as np
+        table = np.ones(self.block_size, dtype=np.uint64)
+        filled = 1
+        step = multiplier % modulus
+        # Doubling: P[n:2n] = P[:n] * multiplier**n
+        while filled < self.block_size:
+            n = min(filled, self.block_size - filled)
+            mulmod_u64(table[:n], np.uint64(step), modulus, out=table[filled:filled + n])
+            filled += n
+            step = step * step % modulus
+        table.flags.writeable = False
+        cached = (table, pow(multiplier, self.block_size, modulus))
+        self._tables[key] = cached
+        return cached
+
+    def keystream(self, state: int, multiplier: int, length: int, modulus: int, width: int = 1) -> bytes:
+        if length < self.min_length:
+            return PYTHON_BACKEND.keystream(state, multiplier, length, modulus, width)
+        import numpy as np
+        table, block_jump = self.power_table(multiplier, modulus)
+        steps = -(-length // width)
+        out = _scratch('out', steps * width, np.uint8).reshape(steps, width)
+        values = _scratch('values', min(steps, self.block_size), np.uint64)
+        for start in range(0, steps, self.block_size):
+            n = min(self.block_size, steps - start)
+            mulmod_u64(np.uint64(state), table[:n], modulus, out=values[:n])
+            if width == 1:
+                np.copyto(out[start:start + n, 0], values[:n], casting='unsafe')
+            else:
+                # Low width bytes of each little-endian uint64
+                out[start:start + n] = values[:n].astype('<u8', copy=False).view(np.uint8).reshape(n, 8)[:, :width]
+            state = state * block_jump % modulus
+        return out.ravel()[:length].tobytes()
+
+
+class Gmpy2Backend:
+    """GMP-backed loop for high precisions, where Python big-int products dominate."""
+
+    name = 'gmpy2'
+
+    def supports(self, modulus: int) -> bool:
+        return load_gmpy2() is not None
+
+    def prepare(self, multiplier: int, modulus: int):
+        pass
+
+    def keystream(self, state: int, multiplier: int, length: int, modulus: int, width: int = 1) -> bytes:
+        gmpy2 = load_gmpy2()
+        m = gmpy2.mpz(modulus)
+        q = gmpy2.mpz(multiplier)
+        s = gmpy2.mpz(state)
+        if width == 1 and modulus != BINARY_MODULUS:
+            keystream = bytearray(length)
+            for i in range(length):
+                keystream[i] = s & 0xFF
+                s = s * q % m
+            return bytes(keystream)
+
+        states = [s] * -(-length // width)
+        for i in range(len(states)):
+            states[i] = s
+            s = s * q % m
+        if modulus == BINARY_MODULUS:
+            return top_bytes([int(v) for v in states], width, length)
+        mask = (1 << 8 * width) - 1
+        return b''.join([(int(v) & mask).to_bytes(width, 'little') for v in states])[:length]
+
+
+class Uint64Backend:
+    """Wrapping uint64 backend for the BINARY_MODULUS map.
+
+    Reduction mod 2**64 is the overflow of a uint64 multiply, so a block of
+    keystream is one ``state * P`` over a cached power table
+    ``P[i] = multiplier**i``, with no limbs and no Python loop per step.
+    Like NumpyBackend, it is thread-safe: read-only tables and per-thread
+    scratch buffers.
+    """
+
+    name = 'uint64'
+
+    def __init__(self, block_size: int = UINT64_BLOCK_SIZE):
+        self.block_size = block_size
+        self._tables: Dict[int, Tuple["np.ndarray", int]] = {}
+
+    def supports(self, modulus: int) -> bool:
+        return modulus == BINARY_MODULUS
+
+    def prepare(self, multiplier: int, modulus: int):
+        self.power_table(multiplier)
+
+    def power_table(self, multiplier: int) -> Tuple["np.ndarray", int]:
+        """Return (multiplier**i mod 2**64 for i < block_size, multiplier**block_size mod 2**64)."""
+        cached = self._tables.get(multiplier)
+        if cached is not None:
+            return cached
+
+        import numpy as np
+        table = np.ones(self.block_size, dtype=np.uint64)
+        filled = 1
+        step = multiplier % BINARY_MODULUS
+        # Doubling: P[n:2n] = P[:n] * multiplier**n, wrapping mod 2**64
+        while filled < self.block_size:
+            n = min(filled, self.block_size - filled)
+            np.multiply(table[:n], np.uint64(step), out=table[filled:filled + n])
+            filled += n
+            step = step * step % BINARY_MODULUS
+        table.flags.writeable = False
+        cached = (table, pow(multiplier, self.block_size, BINARY_MODULUS))
+        self._tables[multiplier] = cached
+        return cached
+
+    def keystream(self, state: int, multiplier: int, length: int, modulus: int, width: int = 1) -> bytes:
+        import numpy as np
+        table, block_jump = self.power_table(multiplier)
+        steps = -(-length // width)
+        out = _scratch('out', steps * width, np.uint8).reshape(steps, width)
+        values = _scratch('values', min(steps, self.block_size), np.uint64)
+        for start in range(0, steps, self.block_size):
+            n = min(self.block_size, steps - start)
+            np.multiply(table[:n], np.uint64(state), out=values[:n])
+            if width in (1, 2, 4, 8):
+                # Store the top bytes as one big-endian integer per step
+                rows = out[start:start + n].view(f'>u{width}').reshape(n)
+                np.copyto(rows, values[:n] >> np.uint64(64 - 8 * width), casting='unsafe')
+            else:
+                out[start:start + n] = values[:n].astype('>u8').view(np.uint8).reshape(n, 8)[:, :width]
+            state = state * block_jump % BINARY_MODULUS
+        return out.ravel()[:length].tobytes()
+
+
+PYTHON_BACKEND = PythonBackend()
+_BACKENDS = {
+    'python': PYTHON_BACKEND,
+    'numpy': NumpyBackend(),
+    'uint64': Uint64Backend(),
+    'gmpy2': Gmpy2Backend(),
+}
+
+
+def available_backends(modulus: Optional[int] = None) -> List[str]:
+    """Return the names of usable backends, optionally only those supporting modulus."""
+    return [name for name, backend in _BACKENDS.items()
+            if (name != 'gmpy2' or load_gmpy2() is not None)
+            and (modulus is None or backend.supports(modulus))]
+
+
+def select_backend(modulus: int, name: Optional[str] = None):
+    """Return the backend to use for a modulus.
+
+    Args:
+        modulus: Modulus of the chaotic map
+        name: 'python', 'numpy', 'uint64', 'gmpy2', or None to pick
+            automatically (wrapping uint64 for BINARY_MODULUS, NumPy where
+            uint64 arithmetic fits, else gmpy2 if installed, else pure Python)
+
+    Raises:
+        ValueError: If the named backend is unknown or cannot handle modulus
+    """
+    if name is None:
+        for candidate in ('uint64', 'numpy', 'gmpy2'):
+            if _BACKENDS[candidate].supports(modulus):
+                return _BACKENDS[candidate]
+        return PYTHON_BACKEND
+
+    backend = _BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {', '.join(_BACKENDS)}")
+    if not backend.supports(modulus):
+        raise ValueError(f"Backend '{name}' is not available for a {modulus.bit_length()}-bit modulus")
+    return backend
@@ -0,0 +1,299 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .core import ChaosEncrypt, validate_input
+from .pad_pool import PadPool
+
+# Parameters a manifest entry may override; the secret always comes from the caller
+PARAM_KEYS = ('precision', 'primes', 'chunk_size', 'base_k', 'dynamic_k', 'xor', 'mac')
+ENCRYPTED_SUFFIX = '.enc'
+MAC_SUFFIX = '.mac'
+# Default results manifest name in the output directory
+RESULTS_FILE = 'results.jsonl'
+# Files handed to a worker per task, so engines and pickling are amortised
+FILES_PER_TASK = 64
+IO_BUFFER_SIZE = 1 << 20
+
+_engines: Dict[Tuple, ChaosEncrypt] = {}
+
+
+def _params_key(params: Dict) -> Tuple:
+    return tuple(tuple(params[key]) if key == 'primes' else params[key] for key in PARAM_KEYS)
+
+
+def get_engine(params: Dict, secret: str, pad_pool: Optional[str] = None) -> ChaosEncrypt:
+    """Return the per-process engine for a parameter set, building it once.
+
+    Shared by the batch and cse workers, so a process reuses one engine per
+    parameter set. If pad_pool names a shared keystream pad pool, the engine
+    is attached to it (read-only); otherwise any pool left from an earlier
+    batch is dropped.
+
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    key = _params_key(params) + (secret,)
+    engine = _engines.get(key)
+    if engine is None:
+        validate_input(
+            precision=params['precision'],
+            primes=params['primes'],
+            secret=secret,
+            chunk_size=params['chunk_size'],
+            base_k=params['base_k']
+        )
+        engine = ChaosEncrypt(
+            precision=params['precision'],
+            primes=params['primes'],
+            shared_secret=secret,
+            chunk_size=params['chunk_size'],
+            base_k=params['base_k'],
+            use_dynamic_k=params['dynamic_k'],
+            use_xor=params['xor'],
+            use_mac=params['mac']
+        )
+        _engines[key] = engine
+
+    current = engine.pad_pool.name if engine.pad_pool is not None else None
+    if current != pad_pool:
+        if engine.pad_pool is not None:
+            engine.pad_pool.close()
+        engine.pad_pool = PadPool.attach(pad_pool, engine) if pad_pool else None
+    return engine
+
+
+def _is_glob(source: str) -> bool:
+    return any(c in source for c in '*?[')
+
+
+def _output_path(input_path: str, root: Optional[str], output_dir: str, mode: str) -> str:
+    relative = os.path.relpath(input_path, root) if root else os.path.basename(input_path)
+    if mode == 'encrypt':
+        return os.path.join(output_dir, relative + ENCRYPTED_SUFFIX)
+    if relative.endswith(ENCRYPTED_SUFFIX):
+        relative = relative[:-len(ENCRYPTED_SUFFIX)]
+    else:
+        relative += '.dec'
+    return os.path.join(output_dir, relative)
+
+
+def collect_jobs(source: str, output_dir: str, mode: str, params: Dict) -> List[Dict]:
+    """Expand a directory, glob pattern or JSONL manifest into batch jobs.
+
+    Manifest lines are JSON objects with an ``input`` path and optional
+    ``output`` path and parameter overrides (see PARAM_KEYS).
+
+    Args:
+        source: Directory, glob pattern, or path to a .jsonl manifest
+        output_dir: Directory outputs are written under
+        mode: 'encrypt' or 'decrypt'
+        params: Default parameters for every job
+
+    Returns:
+        List of job dictionaries with input, output and params keys
+
+    Raises:
+        ValueError: If the source cannot be read or a manifest line is invalid
+    """
+    jobs = []
+    if source.endswith('.jsonl') and os.path.isfile(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    input_path = entry['input']
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    raise ValueError(f"Invalid manifest entry on line {line_number}")
+                job_params = dict(params)
+                job_params.update({key: entry[key] for key in PARAM_KEYS if key in entry})
+                output = entry.get('output') or _output_path(input_path, None, output_dir, mode)
+                jobs.append({'input': input_path, 'output': output, 'params': job_params})
+        return jobs
+
+    if os.path.isdir(source):
+        # Skip what a batch writes next to its outputs, so an encrypt-batch
+        # output directory can be passed straight to decrypt-batch
+        root = source
+        paths = (os.path.join(dirpath, name)
+                 for dirpath, _, names in os.walk(source) for name in names
+                 if name != RESULTS_FILE and (mode == 'encrypt' or name.endswith(ENCRYPTED_SUFFIX)))
+    elif _is_glob(source):
+        root = None
+        paths = glob.glob(source, recursive=True)
+    else:
+        raise ValueError(f"Source '{source}' is not a directory, glob pattern or .jsonl manifest")
+
+    for path in sorted(paths):
+        if not os.path.isfile(path) or path.endswith(MAC_SUFFIX):
+            continue
+        jobs.append({
+            'input': path,
+            'output': _output_path(path, root, output_dir, mode),
+            'params': dict(params),
+        })
+    return jobs
+
+
+def load_completed(results_path: str) -> Set[str]:
+    """Return the inputs recorded as successfully processed in a results manifest."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a torn final line
+                continue
+            if entry.get('status') == 'ok' and os.path.exists(entry.get('output', '')):
+                completed.add(entry['input'])
+    return completed
+
+
+def _truncate_torn_line(results_path: str):
+    """Cut a results manifest back to its last complete line."""
+    if not os.path.exists(results_path):
+        return
+    with open(results_path, 'r+b') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def _encrypt_file(engine: ChaosEncrypt, job: Dict) -> Dict:
+    with open(job['input'], 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        plaintext = f.read()
+    ciphertext, mac = engine.encrypt(plaintext)
+    os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+    with open(job['output'], 'w', buffering=IO_BUFFER_SIZE) as f:
+        f.write(ciphertext.hex())
+    if mac is not None:
+        with open(job['output'] + MAC_SUFFIX, 'w') as f:
+            f.write(str(mac))
+    return {'mac': None if mac is None else str(mac), 'bytes': len(ciphertext)}
+
+
+def _decrypt_file(engine: ChaosEncrypt, job: Dict) -> Dict:
+    with open(job['input'], 'r', buffering=IO_BUFFER_SIZE) as f:
+        ciphertext = bytes.fromhex(f.read().strip())
+    mac = None
+    mac_file = job['input'] + MAC_SUFFIX
+    if engine.use_mac and os.path.exists(mac_file):
+        with open(mac_file, 'r') as f:
+            mac = int(f.read().strip())
+    plaintext = engine.decrypt(ciphertext, mac)
+    os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+    with open(job['output'], 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        f.write(plaintext)
+    return {'mac_verified': mac is not None, 'bytes': len(ciphertext)}
+
+
+def process_jobs(jobs: List[Dict], secret: str, mode: str,
+                 pad_pools: Optional[Dict[Tuple, str]] = None) -> List[Dict]:
+    """Process jobs sequentially, returning one result dictionary per job.
+
+    pad_pools maps a parameter key (see _params_key) to the name of a shared
+    pad pool for that parameter set.
+    """
+    handler = _encrypt_file if mode == 'encrypt' else _decrypt_file
+    pad_pools = pad_pools or {}
+    results = []
+    for job in jobs:
+        result = {'input': job['input'], 'output': job['output']}
+        try:
+            pool = pad_pools.get(_params_key(job['params']))
+            result.update(handler(get_engine(job['params'], secret, pool), job))
+            result['status'] = 'ok'
+        except (OSError, ValueError, UnicodeError) as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+        results.append(result)
+    return results
+
+
+def _tasks(jobs: List[Dict]) -> Iterable[List[Dict]]:
+    # Keep jobs sharing a parameter set together so each task reuses one engine
+    groups: Dict[Tuple, List[Dict]] = {}
+    for job in jobs:
+        groups.setdefault(_params_key(job['params']), []).append(job)
+    for group in groups.values():
+        for start in range(0, len(group), FILES_PER_TASK):
+            yield group[start:start + FILES_PER_TASK]
+
+
+def _create_pad_pools(jobs: List[Dict], secret: str, pad_chunks: int) -> Dict[Tuple, PadPool]:
+    # One pool per XOR parameter set, built once and shared by every worker.
+    # Invalid parameter sets get no pool; process_jobs records their jobs
+    # as errors.
+    pools = {}
+    invalid = set()
+    for job in jobs:
+        key = _params_key(job['params'])
+        if key in pools or key in invalid or not job['params']['xor']:
+            continue
+        try:
+            engine = get_engine(job['params'], secret)
+        except (TypeError, ValueError):
+            invalid.add(key)
+            continue
+        pools[key] = PadPool.create(engine, pad_chunks)
+    return pools
+
+
+def run_batch(jobs: List[Dict], secret: str, mode: str, results_path: str,
+              workers: int = 1, resume: bool = False, pad_chunks: int = 0) -> Dict[str, int]:
+    """Run a batch, appending one JSON line per processed file to results_path.
+
+    Args:
+        jobs: Jobs from collect_jobs
+        secret: Shared secret for every job
+        mode: 'encrypt' or 'decrypt'
+        results_path: Results manifest, appended to as files complete
+        workers: Number of worker processes (1 runs in-process)
+        resume: Skip inputs already recorded as successful in results_path
+        pad_chunks: If positive, precompute keystream pads for this many
+            leading chunk indices per parameter set in shared memory
+
+    Returns:
+        Counts of ok, error and skipped files
+    """
+    counts = {'ok': 0, 'error': 0, 'skipped': 0}
+    if resume:
+        # Appending after a line torn by a crash would corrupt the next record
+        _truncate_torn_line(results_path)
+        completed = load_completed(results_path)
+        pending = [job for job in jobs if job['input'] not in completed]
+        counts['skipped'] = len(jobs) - len(pending)
+        jobs = pending
+
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    with open(results_path, 'a' if resume else 'w', encoding='utf-8') as manifest:
+        def record(results: List[Dict]):
+            for result in results:
+                counts[result['status']] += 1
+                manifest.write(json.dumps(result) + '\n')
+            manifest.flush()
+
+        pools = _create_pad_pools(jobs, secret, pad_chunks) if pad_chunks > 0 else {}
+        names = {key: pool.name for key, pool in pools.items()}
+        try:
+            if workers <= 1:
+                for task in _tasks(jobs):
+                    record(process_jobs(task, secret, mode, names))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(process_jobs, task, secret, mode, names)
+                               for task in _tasks(jobs)]
+                    for future in as_completed(futures):
+                        record(future.result())
+        finally:
+            for pool in pools.values():
+                pool.close()
+                pool.unlink()
+    return counts
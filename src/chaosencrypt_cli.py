@@ -1,311 +1,38 @@
 #!/usr/bin/env python3
 
 import click
-import math
-from typing import List, Tuple, Optional
-import hmac
-import hashlib
 import os
+import json
 
-# Constants
-MAC_PRIME = int("1" + "0" * 64 + "67")  # Same as JS: 1e65 + 67
-DEFAULT_PRIME = 9973
-
-class ChaosEncrypt:
-    def __init__(self, 
-                 precision: int = 12,
-                 primes: List[int] = None,
-                 shared_secret: str = "",
-                 chunk_size: int = 16,
-                 base_k: int = 6,
-                 use_dynamic_k: bool = True,
-                 use_xor: bool = True,
-                 use_mac: bool = True,
-                 use_semantic_chunking: bool = True):
-        """Initialize ChaosEncrypt with configuration.
-        
-        Args:
-            precision: Precision for calculations (1-100)
-            primes: List of prime numbers for chaotic map
-            shared_secret: Secret key for encryption/decryption
-            chunk_size: Size of chunks for processing (1-1024)
-            base_k: Base k value for iterations (1-100)
-            use_dynamic_k: Whether to use dynamic k values
-            use_xor: Whether to use XOR mode
-            use_mac: Whether to use MAC verification
-            use_semantic_chunking: Whether to use semantic-aware chunking
-        """
-        self.precision = precision
-        self.modulus = 10 ** precision
-        self.primes = primes or [DEFAULT_PRIME]
-        self.shared_secret = shared_secret
-        self.chunk_size = chunk_size
-        self.base_k = base_k
-        self.use_dynamic_k = use_dynamic_k
-        self.use_xor = use_xor
-        self.use_mac = use_mac
-        self.use_semantic_chunking = False
-        self.embed_length = True
-
-    def derive_k(self, chunk_index: int) -> int:
-        """Derive dynamic k value for a chunk."""
-        if not self.use_dynamic_k:
-            return self.base_k
-        
-        # Use HMAC for more secure k derivation
-        h = hmac.new(
-            self.shared_secret.encode(),
-            f"{chunk_index}".encode(),
-            hashlib.sha256
-        )
-        derived = (self.base_k + 
-                  int.from_bytes(h.digest()[:4], 'big') % 50)
-        return max(derived, 1)  # Ensure k >= 1
-
-    def calculate_mac(self, data: bytes) -> int:
-        """Calculate MAC for encrypted data."""
-        if not self.use_mac:
-            return None
-        
-        # Use HMAC-SHA256 for more secure MAC
-        h = hmac.new(
-            self.shared_secret.encode(),
-            data,
-            hashlib.sha256
-        )
-        return int.from_bytes(h.digest(), 'big') % MAC_PRIME
-
-    def verify_mac(self, data: bytes, received_mac: int) -> bool:
-        """Verify MAC of decrypted data."""
-        if not self.use_mac:
-            return True
-        calculated_mac = self.calculate_mac(data)
-        return calculated_mac == received_mac
-
-    def chaotic_step(self, state: int, step: int) -> int:
-        """Perform one step of the chaotic map."""
-        prime = self.primes[step % len(self.primes)]
-        return (state * prime) % self.modulus
-
-    def generate_keystream(self, length: int, seed: int, k: int) -> bytes:
-        """Generate keystream bytes using chaotic map."""
-        state = seed
-        for step in range(k):
-            state = self.chaotic_step(state, step)
-        
-        # Generate keystream bytes
-        keystream = bytearray()
-        temp_state = state
-        for _ in range(length):
-            keystream.append(temp_state % 256)
-            temp_state = self.chaotic_step(temp_state, k)
-        return bytes(keystream)
-
-    def _split_into_chunks(self, text: str) -> List[str]:
-        """Split text into chunks while preserving UTF-8 characters and semantic boundaries.
-        
-        Args:
-            text: Input text to split
-            
-        Returns:
-            List of chunks preserving UTF-8 characters and semantic boundaries
-        """
-        if not self.use_semantic_chunking:
-            # Simple UTF-8 safe chunking
-            chunks = []
-            current_chunk = []
-            current_size = 0
-            
-            for char in text:
-                char_bytes = char.encode('utf-8')
-                if current_size + len(char_bytes) > self.chunk_size:
-                    chunks.append(''.join(current_chunk))
-                    current_chunk = [char]
-                    current_size = len(char_bytes)
-                else:
-                    current_chunk.append(char)
-                    current_size += len(char_bytes)
-            
-            if current_chunk:
-                chunks.append(''.join(current_chunk))
-            return chunks
-        else:
-            # Semantic-aware chunking
-            # Split on word boundaries and preserve punctuation
-            import re
-            words = re.findall(r'\b\w+\b|[^\w\s]', text)
-            chunks = []
-            current_chunk = []
-            current_size = 0
-            
-            for word in words:
-                word_bytes = word.encode('utf-8')
-                if current_size + len(word_bytes) > self.chunk_size:
-                    chunks.append(''.join(current_chunk))
-                    current_chunk = [word]
-                    current_size = len(word_bytes)
-                else:
-                    current_chunk.append(word)
-                    current_size += len(word_bytes)
-            
-            if current_chunk:
-                chunks.append(''.join(current_chunk))
-            return chunks
-
-    def encrypt(self, plaintext: str) -> Tuple[bytes, Optional[int]]:
-        """
-        Encrypt plaintext, returning (ciphertext, MAC).
-        If embed_length is True, each encrypted chunk is prefixed with a 2-byte length field.
-        """
-        # Split text (can be your semantic approach)
-        chunks = self._split_into_chunks(plaintext)
-
-        ciphertext_accumulator = bytearray()
-        chunk_index = 0
-
-        for chunk_str in chunks:
-            # Prepare data
-            chunk_bytes = chunk_str.encode('utf-8')
-            k = self.derive_k(chunk_index)
-
-            # Derive seed from chunk_index + shared_secret
-            h = hmac.new(self.shared_secret.encode(), f"{chunk_index}".encode(), hashlib.sha256)
-            seed = int.from_bytes(h.digest()[:8], 'big') % self.modulus
-
-            if self.use_xor:
-                keystream = self.generate_keystream(len(chunk_bytes), seed, k)
-                encrypted_chunk = bytes(a ^ b for a, b in zip(chunk_bytes, keystream))
-            else:
-                # Direct mode
-                state = int.from_bytes(chunk_bytes, 'big') % self.modulus
-                for step in range(k):
-                    state = self.chaotic_step(state, step)
-                encrypted_chunk = state.to_bytes(len(chunk_bytes), 'big')
-
-            if self.embed_length:
-                # 2-byte length field
-                length_field = (len(encrypted_chunk)).to_bytes(2, 'big')
-                ciphertext_accumulator.extend(length_field)
-            ciphertext_accumulator.extend(encrypted_chunk)
-
-            chunk_index += 1
-
-        mac = self.calculate_mac(ciphertext_accumulator) if self.use_mac else None
-        return bytes(ciphertext_accumulator), mac
-
-    def decrypt(self, ciphertext: bytes, mac: Optional[int] = None) -> str:
-        """
-        Decrypt ciphertext. If embed_length is True,
-        read 2 bytes length field before each chunk.
-        """
-        if self.use_mac and mac is not None:
-            if not self.verify_mac(ciphertext, mac):
-                raise ValueError("MAC verification failed")
-
-        idx = 0
-        chunk_index = 0
-        decrypted_accumulator = []
-
-        while idx < len(ciphertext):
-            if self.embed_length:
-                # parse the length field
-                if idx + 2 > len(ciphertext):
-                    raise ValueError("Ciphertext truncated. No space for chunk length.")
-                chunk_len_bytes = ciphertext[idx:idx+2]
-                chunk_len = int.from_bytes(chunk_len_bytes, 'big')
-                idx += 2
-                # read the chunk
-                if idx + chunk_len > len(ciphertext):
-                    raise ValueError("Ciphertext truncated. Chunk length extends beyond buffer.")
-                chunk_data = ciphertext[idx:idx+chunk_len]
-                idx += chunk_len
-            else:
-                # fallback: read chunk_size or until end
-                end = min(idx + self.chunk_size, len(ciphertext))
-                chunk_data = ciphertext[idx:end]
-                chunk_len = len(chunk_data)
-                idx = end
-
-            # derive same seed/k
-            k = self.derive_k(chunk_index)
-            h = hmac.new(self.shared_secret.encode(), f"{chunk_index}".encode(), hashlib.sha256)
-            seed = int.from_bytes(h.digest()[:8], 'big') % self.modulus
-
-            if self.use_xor:
-                keystream = self.generate_keystream(chunk_len, seed, k)
-                decrypted_chunk_bytes = bytes(a ^ b for a, b in zip(chunk_data, keystream))
-            else:
-                state = int.from_bytes(chunk_data, 'big')
-                for step in range(k):
-                    # reverse order for direct mode
-                    state = self.chaotic_step(state, k - step - 1)
-                decrypted_chunk_bytes = state.to_bytes(chunk_len, 'big')
+from .compression import COMPRESSIONS
+from .core import (CHAOTIC_MAPS, FRAMING_COMPACT, FRAMING_LENGTH, FRAMINGS, MAP_DECIMAL, MAP_BINARY64,
+                   ChaosEncrypt, ciphertext_map, validate_input)
 
-            try:
-                decrypted_accumulator.append(decrypted_chunk_bytes.decode('utf-8'))
-            except UnicodeDecodeError:
-                raise ValueError("Decryption failed: Invalid key or corrupted data")
-
-            chunk_index += 1
-
-        return ''.join(decrypted_accumulator)
-
-def validate_input(precision: int, primes: List[int], secret: str, chunk_size: int, 
-                  base_k: int, mac_value: Optional[str] = None, ciphertext: Optional[str] = None) -> None:
-    """Validate input parameters for encryption/decryption operations.
-    
-    Args:
-        precision: Precision for calculations (1-100)
-        primes: List of prime numbers
-        secret: Shared secret key
-        chunk_size: Size of chunks for processing (1-1024)
-        base_k: Base k value for iterations (1-100)
-        mac_value: Optional MAC value for verification
-        ciphertext: Optional ciphertext for decryption
-    
-    Raises:
-        ValueError: If any input parameter is invalid
-    """
-    # Validate precision
-    if not isinstance(precision, int) or precision < 1 or precision > 100:
-        raise ValueError("Precision must be an integer between 1 and 100")
-    
-    # Validate primes
-    if not primes:
-        raise ValueError("At least one prime number must be provided")
-    for prime in primes:
-        if not isinstance(prime, int) or prime < 2:
-            raise ValueError("All primes must be integers greater than 1")
-    
-    # Validate secret
-    if not secret or not isinstance(secret, str):
-        raise ValueError("Secret must be a non-empty string")
-    
-    # Validate chunk_size
-    if not isinstance(chunk_size, int) or chunk_size < 1 or chunk_size > 1024:
-        raise ValueError("Chunk size must be an integer between 1 and 1024")
-    
-    # Validate base_k
-    if not isinstance(base_k, int) or base_k < 1 or base_k > 100:
-        raise ValueError("Base k must be an integer between 1 and 100")
-    
-    # Validate mac_value if provided
-    if mac_value is not None:
-        try:
-            int(mac_value)
-        except ValueError:
-            raise ValueError("MAC value must be a valid integer")
-    
-    # Validate ciphertext if provided
-    if ciphertext is not None:
-        if not isinstance(ciphertext, str):
-            raise ValueError("Ciphertext must be a string")
-        if not ciphertext:
-            raise ValueError("Ciphertext cannot be empty")
-        try:
-            bytes.fromhex(ciphertext)
-        except ValueError:
-            raise ValueError("Ciphertext must be a valid hexadecimal string")
+def _default_workers() -> int:
+    """Return the tuning profile's worker count, else the CPU count."""
+    from .tuning import tuned_value
+    return tuned_value('workers', os.cpu_count() or 1)
+
+def _connect_daemon(socket_path, precision, prime_list, secret, chunk_size, base_k, dynamic_k, xor, mac):
+    """Return a daemon-backed engine, or None after reporting a connection error."""
+    from .daemon import DaemonClient, encode_config
+
+    try:
+        client = DaemonClient(socket_path)
+    except OSError as e:
+        click.echo(f"Error: Cannot connect to daemon at '{socket_path}': {str(e)}", err=True)
+        click.echo("Start it with: chaosencrypt serve --socket <path>", err=True)
+        return None
+    return client.engine(encode_config(
+        precision=precision,
+        primes=prime_list,
+        secret=secret,
+        chunk_size=chunk_size,
+        base_k=base_k,
+        dynamic_k=dynamic_k,
+        xor=xor,
+        mac=mac
+    ))
 
 @click.group()
 def cli():
@@ -323,8 +50,16 @@ def cli():
 @click.option('--mac/--no-mac', default=True, help='Use MAC')
 @click.option('--input-file', type=click.Path(exists=True), help='Input file to encrypt')
 @click.option('--output-file', type=click.Path(), help='Output file for encrypted data')
+@click.option('--socket', 'socket_path', type=click.Path(), help='Send the request to a running `serve` daemon')
+@click.option('--framing', type=click.Choice(FRAMINGS), default=FRAMING_LENGTH, help='Chunk framing: 2-byte lengths or compact table')
+@click.option('--binary', is_flag=True, help='Treat the input as raw bytes instead of UTF-8 text')
+@click.option('--width', default=1, help='Keystream bytes extracted per chaotic step (above 1 needs compact framing)')
+@click.option('--map', 'chaotic_map', type=click.Choice(CHAOTIC_MAPS), default=MAP_DECIMAL,
+              help='Chaotic map: mod 10**precision, or mod 2**64 (compact framing, odd primes)')
+@click.option('--compress', 'compression', type=click.Choice(COMPRESSIONS),
+              help='Compress before encryption; auto picks a codec or none (compact framing)')
 @click.argument('message', required=False)
-def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac, input_file, output_file, message):
+def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac, input_file, output_file, socket_path, framing, binary, width, chaotic_map, compression, message):
     """Encrypt a message using CHAOSENCRYPT."""
     try:
         # Validate input source
@@ -362,7 +97,11 @@ def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
                 primes=prime_list,
                 secret=secret,
                 chunk_size=chunk_size,
-                base_k=base_k
+                base_k=base_k,
+                framing=framing,
+                keystream_width=width,
+                chaotic_map=chaotic_map,
+                compression=compression
             )
         except ValueError as e:
             click.echo(f"Error: {str(e)}", err=True)
@@ -370,19 +109,44 @@ def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
             return 1
         
         # Create encryptor
-        encryptor = ChaosEncrypt(
-            precision=precision,
-            primes=prime_list,
-            shared_secret=secret,
-            chunk_size=chunk_size,
-            base_k=base_k,
-            use_dynamic_k=dynamic_k,
-            use_xor=xor,
-            use_mac=mac
-        )
+        if socket_path:
+            if framing != FRAMING_LENGTH or binary:
+                click.echo("Error: The daemon only supports length-framed text.", err=True)
+                return 1
+            encryptor = _connect_daemon(socket_path, precision, prime_list, secret,
+                                        chunk_size, base_k, dynamic_k, xor, mac)
+            if encryptor is None:
+                return 1
+        else:
+            encryptor = ChaosEncrypt(
+                precision=precision,
+                primes=prime_list,
+                shared_secret=secret,
+                chunk_size=chunk_size,
+                base_k=base_k,
+                use_dynamic_k=dynamic_k,
+                use_xor=xor,
+                use_mac=mac,
+                framing=framing,
+                keystream_width=width,
+                chaotic_map=chaotic_map,
+                compression=compression
+            )
         
         # Get input data
-        if input_file:
+        if input_file and binary:
+            try:
+                with open(input_file, 'rb') as f:
+                    message = f.read()
+                    if not message:
+                        click.echo(f"Error: Input file '{input_file}' is empty.", err=True)
+                        click.echo("Please provide a file containing data to encrypt.", err=True)
+                        return 0
+            except Exception as e:
+                click.echo(f"Error reading input file '{input_file}': {str(e)}", err=True)
+                click.echo("Please check file permissions and try again.", err=True)
+                return 0
+        elif input_file:
             try:
                 with open(input_file, 'r', encoding='utf-8') as f:
                     message = f.read()
@@ -401,7 +165,11 @@ def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
         
         # Encrypt
         try:
-            ciphertext, mac_value = encryptor.encrypt(message)
+            if binary:
+                data = message if isinstance(message, bytes) else message.encode('utf-8')
+                ciphertext, mac_value = encryptor.encrypt_bytes(data)
+            else:
+                ciphertext, mac_value = encryptor.encrypt(message)
         except UnicodeEncodeError:
             click.echo("Error: Input contains invalid UTF-8 characters.", err=True)
             click.echo("Please ensure your input contains only valid UTF-8 text.", err=True)
@@ -448,8 +216,10 @@ def encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
 @click.option('--mac-value', help='MAC value for verification')
 @click.option('--input-file', type=click.Path(exists=True), help='Input file containing ciphertext')
 @click.option('--output-file', type=click.Path(), help='Output file for decrypted data')
+@click.option('--socket', 'socket_path', type=click.Path(), help='Send the request to a running `serve` daemon')
+@click.option('--binary', is_flag=True, help='Output raw bytes instead of UTF-8 text')
 @click.argument('ciphertext', required=False)
-def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac, mac_value, input_file, output_file, ciphertext):
+def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac, mac_value, input_file, output_file, socket_path, binary, ciphertext):
     """Decrypt a message using CHAOSENCRYPT."""
     try:
         # Validate input source
@@ -517,18 +287,6 @@ def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
             click.echo("Please check the documentation for valid parameter ranges.", err=True)
             return 1
         
-        # Create decryptor
-        decryptor = ChaosEncrypt(
-            precision=precision,
-            primes=prime_list,
-            shared_secret=secret,
-            chunk_size=chunk_size,
-            base_k=base_k,
-            use_dynamic_k=dynamic_k,
-            use_xor=xor,
-            use_mac=mac
-        )
-        
         # Convert hex ciphertext to bytes
         try:
             ciphertext_bytes = bytes.fromhex(ciphertext)
@@ -538,12 +296,40 @@ def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
             click.echo("Example: 48656c6c6f20576f726c64", err=True)
             return 1
         
+        # Create decryptor
+        if socket_path:
+            if binary:
+                click.echo("Error: The daemon only supports length-framed text.", err=True)
+                return 1
+            decryptor = _connect_daemon(socket_path, precision, prime_list, secret,
+                                        chunk_size, base_k, dynamic_k, xor, mac)
+            if decryptor is None:
+                return 1
+        else:
+            # The header names the map variant; binary64 is always compact
+            chaotic_map = ciphertext_map(ciphertext_bytes)
+            decryptor = ChaosEncrypt(
+                precision=precision,
+                primes=prime_list,
+                shared_secret=secret,
+                chunk_size=chunk_size,
+                base_k=base_k,
+                use_dynamic_k=dynamic_k,
+                use_xor=xor,
+                use_mac=mac,
+                framing=FRAMING_COMPACT if chaotic_map == MAP_BINARY64 else FRAMING_LENGTH,
+                chaotic_map=chaotic_map
+            )
+        
         # Parse MAC if provided
         mac_int = int(mac_value) if mac_value else None
         
         # Decrypt
         try:
-            plaintext = decryptor.decrypt(ciphertext_bytes, mac_int)
+            if binary:
+                plaintext = decryptor.decrypt_bytes(ciphertext_bytes, mac_int)
+            else:
+                plaintext = decryptor.decrypt(ciphertext_bytes, mac_int)
         except ValueError as e:
             click.echo(f"Decryption failed: {str(e)}", err=True)
             click.echo("Possible causes:", err=True)
@@ -555,13 +341,20 @@ def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
         # Output result
         if output_file:
             try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(plaintext)
+                if binary:
+                    with open(output_file, 'wb') as f:
+                        f.write(plaintext)
+                else:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        f.write(plaintext)
                 click.echo(f"Success: Decrypted data written to '{output_file}'")
             except Exception as e:
                 click.echo(f"Error writing output file '{output_file}': {str(e)}", err=True)
                 click.echo("Please check file permissions and try again.", err=True)
                 return 1
+        elif binary:
+            # Raw bytes only, so the output can be piped
+            click.get_binary_stream('stdout').write(plaintext)
         else:
             click.echo("Decrypted message:")
             click.echo(plaintext)
@@ -573,5 +366,606 @@ def decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
         click.echo("Please report this issue if it persists.", err=True)
         return 1
 
+def _run_batch(mode, precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
+               output_dir, results_path, workers, resume, pad_chunks, source):
+    """Shared implementation of encrypt-batch and decrypt-batch."""
+    from .batch import RESULTS_FILE, collect_jobs, run_batch
+
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return 1
+
+    params = {
+        'precision': precision,
+        'primes': prime_list,
+        'chunk_size': chunk_size,
+        'base_k': base_k,
+        'dynamic_k': dynamic_k,
+        'xor': xor,
+        'mac': mac,
+    }
+    try:
+        validate_input(precision=precision, primes=prime_list, secret=secret,
+                       chunk_size=chunk_size, base_k=base_k)
+        jobs = collect_jobs(source, output_dir, mode, params)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+
+    results_path = results_path or os.path.join(output_dir, RESULTS_FILE)
+    counts = run_batch(jobs, secret, mode, results_path, workers=workers, resume=resume,
+                       pad_chunks=pad_chunks)
+    click.echo(f"Processed {len(jobs)} files: {counts['ok']} ok, "
+               f"{counts['error']} failed, {counts['skipped']} skipped")
+    click.echo(f"Results manifest: '{results_path}'")
+    return 0 if counts['error'] == 0 else 1
+
+@cli.command('encrypt-batch')
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=16, help='Chunk size for processing')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--xor/--no-xor', default=True, help='Use XOR mode')
+@click.option('--mac/--no-mac', default=True, help='Use MAC')
+@click.option('--output-dir', required=True, type=click.Path(), help='Directory for encrypted files')
+@click.option('--manifest', 'results_path', type=click.Path(), help='Results manifest (default: OUTPUT_DIR/results.jsonl)')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Number of worker processes (default: tuned profile or CPU count)')
+@click.option('--resume', is_flag=True, help='Skip files already recorded as done in the manifest')
+@click.option('--pad-chunks', default=0, help='Precompute shared keystream pads for this many leading chunks')
+@click.argument('source')
+def encrypt_batch(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
+                  output_dir, results_path, workers, resume, pad_chunks, source):
+    """Encrypt every file in a directory, glob pattern or JSONL manifest."""
+    return _run_batch('encrypt', precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
+                      output_dir, results_path, workers, resume, pad_chunks, source)
+
+@cli.command('decrypt-batch')
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=16, help='Chunk size for processing')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--xor/--no-xor', default=True, help='Use XOR mode')
+@click.option('--mac/--no-mac', default=True, help='Use MAC')
+@click.option('--output-dir', required=True, type=click.Path(), help='Directory for decrypted files')
+@click.option('--manifest', 'results_path', type=click.Path(), help='Results manifest (default: OUTPUT_DIR/results.jsonl)')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Number of worker processes (default: tuned profile or CPU count)')
+@click.option('--resume', is_flag=True, help='Skip files already recorded as done in the manifest')
+@click.option('--pad-chunks', default=0, help='Precompute shared keystream pads for this many leading chunks')
+@click.argument('source')
+def decrypt_batch(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
+                  output_dir, results_path, workers, resume, pad_chunks, source):
+    """Decrypt every .enc file (with its .mac sidecar) from a directory, glob or manifest."""
+    return _run_batch('decrypt', precision, primes, secret, chunk_size, base_k, dynamic_k, xor, mac,
+                      output_dir, results_path, workers, resume, pad_chunks, source)
+
+def _run_inplace(mode, precision, primes, secret, chunk_size, base_k, dynamic_k, mac,
+                 mac_mode, mac_value, workers, path):
+    """Shared implementation of encrypt-file and decrypt-file."""
+    from .inplace import decrypt_file_inplace, encrypt_file_inplace
+
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return 1
+
+    try:
+        # Unframed, so the compact-framing chunk size limit applies
+        validate_input(precision=precision, primes=prime_list, secret=secret,
+                       chunk_size=chunk_size, base_k=base_k, framing=FRAMING_COMPACT)
+        encryptor = ChaosEncrypt(
+            precision=precision,
+            primes=prime_list,
+            shared_secret=secret,
+            chunk_size=chunk_size,
+            base_k=base_k,
+            use_dynamic_k=dynamic_k,
+            use_xor=True,
+            use_mac=mac,
+            framing=FRAMING_COMPACT
+        )
+        if mode == 'encrypt':
+            mac_value = encrypt_file_inplace(encryptor, path, mac_mode=mac_mode, workers=workers)
+            click.echo(f"Encrypted '{path}' in place")
+            if mac_value is not None:
+                click.echo(f"MAC: {mac_value}")
+        else:
+            decrypt_file_inplace(encryptor, path, mac=mac_value, mac_mode=mac_mode, workers=workers)
+            click.echo(f"Decrypted '{path}' in place")
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    return 0
+
+@cli.command('encrypt-file')
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=1024 * 1024, help='Keystream chunk size in bytes')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--mac/--no-mac', default=True, help='Use MAC')
+@click.option('--mac-mode', type=click.Choice(['sidecar', 'trailer']), default='sidecar',
+              help='Store the MAC in PATH.mac or as a trailer appended to PATH')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Number of region worker processes (default: tuned profile or CPU count)')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def encrypt_file(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, mac_mode, workers, path):
+    """Encrypt a file in place (XOR mode, unframed, length-preserving)."""
+    return _run_inplace('encrypt', precision, primes, secret, chunk_size, base_k, dynamic_k, mac,
+                        mac_mode, None, workers, path)
+
+@cli.command('decrypt-file')
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=1024 * 1024, help='Keystream chunk size in bytes')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--mac/--no-mac', default=True, help='Use MAC')
+@click.option('--mac-mode', type=click.Choice(['sidecar', 'trailer']), default='sidecar',
+              help='Read the MAC from PATH.mac or from a trailer at the end of PATH')
+@click.option('--mac-value', type=int, help='MAC to verify instead of the stored one')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Number of region worker processes (default: tuned profile or CPU count)')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def decrypt_file(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, mac_mode, mac_value,
+                 workers, path):
+    """Verify and decrypt a file encrypted with encrypt-file, in place."""
+    return _run_inplace('decrypt', precision, primes, secret, chunk_size, base_k, dynamic_k, mac,
+                        mac_mode, mac_value, workers, path)
+
+def _compact_engine(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map):
+    """Return a compact-framing engine for the shard and chunk store commands, or None after reporting an error."""
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return None
+    try:
+        validate_input(precision=precision, primes=prime_list, secret=secret,
+                       chunk_size=chunk_size, base_k=base_k, framing=FRAMING_COMPACT,
+                       keystream_width=width, chaotic_map=chaotic_map)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return None
+    return ChaosEncrypt(precision=precision, primes=prime_list, shared_secret=secret,
+                        chunk_size=chunk_size, base_k=base_k, use_dynamic_k=dynamic_k,
+                        use_mac=mac, framing=FRAMING_COMPACT, keystream_width=width,
+                        chaotic_map=chaotic_map)
+
+def _shard_engine_options(command):
+    """Add the engine options shared by shard-encrypt, shard-merge and shard-decrypt."""
+    options = [
+        click.option('--precision', default=12, help='Precision for calculations'),
+        click.option('--primes', default='9973', help='Comma-separated list of primes'),
+        click.option('--secret', prompt=True, hide_input=True, help='Shared secret'),
+        click.option('--chunk-size', default=1024 * 1024, help='Chunk size in bytes (must match the manifest)'),
+        click.option('--base-k', default=6, help='Base k value for iterations'),
+        click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k'),
+        click.option('--mac/--no-mac', default=True, help='Use MAC'),
+        click.option('--width', default=1, help='Keystream bytes extracted per chaotic step'),
+        click.option('--map', 'chaotic_map', type=click.Choice(CHAOTIC_MAPS), default=MAP_DECIMAL,
+                     help='Chaotic map: mod 10**precision, or mod 2**64 (odd primes)'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+@cli.command('shard-plan')
+@click.option('--chunk-size', default=1024 * 1024, help='Chunk size in bytes of the engine that encrypts the shards')
+@click.option('--shards', type=int, help='Number of shards')
+@click.option('--shard-size', type=int, help='Bytes per shard, a multiple of the chunk size')
+@click.option('--output', required=True, type=click.Path(), help='Manifest file to write')
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+def shard_plan(chunk_size, shards, shard_size, output, input_file):
+    """Plan the shards of a file: byte ranges and starting chunk indices."""
+    from .shard import plan_shards, save_manifest
+
+    try:
+        manifest = plan_shards(os.path.getsize(input_file), chunk_size, shards=shards, shard_size=shard_size)
+        save_manifest(manifest, output)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Planned {len(manifest['shards'])} shards of {manifest['chunks']} chunks in '{output}'")
+    return 0
+
+@cli.command('shard-encrypt')
+@_shard_engine_options
+@click.option('--index', 'indices', multiple=True, type=int, required=True,
+              help='Shard to encrypt (repeatable)')
+@click.option('--segments', 'directory', default='.', type=click.Path(file_okay=False),
+              help='Directory receiving the segment and shard MAC files')
+@click.argument('manifest_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+def shard_encrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map,
+                  indices, directory, manifest_file, input_file):
+    """Encrypt shards of a file planned by shard-plan; nodes can run this independently."""
+    from .shard import encrypt_shard_file, load_manifest, segment_path
+
+    encryptor = _compact_engine(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map)
+    if encryptor is None:
+        return 1
+    try:
+        manifest = load_manifest(manifest_file)
+        os.makedirs(directory, exist_ok=True)
+        for index in indices:
+            if not 0 <= index < len(manifest['shards']):
+                raise ValueError(f"Shard index {index} is out of range (0-{len(manifest['shards']) - 1})")
+            encrypt_shard_file(encryptor, manifest, index, input_file, directory)
+            click.echo(f"Encrypted shard {index} to '{segment_path(directory, index)}'")
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    return 0
+
+@cli.command('shard-merge')
+@_shard_engine_options
+@click.option('--segments', 'directory', default='.', type=click.Path(exists=True, file_okay=False),
+              help='Directory holding the segment and shard MAC files')
+@click.argument('manifest_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_file', type=click.Path(dir_okay=False))
+def shard_merge(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map,
+                directory, manifest_file, output_file):
+    """Merge encrypted shards into one binary ciphertext and combine their MACs."""
+    from .shard import load_manifest, merge_files
+
+    encryptor = _compact_engine(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map)
+    if encryptor is None:
+        return 1
+    try:
+        mac_value = merge_files(encryptor, load_manifest(manifest_file), directory, output_file)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Merged shards into '{output_file}'")
+    if mac_value is not None:
+        click.echo(f"MAC: {mac_value}")
+    return 0
+
+@cli.command('shard-decrypt')
+@_shard_engine_options
+@click.option('--mac-value', type=int, help='MAC to verify instead of INPUT_FILE.mac')
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_file', type=click.Path(dir_okay=False))
+def shard_decrypt(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map,
+                  mac_value, input_file, output_file):
+    """Verify and decrypt a binary ciphertext written by shard-merge."""
+    encryptor = _compact_engine(precision, primes, secret, chunk_size, base_k, dynamic_k, mac, width, chaotic_map)
+    if encryptor is None:
+        return 1
+    try:
+        if mac and mac_value is None:
+            if not os.path.exists(input_file + '.mac'):
+                raise ValueError(f"No MAC found for '{input_file}'")
+            with open(input_file + '.mac', 'r') as f:
+                mac_value = int(f.read().strip())
+        with open(input_file, 'rb') as f:
+            plaintext = encryptor.decrypt_bytes(f.read(), mac_value)
+        with open(output_file, 'wb') as f:
+            f.write(plaintext)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Success: Decrypted data written to '{output_file}'")
+    return 0
+
+def _chunk_store_options(command):
+    """Add the options shared by encrypt-cdc and decrypt-cdc."""
+    # Defaults match src.chunk_store, which is not imported here because it loads NumPy
+    options = [
+        click.option('--precision', default=12, help='Precision for calculations'),
+        click.option('--primes', default='9973', help='Comma-separated list of primes'),
+        click.option('--secret', prompt=True, hide_input=True, help='Shared secret'),
+        click.option('--base-k', default=6, help='Base k value for iterations'),
+        click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k'),
+        click.option('--mac/--no-mac', default=True, help='Use MAC'),
+        click.option('--min-size', default=16 * 1024, help='Smallest content-defined chunk in bytes'),
+        click.option('--avg-size', default=64 * 1024, help='Power of two setting the average chunk size'),
+        click.option('--max-size', default=256 * 1024, help='Largest content-defined chunk in bytes'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+def _open_chunk_store(store, precision, primes, secret, base_k, dynamic_k, mac, min_size, avg_size, max_size):
+    """Return the chunk store in directory store, or None after reporting an error."""
+    from .chunk_store import ChunkStore
+
+    # Chunks are cut by content, so the engine's chunk size is unused
+    encryptor = _compact_engine(precision, primes, secret, min_size, base_k, dynamic_k, mac, 1, MAP_DECIMAL)
+    if encryptor is None:
+        return None
+    try:
+        return ChunkStore(store, encryptor, min_size=min_size, avg_size=avg_size, max_size=max_size)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return None
+
+@cli.command('encrypt-cdc')
+@_chunk_store_options
+@click.argument('store', type=click.Path(file_okay=False))
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+def encrypt_cdc(precision, primes, secret, base_k, dynamic_k, mac, min_size, avg_size, max_size, store,
+                input_file):
+    """Encrypt a file into a content-defined chunk store, re-encrypting only changed chunks."""
+    chunk_store = _open_chunk_store(store, precision, primes, secret, base_k, dynamic_k, mac,
+                                    min_size, avg_size, max_size)
+    if chunk_store is None:
+        return 1
+    try:
+        stats = chunk_store.write(input_file)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Stored '{input_file}' as {stats['chunks']} chunks: {stats['encrypted']} encrypted "
+               f"({stats['encrypted_bytes']} bytes), {stats['chunks'] - stats['encrypted']} unchanged")
+    return 0
+
+@cli.command('decrypt-cdc')
+@_chunk_store_options
+@click.argument('store', type=click.Path(exists=True, file_okay=False))
+@click.argument('output_file', type=click.Path(dir_okay=False))
+def decrypt_cdc(precision, primes, secret, base_k, dynamic_k, mac, min_size, avg_size, max_size, store,
+                output_file):
+    """Verify and decrypt a content-defined chunk store to a file."""
+    chunk_store = _open_chunk_store(store, precision, primes, secret, base_k, dynamic_k, mac,
+                                    min_size, avg_size, max_size)
+    if chunk_store is None:
+        return 1
+    try:
+        chunk_store.export(output_file)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Success: Decrypted data written to '{output_file}'")
+    return 0
+
+@cli.command()
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=16, help='Chunk size for processing')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--xor/--no-xor', default=True, help='Use XOR mode')
+@click.option('--window', default=64, help='Ciphertext bytes per vector (zero-padded)')
+@click.option('--memory-budget', default=256, help='MiB available for similarity blocks in flight')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Encryption processes and matmul threads (default: tuned profile or CPU count)')
+@click.option('--output', required=True, type=click.Path(), help='Similarity matrix path (.csv or .npy)')
+@click.option('--vectors', 'vectors_path', type=click.Path(), help='Also save the ciphertext vectors as .npy')
+@click.argument('corpus', type=click.Path(exists=True))
+def cse(precision, primes, secret, chunk_size, base_k, dynamic_k, xor, window, memory_budget,
+        workers, output, vectors_path, corpus):
+    """Compute the Chaotic Structural Echo similarity matrix of a corpus.
+
+    CORPUS is a text file with one text per line or a directory with one
+    text per file. Each text is encrypted, its first WINDOW ciphertext bytes
+    form a vector, and the pairwise cosine similarities are written as a
+    labelled CSV (S0, S1, ...) or a .npy matrix.
+    """
+    from .cse import read_corpus, run_cse
+
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return 1
+
+    params = {
+        'precision': precision,
+        'primes': prime_list,
+        'chunk_size': chunk_size,
+        'base_k': base_k,
+        'dynamic_k': dynamic_k,
+        'xor': xor,
+        'mac': False,
+    }
+    try:
+        validate_input(precision=precision, primes=prime_list, secret=secret,
+                       chunk_size=chunk_size, base_k=base_k)
+        texts = read_corpus(corpus)
+        n = run_cse(texts, params, secret, output, window=window,
+                    memory_budget=memory_budget * 1024 * 1024, workers=workers,
+                    vectors_path=vectors_path)
+    except (ValueError, UnicodeDecodeError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+
+    click.echo(f"Similarity matrix of {n} texts written to '{output}'")
+    return 0
+
+@cli.command()
+@click.option('--precision', default=12, help='Precision for calculations')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--chunk-size', default=16, help='Chunk size for processing')
+@click.option('--base-k', default=6, help='Base k value for iterations')
+@click.option('--dynamic-k/--no-dynamic-k', default=True, help='Use dynamic k')
+@click.option('--bytes', 'n_bytes', default=1024 * 1024, help='Keystream bytes to generate and test')
+@click.option('--min-entropy', default=4.0, help='Assessed min-entropy per byte used for the test cutoffs')
+@click.option('--entropy-floor', type=float, help='Also fail batches whose min-entropy estimate is below this')
+@click.option('--width', default=1, help='Keystream bytes extracted per chaotic step')
+@click.option('--map', 'chaotic_map', type=click.Choice(CHAOTIC_MAPS), default=MAP_DECIMAL,
+              help='Chaotic map: mod 10**precision, or mod 2**64 (odd primes)')
+def health(precision, primes, secret, chunk_size, base_k, dynamic_k, n_bytes, min_entropy, entropy_floor, width,
+           chaotic_map):
+    """Run the online keystream health tests over generated keystream.
+
+    Generates the keystream of consecutive chunks, as encryption would, and
+    prints the health statistics as JSON.
+    """
+    from .health import KeystreamHealth
+
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return 1
+    try:
+        validate_input(precision=precision, primes=prime_list, secret=secret,
+                       chunk_size=chunk_size, base_k=base_k, framing=FRAMING_COMPACT,
+                       keystream_width=width, chaotic_map=chaotic_map)
+        monitor = KeystreamHealth(min_entropy=min_entropy, entropy_floor=entropy_floor,
+                                  entropy_interval=1, on_failure=lambda failure: None)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+
+    encryptor = ChaosEncrypt(precision=precision, primes=prime_list, shared_secret=secret,
+                             chunk_size=chunk_size, base_k=base_k, use_dynamic_k=dynamic_k,
+                             framing=FRAMING_COMPACT, keystream_width=width, chaotic_map=chaotic_map)
+    encryptor.health_monitor = monitor
+    for chunk_index in range(-(-n_bytes // chunk_size)):
+        length = min(chunk_size, n_bytes - chunk_index * chunk_size)
+        k = encryptor.derive_k(chunk_index)
+        encryptor.generate_keystream(length, encryptor.derive_seed(chunk_index), k)
+    monitor.flush()
+
+    stats = monitor.stats()
+    click.echo(json.dumps(stats, indent=2))
+    click.echo("Keystream healthy" if stats['healthy'] else "Keystream FAILED health tests")
+    return 0 if stats['healthy'] else 1
+
+@cli.command()
+@click.option('--precision', 'precisions', multiple=True, type=int, default=[12],
+              help='Precision to sweep (repeatable)')
+@click.option('--primes', 'prime_sets', multiple=True, default=['9973'],
+              help='Comma-separated prime list to sweep (repeatable)')
+@click.option('--base-k', 'base_ks', multiple=True, type=int, default=[6], help='Base k to sweep (repeatable)')
+@click.option('--chunk-size', 'chunk_sizes', multiple=True, type=int, default=[16],
+              help='Chunk size to sweep (repeatable)')
+@click.option('--mode', 'modes', multiple=True, default=['dynamic-k'],
+              help='Keystream mode to sweep: dynamic-k, static-k, binary64 or width-4 (repeatable)')
+@click.option('--secret', prompt=True, hide_input=True, help='Shared secret')
+@click.option('--bytes', 'n_bytes', default=256 * 1024, help='Keystream bytes tested per cell')
+@click.option('--workers', default=_default_workers,
+              type=int, help='Worker processes (default: tuned profile or CPU count)')
+@click.option('--cache-dir', type=click.Path(),
+              help='Result cache (default: $CHAOSENCRYPT_SWEEP_CACHE or ~/.cache/chaosencrypt/sweep)')
+@click.option('--no-cache', is_flag=True, help='Recompute every cell and store nothing')
+@click.option('--output', type=click.Path(), help='Also write the results as JSON lines')
+def sweep(precisions, prime_sets, base_ks, chunk_sizes, modes, secret, n_bytes, workers, cache_dir, no_cache,
+          output):
+    """Measure cycle lengths, entropy, statistical tests and CSE over a parameter grid.
+
+    Every combination of the repeatable options is one cell. Cells run
+    across worker processes and their results are cached by a hash of
+    their inputs, so rerunning or extending a grid only computes new cells.
+    """
+    from .sweep import ResultCache, build_grid, format_table, run_sweep
+
+    try:
+        prime_lists = [[int(p.strip()) for p in primes.split(',')] for primes in prime_sets]
+    except ValueError:
+        click.echo("Error: Invalid prime numbers.", err=True)
+        click.echo("Please provide comma-separated integers.", err=True)
+        click.echo("Example: --primes 9973,9967,9949", err=True)
+        return 1
+    try:
+        skipped = []
+        cells = build_grid(precisions, prime_lists, base_ks, chunk_sizes, modes, skipped=skipped)
+        cache = None if no_cache else ResultCache(cache_dir)
+        results = run_sweep(cells, secret, cache=cache, workers=workers, settings={'sample_bytes': n_bytes})
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    for cell in skipped:
+        click.echo(f"Skipped precision {cell['precision']}, primes {cell['primes']}, base k {cell['base_k']}, "
+                   f"chunk size {cell['chunk_size']}, mode {cell['mode']}: {cell['error']}", err=True)
+    click.echo(format_table(results))
+    cached = sum(result['cached'] for result in results)
+    click.echo(f"{len(results)} cells: {len(results) - cached} computed, {cached} cached, "
+               f"{len(skipped)} skipped")
+    return 0
+
+@cli.command()
+@click.option('--precision', 'precisions', multiple=True, type=int, default=[12],
+              help='Precision to tune the keystream backend for (repeatable)')
+@click.option('--primes', default='9973', help='Comma-separated list of primes')
+@click.option('--sizes', default='1024,65536,1048576', help='Comma-separated representative payload sizes')
+@click.option('--chunk-size', default=1024, help='Chunk size used for the worker and batch measurements')
+@click.option('--max-workers', type=int, help='Largest worker count to try (default: CPU count)')
+@click.option('--output', type=click.Path(), help='Profile path (default: $CHAOSENCRYPT_PROFILE or ~/.config/chaosencrypt/profile.json)')
+@click.option('--dry-run', is_flag=True, help='Print the profile instead of writing it')
+def tune(precisions, primes, sizes, chunk_size, max_workers, output, dry_run):
+    """Benchmark this host and write a tuning profile.
+
+    The library and CLI apply the profile automatically for settings that do
+    not change ciphertexts (keystream backend, workers, async batch size);
+    the best chunk size is only recorded as a recommendation.
+    """
+    from .tuning import save_profile, tune as run_tune
+
+    try:
+        prime_list = [int(p.strip()) for p in primes.split(',')]
+        size_list = [int(s.strip()) for s in sizes.split(',')]
+    except ValueError:
+        click.echo("Error: --primes and --sizes must be comma-separated integers.", err=True)
+        return 1
+    try:
+        for precision in precisions:
+            validate_input(precision=precision, primes=prime_list, secret='tune',
+                           chunk_size=chunk_size, base_k=6, framing=FRAMING_COMPACT)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+
+    profile = run_tune(precisions=precisions, primes=prime_list, sizes=size_list,
+                       chunk_size=chunk_size, max_workers=max_workers,
+                       progress=lambda message: click.echo(f"  {message}"))
+    if dry_run:
+        click.echo(json.dumps(profile, indent=2, sort_keys=True))
+    else:
+        click.echo(f"Profile written to '{save_profile(profile, output)}'")
+    return 0
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(), help='Unix socket path to listen on')
+@click.option('--max-engines', default=64, help='Number of configurations kept warm')
+def serve(socket_path, max_engines):
+    """Run a local daemon that keeps warm engines for encrypt/decrypt requests."""
+    from .daemon import ChaosEncryptServer, default_socket_path
+
+    socket_path = socket_path or default_socket_path()
+    try:
+        server = ChaosEncryptServer(socket_path, max_engines=max_engines)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        return 1
+    click.echo(f"Listening on '{socket_path}'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
 if __name__ == '__main__':
     cli() 
@@ -0,0 +1,423 @@
+import bisect
+import io
+import json
+import os
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from .core import ChaosEncrypt
+
+STORE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+DATA_FILE = 'chunks.dat'
+# compact() writes generation n of the data file as chunks.<n>.dat
+DATA_FILE_PATTERN = 'chunks.{}.dat'
+# The gear hash covers the last 64 bytes, so a cut decision never looks back
+# past the start of a chunk of at least GEAR_WINDOW bytes
+GEAR_WINDOW = 64
+DEFAULT_MIN_SIZE = 16 * 1024
+DEFAULT_AVG_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 256 * 1024
+READ_SIZE = 4 * 1024 * 1024
+# HMAC domain prefixes, distinct from the ciphertext, KDF and sharded MAC inputs
+GEAR_PREFIX = b'\xffchaosencrypt-cdc-gear'
+DIGEST_PREFIX = b'\xffchaosencrypt-cdc-digest'
+ROOT_PREFIX = b'\xffchaosencrypt-cdc-root'
+DIGEST_BYTES = 16
+
+
+def gear_table(encryptor: ChaosEncrypt) -> np.ndarray:
+    """Return the 256 gear hash values, keyed by the engine's secret.
+
+    Keying the table keeps chunk boundaries, which are visible in the
+    store, from being matched against known content by anyone without
+    the secret.
+    """
+    stream = bytearray()
+    for counter in range(256 * 8 // 32):
+        h = encryptor.new_mac()
+        h.update(GEAR_PREFIX + counter.to_bytes(4, 'big'))
+        stream += h.digest()
+    return np.frombuffer(bytes(stream), dtype='>u8').astype(np.uint64)
+
+
+def gear_hashes(data: bytes, table: np.ndarray) -> np.ndarray:
+    """Return the gear hash after every byte of data.
+
+    Equal to running ``h = (h << 1) + table[byte]`` mod 2**64 from h = 0 at
+    the start of data: the hash after byte i is the sum of table[data[i-j]]
+    << j for j < 64, computed for all i with six doubling passes.
+    """
+    h = table[np.frombuffer(data, dtype=np.uint8)]
+    span = 1
+    while span < GEAR_WINDOW and span < len(h):
+        h[span:] += h[:-span] << np.uint64(span)
+        span *= 2
+    return h
+
+
+def cut_points(data: bytes, table: np.ndarray, min_size: int, avg_size: int, max_size: int,
+               final: bool = True) -> List[int]:
+    """Return the end offsets of the content-defined chunks of data.
+
+    data must start at a chunk boundary. A chunk ends after the first byte
+    at least min_size bytes in whose gear hash has its top log2(avg_size)
+    bits clear, or after max_size bytes. With final False, data is a prefix
+    of a longer stream and the chunk still open at its end is left out.
+    """
+    if not data:
+        return []
+    bits = avg_size.bit_length() - 1
+    mask = np.uint64(((1 << bits) - 1) << (64 - bits))
+    candidates = np.flatnonzero((gear_hashes(data, table) & mask) == 0) + 1
+    cuts = []
+    start = 0
+    while start < len(data):
+        i = np.searchsorted(candidates, start + min_size)
+        end = int(candidates[i]) if i < len(candidates) else len(data) + max_size
+        end = min(end, start + max_size)
+        if end > len(data):
+            if not final:
+                break
+            end = len(data)
+        cuts.append(end)
+        start = end
+    return cuts
+
+
+def iter_chunks(reader: BinaryIO, table: np.ndarray, min_size: int, avg_size: int,
+                max_size: int) -> Iterator[bytes]:
+    """Yield the content-defined chunks of a binary stream, reading it in blocks."""
+    buf = b''
+    while True:
+        block = reader.read(READ_SIZE)
+        buf += block
+        final = not block
+        start = 0
+        for end in cut_points(buf, table, min_size, avg_size, max_size, final):
+            yield buf[start:end]
+            start = end
+        buf = buf[start:]
+        if final:
+            return
+
+
+class ChunkStore:
+    """Encrypted file stored as content-defined chunks for incremental updates.
+
+    Chunk boundaries come from a keyed gear rolling hash, so an edit only
+    moves the boundaries next to it. Every chunk is encrypted with a stable
+    chunk id as its chunk index instead of its position: ids are never
+    reused, and unchanged chunks keep their id and ciphertext when earlier
+    chunks change. Ciphertexts are appended to a log-structured data file;
+    the manifest lists the chunks in order with their id, location, length,
+    a keyed digest of the plaintext, and a MAC tag over id and ciphertext.
+    A root MAC over the ordered (id, length, tag) list authenticates the
+    manifest. Replaced chunks stay in the data file until compact().
+    """
+
+    def __init__(self, path: str, encryptor: ChaosEncrypt, min_size: int = DEFAULT_MIN_SIZE,
+                 avg_size: int = DEFAULT_AVG_SIZE, max_size: int = DEFAULT_MAX_SIZE):
+        """Open the store in directory path, creating an empty one if needed.
+
+        Args:
+            path: Store directory
+            encryptor: Engine in XOR mode; its secret keys the chunk
+                boundaries, digests and MACs
+            min_size: Smallest chunk, at least 64 bytes
+            avg_size: Power of two; chunks average about min_size + avg_size
+            max_size: Largest chunk
+
+        Raises:
+            ValueError: If the parameters are invalid, an existing store was
+                built with other chunk sizes, or its root MAC does not verify
+        """
+        if not encryptor.use_xor:
+            raise ValueError("Chunk stores require XOR mode")
+        if min_size < GEAR_WINDOW or avg_size & (avg_size - 1) or avg_size < 2 or max_size <= min_size:
+            raise ValueError(f"Chunk sizes need min_size >= {GEAR_WINDOW}, a power-of-two avg_size "
+                             "and max_size > min_size")
+        self.path = path
+        self.encryptor = encryptor
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.data_file = DATA_FILE
+        self.data_path = os.path.join(path, DATA_FILE)
+        self.table = gear_table(encryptor)
+        # Per chunk, in order: [id, data offset, length, digest hex, tag hex]
+        self.chunks: List[List] = []
+        self.next_id = 0
+        self.data_size = 0
+
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            open(self.data_path, 'wb').close()
+            self._write_manifest()
+            return
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported chunk store version: {manifest.get('version')}")
+        sizes = (manifest['min_size'], manifest['avg_size'], manifest['max_size'])
+        if sizes != (min_size, avg_size, max_size):
+            raise ValueError(f"Store '{path}' was built with min_size, avg_size, max_size = {sizes}")
+        self.chunks = manifest['chunks']
+        self.next_id = manifest['next_id']
+        self.data_size = manifest['data_size']
+        self.data_file = manifest.get('data_file', DATA_FILE)
+        self.data_path = os.path.join(path, self.data_file)
+        if encryptor.use_mac and manifest['root_mac'] != self.root_mac():
+            raise ValueError("Chunk manifest MAC verification failed")
+        # Drop data files an interrupted compact() left behind
+        for name in os.listdir(path):
+            if name != self.data_file and (name == DATA_FILE or self._is_generation(name)):
+                os.unlink(os.path.join(path, name))
+        # Drop ciphertext appended after the last commit, e.g. by an interrupted update
+        if os.path.getsize(self.data_path) > self.data_size:
+            os.truncate(self.data_path, self.data_size)
+
+    def _write_manifest(self):
+        manifest = {
+            'version': STORE_VERSION,
+            'min_size': self.min_size,
+            'avg_size': self.avg_size,
+            'max_size': self.max_size,
+            'next_id': self.next_id,
+            'data_size': self.data_size,
+            'data_file': self.data_file,
+            'root_mac': self.root_mac(),
+            'chunks': self.chunks,
+        }
+        # Replacing the manifest commits everything appended before it
+        tmp_path = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_FILE))
+
+    def __len__(self) -> int:
+        """Plaintext length in bytes."""
+        return sum(chunk[2] for chunk in self.chunks)
+
+    @property
+    def dead_bytes(self) -> int:
+        """Bytes of the data file no chunk refers to any more."""
+        live = {chunk[0]: chunk[2] for chunk in self.chunks}
+        return self.data_size - sum(live.values())
+
+    def root_mac(self) -> Optional[int]:
+        """Return the MAC over the ordered chunk ids, lengths and tags, or None without MACs."""
+        if not self.encryptor.use_mac:
+            return None
+        h = self.encryptor.new_mac()
+        h.update(ROOT_PREFIX + len(self.chunks).to_bytes(8, 'big'))
+        for chunk_id, _, length, _, tag in self.chunks:
+            h.update(chunk_id.to_bytes(8, 'big') + length.to_bytes(8, 'big') + bytes.fromhex(tag))
+        return self.encryptor.finalize_mac(h)
+
+    def _digest(self, plaintext: bytes) -> str:
+        h = self.encryptor.new_mac()
+        h.update(DIGEST_PREFIX)
+        h.update(plaintext)
+        return h.digest()[:DIGEST_BYTES].hex()
+
+    def _encrypt(self, plaintext: bytes, out: BinaryIO, digest: Optional[str] = None) -> List:
+        """Encrypt a chunk under a fresh id, append it to out and return its manifest entry."""
+        chunk_id = self.next_id
+        self.next_id += 1
+        ciphertext = self.encryptor.encrypt_chunk(plaintext, chunk_id)
+        tag = self.encryptor.chunk_tag(ciphertext, chunk_id).to_bytes(32, 'big').hex() \
+            if self.encryptor.use_mac else ''
+        entry = [chunk_id, self.data_size, len(ciphertext), digest or self._digest(plaintext), tag]
+        out.write(ciphertext)
+        self.data_size += len(ciphertext)
+        return entry
+
+    def _decrypt(self, entry: List, data: BinaryIO) -> bytes:
+        chunk_id, offset, length, _, tag = entry
+        data.seek(offset)
+        ciphertext = data.read(length)
+        if len(ciphertext) != length:
+            raise ValueError(f"Chunk {chunk_id} is truncated")
+        if self.encryptor.use_mac and self.encryptor.chunk_tag(ciphertext, chunk_id) != int(tag, 16):
+            raise ValueError(f"MAC verification failed for chunk {chunk_id}")
+        return self.encryptor.decrypt_chunk(ciphertext, chunk_id)
+
+    def write(self, source: Union[bytes, str, BinaryIO]) -> Dict:
+        """Replace the contents with source, encrypting only chunks not already stored.
+
+        Every chunk is hashed, but only chunks whose keyed digest matches
+        no stored chunk are encrypted and appended.
+
+        Args:
+            source: New plaintext, a file path, or a binary stream
+
+        Returns:
+            Counts of chunks, chunks encrypted and bytes encrypted
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return self.write(f)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+
+        stored = {chunk[3]: chunk for chunk in self.chunks}
+        chunks = []
+        encrypted = encrypted_bytes = 0
+        with open(self.data_path, 'ab') as out:
+            for plaintext in iter_chunks(source, self.table, self.min_size, self.avg_size, self.max_size):
+                digest = self._digest(plaintext)
+                entry = stored.get(digest)
+                if entry is None:
+                    entry = stored[digest] = self._encrypt(plaintext, out, digest)
+                    encrypted += 1
+                    encrypted_bytes += len(plaintext)
+                chunks.append(entry)
+        self.chunks = chunks
+        self._write_manifest()
+        return {'chunks': len(chunks), 'encrypted': encrypted, 'encrypted_bytes': encrypted_bytes}
+
+    def edit(self, offset: int, delete: int = 0, insert: bytes = b'') -> Dict:
+        """Replace delete bytes at offset with insert, re-encrypting only nearby chunks.
+
+        Chunks are re-cut from the start of the chunk holding offset, and
+        old chunks are decrypted one at a time until a new boundary lands
+        on an old one past the edit. The chunks after that point keep their
+        ids and ciphertext, so the cost grows with the edit, not the file.
+
+        Returns:
+            Counts of chunks, chunks encrypted, bytes encrypted and old
+            chunks decrypted
+
+        Raises:
+            ValueError: If the range is outside the plaintext, or a chunk
+                fails MAC verification
+        """
+        starts = [0]
+        for chunk in self.chunks:
+            starts.append(starts[-1] + chunk[2])
+        size = starts.pop()
+        if offset < 0 or delete < 0 or offset + delete > size:
+            raise ValueError(f"Edit range {offset}+{delete} is outside the {size}-byte plaintext")
+        n = len(self.chunks)
+        shift = len(insert) - delete
+        # New-coordinate position of every old boundary past the edit -> index of the chunk starting there
+        resync = {start + shift: m for m, start in enumerate(starts) if start >= offset + delete}
+
+        first = max(bisect.bisect_right(starts, offset) - 1, 0)
+        new_chunks = []
+        encrypted_bytes = 0
+        keep_from = n
+        with open(self.data_path, 'rb') as data, open(self.data_path, 'ab') as out:
+            base = starts[first] if n else 0
+            buf = self._decrypt(self.chunks[first], data) if n else b''
+            j = first + 1 if n else 0
+            decrypted = 1 if n else 0
+            # Decrypt through the end of the deleted range, then apply the edit
+            while j < n and base + len(buf) < offset + delete:
+                buf += self._decrypt(self.chunks[j], data)
+                decrypted += 1
+                j += 1
+            buf = buf[:offset - base] + insert + buf[offset + delete - base:]
+            edit_end = offset + len(insert)
+
+            while keep_from == n:
+                final = j == n
+                start = 0
+                for end in cut_points(buf, self.table, self.min_size, self.avg_size, self.max_size, final):
+                    new_chunks.append(self._encrypt(buf[start:end], out))
+                    encrypted_bytes += end - start
+                    start = end
+                    position = base + end
+                    if position >= edit_end and position in resync:
+                        keep_from = resync[position]
+                        break
+                if final or keep_from < n:
+                    break
+                base += start
+                buf = buf[start:] + self._decrypt(self.chunks[j], data)
+                decrypted += 1
+                j += 1
+
+        self.chunks = self.chunks[:first] + new_chunks + self.chunks[keep_from:]
+        self._write_manifest()
+        return {'chunks': len(self.chunks), 'encrypted': len(new_chunks), 'encrypted_bytes': encrypted_bytes,
+                'decrypted': decrypted}
+
+    def read(self, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Decrypt and return plaintext bytes, verifying the MAC of every chunk read."""
+        end = len(self) if length is None else offset + length
+        out = bytearray()
+        position = 0
+        with open(self.data_path, 'rb') as data:
+            for entry in self.chunks:
+                chunk_end = position + entry[2]
+                if chunk_end > offset and position < end:
+                    plaintext = self._decrypt(entry, data)
+                    out += plaintext[max(offset - position, 0):end - position]
+                position = chunk_end
+        return bytes(out)
+
+    def export(self, path: str):
+        """Decrypt the whole plaintext to a file, one chunk at a time."""
+        with open(self.data_path, 'rb') as data, open(path, 'wb') as out:
+            for entry in self.chunks:
+                out.write(self._decrypt(entry, data))
+
+    def verify(self) -> bool:
+        """Return True if the root MAC and every chunk's MAC verify."""
+        if not self.encryptor.use_mac:
+            return True
+        if self._stored_root_mac() != self.root_mac():
+            return False
+        with open(self.data_path, 'rb') as data:
+            for chunk_id, offset, length, _, tag in self.chunks:
+                data.seek(offset)
+                if self.encryptor.chunk_tag(data.read(length), chunk_id) != int(tag, 16):
+                    return False
+        return True
+
+    def _stored_root_mac(self) -> Optional[int]:
+        with open(os.path.join(self.path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)['root_mac']
+
+    def compact(self):
+        """Rewrite the data file with only the chunks still referenced.
+
+        Ciphertexts are copied, not re-encrypted, and keep their ids. The
+        new data file gets the next generation's name, so the old file stays
+        valid until the manifest naming the new one is committed; the old
+        file is deleted afterwards, or when the store is next opened.
+        """
+        old_path = self.data_path
+        generation = self._is_generation(self.data_file) or 0
+        new_file = DATA_FILE_PATTERN.format(generation + 1)
+        new_path = os.path.join(self.path, new_file)
+        moved: Dict[int, int] = {}
+        size = 0
+        with open(old_path, 'rb') as data, open(new_path, 'wb') as out:
+            for entry in self.chunks:
+                if entry[0] not in moved:
+                    data.seek(entry[1])
+                    out.write(data.read(entry[2]))
+                    moved[entry[0]] = size
+                    size += entry[2]
+            out.flush()
+            os.fsync(out.fileno())
+        for entry in self.chunks:
+            entry[1] = moved[entry[0]]
+        self.data_file, self.data_path, self.data_size = new_file, new_path, size
+        self._write_manifest()
+        os.unlink(old_path)
+
+    @staticmethod
+    def _is_generation(name: str) -> Optional[int]:
+        """Return n if name is generation n's data file, else None."""
+        prefix, suffix = DATA_FILE_PATTERN.split('{}')
+        number = name[len(prefix):-len(suffix)]
+        if name.startswith(prefix) and name.endswith(suffix) and number.isdigit():
+            return int(number)
+        return None
@@ -0,0 +1,149 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from .framing import FLAG_COMPRESSION_MASK, FLAG_COMPRESSION_SHIFT
+
+# Header codes are the position in CODECS plus one; 0 means uncompressed
+CODECS = ('zlib', 'lzma', 'bz2')
+COMPRESSION_AUTO = 'auto'
+COMPRESSIONS = CODECS + (COMPRESSION_AUTO,)
+# Input is fed to the compressor in blocks of this many bytes
+COMPRESS_BLOCK_SIZE = 1 << 20
+# Autodetection compresses this much of the input with every codec
+AUTO_SAMPLE_SIZE = 64 * 1024
+# ...and only compresses if the chosen codec saves at least this fraction
+AUTO_MIN_SAVING = 0.1
+# lzma and bz2 compress 5-25x slower than zlib, which is slower than the
+# keystream work they save, so auto only picks them over zlib when their
+# output is at least this many times smaller
+AUTO_SLOW_CODEC_GAIN = 2.0
+
+# lzma and bz2 are imported on first use: they are rarely chosen and
+# slow to import
+
+
+def _errors(codec: str) -> tuple:
+    if codec == 'lzma':
+        import lzma
+        return (lzma.LZMAError, EOFError)
+    return (zlib.error, OSError, EOFError)
+
+
+def _compressor(codec: str):
+    if codec == 'zlib':
+        return zlib.compressobj()
+    if codec == 'lzma':
+        import lzma
+        return lzma.LZMACompressor()
+    if codec == 'bz2':
+        import bz2
+        return bz2.BZ2Compressor()
+    raise ValueError(f"Compression must be one of: {', '.join(CODECS)}")
+
+
+def _decompressor(codec: str):
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    if codec == 'lzma':
+        import lzma
+        return lzma.LZMADecompressor()
+    if codec == 'bz2':
+        import bz2
+        return bz2.BZ2Decompressor()
+    raise ValueError(f"Compression must be one of: {', '.join(CODECS)}")
+
+
+def check_compression(compression: Optional[str]) -> None:
+    """Validate a compression setting (None, a codec name or 'auto')."""
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Compression must be one of: {', '.join(COMPRESSIONS)}")
+
+
+def codec_flags(codec: Optional[str]) -> int:
+    """Return the compact header flags recording a codec (None: uncompressed)."""
+    if codec is None:
+        return 0
+    return (CODECS.index(codec) + 1) << FLAG_COMPRESSION_SHIFT
+
+
+def flags_codec(flags: int) -> Optional[str]:
+    """Return the codec recorded in compact header flags, or None."""
+    code = (flags & FLAG_COMPRESSION_MASK) >> FLAG_COMPRESSION_SHIFT
+    if code > len(CODECS):
+        raise ValueError("Unsupported ciphertext compression")
+    return CODECS[code - 1] if code else None
+
+
+def choose_codec(data: bytes, sample_size: int = AUTO_SAMPLE_SIZE) -> Optional[str]:
+    """Pick a codec by compressing a sample from the start of data.
+
+    zlib is preferred for speed; lzma or bz2 is chosen only if it shrinks
+    the sample AUTO_SLOW_CODEC_GAIN times more. Returns None when the
+    chosen codec saves less than AUTO_MIN_SAVING of the sample, as for
+    random or already-compressed data.
+    """
+    sample = bytes(memoryview(data)[:sample_size])
+    if not sample:
+        return None
+    sizes = {}
+    for codec in CODECS:
+        compressor = _compressor(codec)
+        sizes[codec] = len(compressor.compress(sample)) + len(compressor.flush())
+    weighted = {codec: size if codec == 'zlib' else size * AUTO_SLOW_CODEC_GAIN
+                for codec, size in sizes.items()}
+    best = min(CODECS, key=weighted.get)
+    return best if sizes[best] <= len(sample) * (1 - AUTO_MIN_SAVING) else None
+
+
+def iter_compress(blocks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+    """Compress a stream of input blocks, yielding compressed output as it is produced."""
+    compressor = _compressor(codec)
+    for block in blocks:
+        out = compressor.compress(block)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_decompress(blocks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+    """Decompress a stream of compressed blocks, yielding output as it is produced.
+
+    Raises:
+        ValueError: If the stream is corrupted, truncated or followed by
+            trailing data
+    """
+    decompressor = _decompressor(codec)
+    try:
+        for block in blocks:
+            if decompressor.eof:
+                raise ValueError("Trailing data after the compressed stream")
+            out = decompressor.decompress(block)
+            if out:
+                yield out
+    except _errors(codec) as e:
+        raise ValueError(f"Decompression failed: {e}")
+    if not decompressor.eof:
+        raise ValueError("Compressed stream is truncated")
+    if decompressor.unused_data:
+        raise ValueError("Trailing data after the compressed stream")
+
+
+def iter_blocks(data: bytes, size: int = COMPRESS_BLOCK_SIZE) -> Iterator[memoryview]:
+    """Split a bytes-like object into views of at most size bytes."""
+    view = memoryview(data).cast('B')
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def rechunk(pieces: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Regroup a stream of byte strings into chunks of exactly size bytes (the last may be shorter)."""
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= size:
+            end = len(buffer) - len(buffer) % size
+            for start in range(0, end, size):
+                yield bytes(buffer[start:start + size])
+            del buffer[:end]
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,869 @@
+import hmac
+import hashlib
+import os
+import re
+from typing import TYPE_CHECKING, Iterator, List, Tuple, Optional, Union
+
+from .backends import BINARY_MODULUS, select_backend
+from .compression import (COMPRESSION_AUTO, check_compression, choose_codec, codec_flags, flags_codec,
+                          iter_blocks, iter_compress, iter_decompress, rechunk)
+from .tuning import tuned_backend
+from .framing import (FLAG_BINARY_MAP, FLAG_SHARDED_MAC, FRAMING_COMPACT, FRAMING_LENGTH, FRAMINGS, MAX_KEYSTREAM_WIDTH, flags_width,
+                      is_compact, pack_compact, pack_header, parse_header, split_compact, width_flags)
+
+# concurrent.futures is imported by encrypt_parallel, keeping it out of the
+# engine's import time
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Constants
+MAC_PRIME = int("1" + "0" * 64 + "67")  # Same as JS: 1e65 + 67
+DEFAULT_PRIME = 9973
+MAX_CHUNK_SIZE = 1024
+# Compact framing has varint lengths, so chunks may grow to several MB
+MAX_LARGE_CHUNK_SIZE = 8 * 1024 * 1024
+# Keystream is generated and applied in sub-chunks of this many bytes, each
+# starting at a position reached by jump-ahead
+SUB_CHUNK_SIZE = 64 * 1024
+# encrypt_parallel splits the chunks into this many contiguous batches per
+# thread, so uneven chunk costs still balance
+PARALLEL_BATCHES_PER_WORKER = 4
+# Domain prefixes of the sharded MAC's per-chunk tags and final tag. No
+# ciphertext starts with 0xFF, and no KDF input (a decimal chunk index) does,
+# so these HMAC inputs never collide with the others under the same key.
+SHARD_TAG_PREFIX = b'\xffchaosencrypt-shard-chunk'
+SHARD_FINAL_PREFIX = b'\xffchaosencrypt-shard-final'
+# Chaotic map variants: state * prime mod 10**precision, or mod 2**64 with
+# odd primes, which wrapping uint64 multiplication computes directly
+MAP_DECIMAL = 'decimal'
+MAP_BINARY64 = 'binary64'
+CHAOTIC_MAPS = (MAP_DECIMAL, MAP_BINARY64)
+# Semantic chunking tokens: word runs, whitespace runs, single other characters.
+# Together they cover every character, so chunking is lossless.
+_TOKEN_PATTERN = re.compile(r'\w+|\s+|[^\w\s]')
+
+def _xor_bytes(data: bytes, keystream: bytes) -> bytes:
+    """XOR two equal-length byte strings using arbitrary-precision integers."""
+    n = len(data)
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')).to_bytes(n, 'little')
+
+def check_chaotic_map(chaotic_map: str, precision: int, primes: List[int], framing: str) -> int:
+    """Validate a chaotic map variant, returning its modulus.
+
+    Raises:
+        ValueError: If the variant is unknown, or is binary64 with an even
+            prime or without compact framing (only the compact header
+            identifies the variant)
+    """
+    if chaotic_map not in CHAOTIC_MAPS:
+        raise ValueError(f"Chaotic map must be one of: {', '.join(CHAOTIC_MAPS)}")
+    if chaotic_map == MAP_DECIMAL:
+        return 10 ** precision
+    if any(prime % 2 == 0 for prime in primes):
+        raise ValueError("The binary64 map requires odd primes")
+    if framing != FRAMING_COMPACT:
+        raise ValueError("The binary64 map requires compact framing")
+    return BINARY_MODULUS
+
+def ciphertext_map(ciphertext: bytes) -> str:
+    """Return the chaotic map variant named by a ciphertext's header (decimal if it has none)."""
+    # The flag sits in the low bits of the first flags varint byte
+    if is_compact(ciphertext) and len(ciphertext) > 2 and ciphertext[2] & FLAG_BINARY_MAP:
+        return MAP_BINARY64
+    return MAP_DECIMAL
+
+def check_keystream_width(width: int, modulus: int, framing: str) -> None:
+    """Validate a keystream extraction width for a modulus and framing.
+
+    Raises:
+        ValueError: If width is out of range, asks for more bytes than the
+            modulus holds, or is above 1 without compact framing (only the
+            compact header records the width)
+    """
+    if not isinstance(width, int) or not 1 <= width <= MAX_KEYSTREAM_WIDTH:
+        raise ValueError(f"Keystream width must be an integer between 1 and {MAX_KEYSTREAM_WIDTH}")
+    if 256 ** width > modulus:
+        raise ValueError(f"Keystream width {width} needs a modulus of at least 2**{8 * width}; "
+                         "increase the precision")
+    if width > 1 and framing != FRAMING_COMPACT:
+        raise ValueError("Keystream widths above 1 require compact framing")
+
+def _same_token(a: str, b: str) -> bool:
+    """Return whether adjacent ASCII characters a and b fall in the same _TOKEN_PATTERN token."""
+    if a.isspace():
+        return b.isspace()
+    if a.isalnum() or a == '_':
+        return b.isalnum() or b == '_'
+    return False
+
+class ChaosEncrypt:
+    # Configuration is fixed at construction, so one engine can be shared by
+    # any number of threads without locks; only the runtime attachments in
+    # _RUNTIME_ATTRIBUTES may be reassigned. Build a new engine to change
+    # parameters.
+    __slots__ = ('precision', 'chaotic_map', 'modulus', 'primes', 'shared_secret', 'chunk_size', 'base_k',
+                 'use_dynamic_k', 'use_xor', 'use_mac', 'use_semantic_chunking', 'embed_length', 'framing',
+                 'keystream_width', 'compression', 'backend', 'pad_pool', 'health_monitor', '_kdf', '_frozen')
+    _RUNTIME_ATTRIBUTES = frozenset({'pad_pool', 'health_monitor'})
+
+    def __init__(self, 
+                 precision: int = 12,
+                 primes: List[int] = None,
+                 shared_secret: str = "",
+                 chunk_size: int = 16,
+                 base_k: int = 6,
+                 use_dynamic_k: bool = True,
+                 use_xor: bool = True,
+                 use_mac: bool = True,
+                 use_semantic_chunking: bool = True,
+                 framing: str = FRAMING_LENGTH,
+                 backend: Optional[str] = None,
+                 keystream_width: int = 1,
+                 chaotic_map: str = MAP_DECIMAL,
+                 compression: Optional[str] = None):
+        """Initialize ChaosEncrypt with configuration.
+        
+        Args:
+            precision: Precision for calculations (1-100)
+            primes: List of prime numbers for chaotic map
+            shared_secret: Secret key for encryption/decryption
+            chunk_size: Size of chunks for processing (1-1024, or up to 8 MiB
+                with compact framing)
+            base_k: Base k value for iterations (1-100)
+            use_dynamic_k: Whether to use dynamic k values
+            use_xor: Whether to use XOR mode
+            use_mac: Whether to use MAC verification
+            use_semantic_chunking: Whether to use semantic-aware chunking
+            framing: 'length' (2-byte length per chunk) or 'compact'
+                (versioned header with a packed length table)
+            backend: Arithmetic backend for keystream generation ('python',
+                'numpy', 'gmpy2'); None uses the tuning profile's choice for
+                the precision, else selects one automatically. All backends
+                produce identical keystreams.
+            keystream_width: Keystream bytes extracted per chaotic step, the
+                low bytes of the state (little-endian). 1 is the original
+                ``state % 256`` keystream; wider needs compact framing, whose
+                header records the width so either kind decrypts.
+            chaotic_map: 'decimal' (mod 10**precision) or 'binary64' (mod
+                2**64, odd primes, compact framing only; precision is
+                unused). binary64 keystream bytes are the top bytes of each
+                state, whose low bits have short periods.
+            compression: Compress plaintext before chunking and encryption
+                with 'zlib', 'lzma' or 'bz2', or 'auto' to pick per message
+                (or skip compression) from a sample. Needs compact framing,
+                whose header records the codec; decryption reverses it.
+        """
+        if framing not in FRAMINGS:
+            raise ValueError(f"Framing must be one of: {', '.join(FRAMINGS)}")
+        # Length-framed chunk lengths then start with a byte below the compact
+        # MAGIC, so the two framings are never confused
+        if framing == FRAMING_LENGTH and chunk_size > MAX_CHUNK_SIZE:
+            raise ValueError(f"Chunks larger than {MAX_CHUNK_SIZE} bytes require compact framing")
+        primes = primes or [DEFAULT_PRIME]
+        modulus = check_chaotic_map(chaotic_map, precision, primes, framing)
+        check_keystream_width(keystream_width, modulus, framing)
+        check_compression(compression)
+        if compression is not None and framing != FRAMING_COMPACT:
+            raise ValueError("Compression requires compact framing")
+        self.precision = precision
+        self.chaotic_map = chaotic_map
+        self.modulus = modulus
+        self.primes = tuple(primes)
+        self.shared_secret = shared_secret
+        self.chunk_size = chunk_size
+        self.base_k = base_k
+        self.use_dynamic_k = use_dynamic_k
+        self.use_xor = use_xor
+        self.use_mac = use_mac
+        self.use_semantic_chunking = use_semantic_chunking
+        self.embed_length = True
+        self.framing = framing
+        self.keystream_width = keystream_width
+        self.compression = compression
+        if backend is None:
+            # Tuning profiles are per decimal precision
+            self.backend = tuned_backend(precision) if chaotic_map == MAP_DECIMAL else select_backend(modulus)
+        else:
+            self.backend = select_backend(self.modulus, backend)
+        # Optional src.pad_pool.PadPool holding precomputed per-chunk keystreams
+        self.pad_pool = None
+        # Optional src.health.KeystreamHealth fed every generated keystream block
+        self.health_monitor = None
+        # Keyed HMAC state copied for each chunk's k and seed derivation
+        self._kdf = hmac.new(shared_secret.encode(), digestmod=hashlib.sha256)
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if name not in self._RUNTIME_ATTRIBUTES and getattr(self, '_frozen', False):
+            raise AttributeError(f"ChaosEncrypt configuration is read-only; create a new engine to change {name}")
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # HMAC objects cannot be pickled; the copy re-keys its own
+        return {name: getattr(self, name) for cls in type(self).__mro__
+                for name in getattr(cls, '__slots__', ()) if name != '_kdf'}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_kdf', hmac.new(self.shared_secret.encode(), digestmod=hashlib.sha256))
+
+    def _chunk_digest(self, chunk_index: int) -> bytes:
+        h = self._kdf.copy()
+        h.update(f"{chunk_index}".encode())
+        return h.digest()
+
+    def derive_k(self, chunk_index: int) -> int:
+        """Derive dynamic k value for a chunk."""
+        if not self.use_dynamic_k:
+            return self.base_k
+        
+        # Use HMAC for more secure k derivation
+        derived = (self.base_k + 
+                  int.from_bytes(self._chunk_digest(chunk_index)[:4], 'big') % 50)
+        return max(derived, 1)  # Ensure k >= 1
+
+    def derive_seed(self, chunk_index: int) -> int:
+        """Derive the initial chaotic state for a chunk.
+
+        binary64 seeds are made odd, keeping every state in the unit group
+        mod 2**64 where odd primes have orbits of up to 2**62 steps.
+        """
+        seed = int.from_bytes(self._chunk_digest(chunk_index)[:8], 'big') % self.modulus
+        return seed | 1 if self.chaotic_map == MAP_BINARY64 else seed
+
+    def calculate_mac(self, data: bytes) -> int:
+        """Calculate MAC for encrypted data."""
+        if not self.use_mac:
+            return None
+        
+        # Use HMAC-SHA256 for more secure MAC
+        h = self.new_mac()
+        h.update(data)
+        return self.finalize_mac(h)
+
+    def new_mac(self) -> "hmac.HMAC":
+        """Return an HMAC-SHA256 context for computing the MAC incrementally."""
+        return hmac.new(self.shared_secret.encode(), digestmod=hashlib.sha256)
+
+    def finalize_mac(self, h: "hmac.HMAC") -> int:
+        """Reduce a finished HMAC context to a MAC value."""
+        return int.from_bytes(h.digest(), 'big') % MAC_PRIME
+
+    def verify_mac(self, data: bytes, received_mac: int) -> bool:
+        """Verify MAC of decrypted data.
+
+        Ciphertexts merged from shards (FLAG_SHARDED_MAC) are checked
+        against sharded_mac instead of the whole-ciphertext MAC.
+        """
+        if not self.use_mac:
+            return True
+        if self.embed_length and is_compact(data) and parse_header(data)[0] & FLAG_SHARDED_MAC:
+            return self.sharded_mac(data) == received_mac
+        calculated_mac = self.calculate_mac(data)
+        return calculated_mac == received_mac
+
+    def chunk_tag(self, payload: bytes, chunk_index: int) -> int:
+        """Return the 256-bit sharded MAC tag of one encrypted chunk payload."""
+        h = self._kdf.copy()
+        h.update(SHARD_TAG_PREFIX + chunk_index.to_bytes(8, 'big'))
+        h.update(payload)
+        return int.from_bytes(h.digest(), 'big')
+
+    def combine_shard_macs(self, shard_macs: List[int], n_chunks: int, flags: int) -> int:
+        """Combine per-shard MACs into the MAC of the merged ciphertext.
+
+        A shard MAC is the XOR of its chunks' tags, so the result does not
+        depend on how the chunks were split into shards. The final HMAC
+        binds the XOR to the chunk count and header flags.
+
+        Args:
+            shard_macs: MACs returned by encrypt_shard, in any order
+            n_chunks: Total number of chunks in the merged ciphertext
+            flags: Header flags of the merged ciphertext
+        """
+        combined = 0
+        for shard_mac in shard_macs:
+            combined ^= shard_mac
+        h = self._kdf.copy()
+        h.update(SHARD_FINAL_PREFIX + pack_header(flags) + n_chunks.to_bytes(8, 'big') + combined.to_bytes(32, 'big'))
+        return self.finalize_mac(h)
+
+    def sharded_mac(self, ciphertext: bytes) -> int:
+        """Recompute the MAC of a ciphertext merged from shards."""
+        flags, chunks = split_compact(ciphertext)
+        tags = [self.chunk_tag(chunk, chunk_index) for chunk_index, chunk in enumerate(chunks)]
+        return self.combine_shard_macs(tags, len(chunks), flags)
+
+    def chaotic_step(self, state: int, step: int) -> int:
+        """Perform one step of the chaotic map."""
+        prime = self.primes[step % len(self.primes)]
+        return (state * prime) % self.modulus
+
+    def warm_state(self, seed: int, k: int) -> int:
+        """Iterate the map k times from seed, giving the keystream's initial state."""
+        state = seed
+        for step in range(k):
+            state = self.chaotic_step(state, step)
+        return state
+
+    def jump_state(self, state: int, k: int, position: int) -> int:
+        """Advance a keystream state by position steps in O(log position).
+
+        Every keystream step multiplies by the same prime, so position steps
+        are a single multiplication by prime ** position.
+        """
+        if not position:
+            return state
+        prime = self.primes[k % len(self.primes)]
+        return state * pow(prime, position, self.modulus) % self.modulus
+
+    def prepare(self):
+        """Build the backend's keystream tables for every prime now rather than on first use.
+
+        The tables are read-only once built, so threads sharing the engine
+        then read them without locking or racing to build them.
+        """
+        for prime in set(self.primes):
+            self.backend.prepare(prime, self.modulus)
+
+    def keystream_from_state(self, state: int, k: int, length: int, width: Optional[int] = None) -> bytes:
+        """Generate length keystream bytes starting from a warmed-up state.
+
+        Each chaotic_step(state, k) contributes the low width bytes of the
+        state before the step (width 1: the state mod 256), computed by the
+        configured arithmetic backend. If a health monitor is attached, the
+        keystream is fed to its online tests.
+
+        Args:
+            state: Keystream state at a step boundary
+            k: Number of warm-up iterations, which selects the prime
+            length: Number of keystream bytes
+            width: Bytes per step; None uses keystream_width
+        """
+        width = width or self.keystream_width
+        prime = self.primes[k % len(self.primes)]
+        keystream = self.backend.keystream(state, prime, length, self.modulus, width)
+        if self.health_monitor is not None:
+            self.health_monitor.update(keystream)
+        return keystream
+
+    def keystream_at(self, state: int, k: int, position: int, length: int,
+                     width: Optional[int] = None) -> bytes:
+        """Return length keystream bytes from byte position onwards of a warmed-up state.
+
+        The step holding the byte is reached by jump-ahead; with widths above
+        1 the leading bytes of that step are generated and dropped.
+        """
+        width = width or self.keystream_width
+        step, skip = divmod(position, width)
+        keystream = self.keystream_from_state(self.jump_state(state, k, step), k, skip + length, width)
+        return keystream[skip:] if skip else keystream
+
+    def generate_keystream(self, length: int, seed: int, k: int, offset: int = 0) -> bytes:
+        """Generate keystream bytes using chaotic map.
+
+        Args:
+            length: Number of keystream bytes
+            seed: Initial chaotic state of the chunk
+            k: Number of warm-up iterations
+            offset: Keystream byte position to start at, reached by jump-ahead
+        """
+        return self.keystream_at(self.warm_state(seed, k), k, offset, length)
+
+    def apply_keystream(self, data: bytes, seed: int, k: int, width: Optional[int] = None) -> bytes:
+        """XOR data with its keystream, one sub-chunk at a time.
+
+        Sub-chunk start states are derived by jump-ahead from a single warm-up,
+        so large chunks pay the KDF and warm-up cost once and never hold more
+        than SUB_CHUNK_SIZE keystream bytes.
+        """
+        state = self.warm_state(seed, k)
+        if len(data) <= SUB_CHUNK_SIZE:
+            return _xor_bytes(data, self.keystream_from_state(state, k, len(data), width))
+
+        out = bytearray(len(data))
+        for start in range(0, len(data), SUB_CHUNK_SIZE):
+            block = data[start:start + SUB_CHUNK_SIZE]
+            keystream = self.keystream_at(state, k, start, len(block), width)
+            out[start:start + len(block)] = _xor_bytes(block, keystream)
+        return bytes(out)
+
+    def _iter_char_chunks(self, text: str) -> Iterator[str]:
+        """Yield UTF-8 safe chunks of at most chunk_size bytes, splitting between characters."""
+        if text.isascii():
+            # One byte per character, so chunk boundaries are plain slices
+            for start in range(0, len(text), self.chunk_size):
+                yield text[start:start + self.chunk_size]
+            return
+
+        start = 0
+        current_size = 0
+        for i, char in enumerate(text):
+            char_size = len(char.encode('utf-8'))
+            if current_size + char_size > self.chunk_size:
+                if i > start:
+                    yield text[start:i]
+                start = i
+                current_size = char_size
+            else:
+                current_size += char_size
+        if start < len(text):
+            yield text[start:]
+
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """Lazily split text into chunks of at most chunk_size UTF-8 bytes.
+
+        With semantic chunking, chunks end on token boundaries (runs of word
+        characters, runs of whitespace, single punctuation marks); a token
+        longer than chunk_size is split between characters. Tokens cover the
+        whole text, so joining the chunks gives back the input.
+
+        Args:
+            text: Input text to split
+
+        Yields:
+            Chunks preserving UTF-8 characters and semantic boundaries
+        """
+        if not self.use_semantic_chunking:
+            yield from self._iter_char_chunks(text)
+        elif text.isascii():
+            yield from self._iter_ascii_token_chunks(text)
+        else:
+            yield from self._iter_token_chunks(text)
+
+    def _iter_ascii_token_chunks(self, text: str) -> Iterator[str]:
+        """Semantic chunking for ASCII text, where every character is one byte.
+
+        Each chunk ends at the last token boundary within chunk_size bytes
+        (or exactly chunk_size bytes in, inside an oversized token), which is
+        where the token-by-token loop would end it.
+        """
+        start = 0
+        while len(text) - start > self.chunk_size:
+            end = start + self.chunk_size
+            cut = end
+            while cut > start and _same_token(text[cut - 1], text[cut]):
+                cut -= 1
+            if cut == start:
+                cut = end
+            yield text[start:cut]
+            start = cut
+        if start < len(text):
+            yield text[start:]
+
+    def _iter_token_chunks(self, text: str) -> Iterator[str]:
+        """Semantic chunking by walking the tokens of text."""
+        start = 0
+        end = 0
+        current_size = 0
+        for match in _TOKEN_PATTERN.finditer(text):
+            token = match.group()
+            token_size = len(token) if token.isascii() else len(token.encode('utf-8'))
+            if current_size + token_size <= self.chunk_size:
+                end = match.end()
+                current_size += token_size
+                continue
+
+            if end > start:
+                yield text[start:end]
+            if token_size <= self.chunk_size:
+                start, end, current_size = match.start(), match.end(), token_size
+                continue
+
+            # Oversized token: emit all but its last piece, which may still
+            # be joined by the following tokens
+            pieces = self._iter_char_chunks(token)
+            last = next(pieces)
+            for piece in pieces:
+                yield last
+                last = piece
+            start, end = match.end() - len(last), match.end()
+            current_size = len(last.encode('utf-8'))
+        if end > start:
+            yield text[start:end]
+
+    def _split_into_chunks(self, text: str) -> List[str]:
+        """Split text into chunks while preserving UTF-8 characters and semantic boundaries.
+        
+        Args:
+            text: Input text to split
+            
+        Returns:
+            List of chunks preserving UTF-8 characters and semantic boundaries
+        """
+        return list(self.iter_chunks(text))
+
+    def pooled_keystream(self, chunk_index: int, length: int) -> Optional[bytes]:
+        """Return a chunk's keystream from the attached pad pool, or None on a miss."""
+        if self.pad_pool is None or not self.use_xor:
+            return None
+        return self.pad_pool.keystream(self, chunk_index, length)
+
+    def encrypt_chunk(self, chunk_bytes: bytes, chunk_index: int) -> bytes:
+        """Encrypt one chunk, returning the encrypted payload without framing."""
+        pad = self.pooled_keystream(chunk_index, len(chunk_bytes))
+        if pad is not None:
+            return _xor_bytes(chunk_bytes, pad)
+
+        k = self.derive_k(chunk_index)
+
+        # Derive seed from chunk_index + shared_secret
+        seed = self.derive_seed(chunk_index)
+
+        if self.use_xor:
+            return self.apply_keystream(chunk_bytes, seed, k)
+
+        # Direct mode
+        state = int.from_bytes(chunk_bytes, 'big') % self.modulus
+        for step in range(k):
+            state = self.chaotic_step(state, step)
+        return state.to_bytes(len(chunk_bytes), 'big')
+
+    def frame_chunk(self, encrypted_chunk: bytes) -> bytes:
+        """Return an encrypted chunk as it appears in a length-framed ciphertext."""
+        if self.embed_length:
+            # 2-byte length field
+            return (len(encrypted_chunk)).to_bytes(2, 'big') + encrypted_chunk
+        return encrypted_chunk
+
+    def header_flags(self, codec: Optional[str] = None) -> int:
+        """Return the compact header flags describing this engine's keystream.
+
+        Args:
+            codec: Codec the plaintext was compressed with, if any
+        """
+        flags = width_flags(self.keystream_width) | codec_flags(codec)
+        if self.chaotic_map == MAP_BINARY64:
+            flags |= FLAG_BINARY_MAP
+        return flags
+
+    def ciphertext_width(self, ciphertext: bytes) -> int:
+        """Return the keystream width a ciphertext was encrypted with.
+
+        Compact ciphertexts record it in their header; length-framed ones
+        always use width 1 and the decimal map.
+
+        Raises:
+            ValueError: If the ciphertext was encrypted with a different
+                chaotic map than this engine's
+        """
+        if not self.embed_length:
+            return self.keystream_width
+        flags = parse_header(ciphertext)[0] if is_compact(ciphertext) else 0
+        chaotic_map = MAP_BINARY64 if flags & FLAG_BINARY_MAP else MAP_DECIMAL
+        if chaotic_map != self.chaotic_map:
+            raise ValueError(f"Ciphertext uses the {chaotic_map} chaotic map, "
+                             f"but this engine uses {self.chaotic_map}")
+        return flags_width(flags)
+
+    def ciphertext_codec(self, ciphertext: bytes) -> Optional[str]:
+        """Return the codec a ciphertext's plaintext was compressed with, or None."""
+        if self.embed_length and is_compact(ciphertext):
+            return flags_codec(parse_header(ciphertext)[0])
+        return None
+
+    def pack_ciphertext(self, encrypted_chunks: List[bytes], codec: Optional[str] = None) -> bytes:
+        """Assemble encrypted chunk payloads into a ciphertext using the configured framing."""
+        if self.framing == FRAMING_COMPACT:
+            return pack_compact(encrypted_chunks, self.header_flags(codec))
+        return b''.join(self.frame_chunk(chunk) for chunk in encrypted_chunks)
+
+    def decrypt_chunk(self, chunk_data: bytes, chunk_index: int, width: Optional[int] = None) -> bytes:
+        """Decrypt the payload of one chunk (without its length field).
+
+        Args:
+            chunk_data: Encrypted chunk payload
+            chunk_index: Index of the chunk in its ciphertext
+            width: Keystream width the chunk was encrypted with (see
+                ciphertext_width); None uses keystream_width
+        """
+        width = width or self.keystream_width
+        pad = self.pooled_keystream(chunk_index, len(chunk_data)) if width == self.keystream_width else None
+        if pad is not None:
+            return _xor_bytes(chunk_data, pad)
+
+        # derive same seed/k
+        k = self.derive_k(chunk_index)
+        seed = self.derive_seed(chunk_index)
+
+        if self.use_xor:
+            return self.apply_keystream(chunk_data, seed, k, width)
+
+        state = int.from_bytes(chunk_data, 'big')
+        for step in range(k):
+            # reverse order for direct mode
+            state = self.chaotic_step(state, k - step - 1)
+        return state.to_bytes(len(chunk_data), 'big')
+
+    def iter_frames(self, ciphertext: bytes) -> Iterator[bytes]:
+        """Yield the payload of each chunk in ciphertext, in chunk-index order.
+
+        Compact ciphertexts are recognised by their header whatever the
+        configured framing. Otherwise, if embed_length is True, a 2 byte
+        length field is read before each chunk.
+        """
+        if self.embed_length and is_compact(ciphertext):
+            yield from split_compact(ciphertext)[1]
+            return
+
+        idx = 0
+        while idx < len(ciphertext):
+            if self.embed_length:
+                # parse the length field
+                if idx + 2 > len(ciphertext):
+                    raise ValueError("Ciphertext truncated. No space for chunk length.")
+                chunk_len = int.from_bytes(ciphertext[idx:idx+2], 'big')
+                idx += 2
+                # read the chunk
+                if idx + chunk_len > len(ciphertext):
+                    raise ValueError("Ciphertext truncated. Chunk length extends beyond buffer.")
+                yield ciphertext[idx:idx+chunk_len]
+                idx += chunk_len
+            else:
+                # fallback: read chunk_size or until end
+                end = min(idx + self.chunk_size, len(ciphertext))
+                yield ciphertext[idx:end]
+                idx = end
+
+    def encrypt(self, plaintext: str) -> Tuple[bytes, Optional[int]]:
+        """
+        Encrypt plaintext, returning (ciphertext, MAC).
+        With length framing, each encrypted chunk is prefixed with a 2-byte length field;
+        compact framing stores all lengths in one packed table after a versioned header.
+        With compression, the UTF-8 text is compressed and encrypted as bytes.
+        """
+        if self.compression is not None:
+            return self.encrypt_bytes(plaintext.encode('utf-8'))
+        encrypted_chunks = [
+            self.encrypt_chunk(chunk_str.encode('utf-8'), chunk_index)
+            for chunk_index, chunk_str in enumerate(self.iter_chunks(plaintext))
+        ]
+        ciphertext = self.pack_ciphertext(encrypted_chunks)
+
+        mac = self.calculate_mac(ciphertext) if self.use_mac else None
+        return ciphertext, mac
+
+    def _split_bytes(self, data: bytes) -> Iterator[memoryview]:
+        """Split a bytes-like object into chunk_size views without copying."""
+        view = memoryview(data).cast('B')
+        for start in range(0, len(view), self.chunk_size):
+            yield view[start:start + self.chunk_size]
+
+    def select_codec(self, data: bytes) -> Optional[str]:
+        """Return the codec to compress data with under the compression setting, or None."""
+        if self.compression == COMPRESSION_AUTO:
+            return choose_codec(data)
+        return self.compression
+
+    def encrypt_bytes(self, data: bytes) -> Tuple[bytes, Optional[int]]:
+        """Encrypt a bytes-like object, returning (ciphertext, MAC).
+
+        Unlike encrypt, chunks are fixed chunk_size slices of the input with no
+        UTF-8 handling, so any binary payload can be encrypted. With
+        compression, the input is compressed block by block and the chunks are
+        cut from the compressed stream as it is produced.
+        """
+        codec = self.select_codec(data)
+        if codec is None:
+            chunks = self._split_bytes(data)
+        else:
+            chunks = rechunk(iter_compress(iter_blocks(data), codec), self.chunk_size)
+        encrypted_chunks = [
+            self.encrypt_chunk(chunk, chunk_index)
+            for chunk_index, chunk in enumerate(chunks)
+        ]
+        ciphertext = self.pack_ciphertext(encrypted_chunks, codec)
+
+        mac = self.calculate_mac(ciphertext) if self.use_mac else None
+        return ciphertext, mac
+
+    def encrypt_parallel(self, plaintext: Union[str, bytes], workers: Optional[int] = None,
+                         executor: Optional["Executor"] = None) -> Tuple[bytes, Optional[int]]:
+        """Encrypt on a thread pool, returning (ciphertext, MAC).
+
+        The output is identical to encrypt for text and encrypt_bytes for a
+        bytes-like object. Chunks are encrypted in contiguous batches by
+        threads sharing this engine, so nothing is pickled or copied to
+        other processes. NumPy releases the GIL while generating keystream,
+        so large chunks scale somewhat on a GIL build; on free-threaded
+        CPython every stage runs in parallel.
+
+        Args:
+            plaintext: Text, chunked as by encrypt, or bytes, chunked as by
+                encrypt_bytes
+            workers: Number of threads (default: CPU count)
+            executor: Optional thread pool to run the batches on instead of
+                a pool created for this call
+        """
+        workers = workers or os.cpu_count() or 1
+        codec = None
+        if isinstance(plaintext, str) and self.compression is None:
+            chunks = [chunk.encode('utf-8') for chunk in self.iter_chunks(plaintext)]
+        else:
+            data = plaintext.encode('utf-8') if isinstance(plaintext, str) else plaintext
+            codec = self.select_codec(data)
+            if codec is None:
+                chunks = list(self._split_bytes(data))
+            else:
+                chunks = list(rechunk(iter_compress(iter_blocks(data), codec), self.chunk_size))
+
+        self.prepare()
+        batch = max(1, -(-len(chunks) // (workers * PARALLEL_BATCHES_PER_WORKER)))
+
+        def encrypt_batch(start: int) -> List[bytes]:
+            return [self.encrypt_chunk(chunks[i], i) for i in range(start, min(start + batch, len(chunks)))]
+
+        starts = range(0, len(chunks), batch)
+        if executor is not None:
+            parts = list(executor.map(encrypt_batch, starts))
+        elif workers <= 1 or len(starts) <= 1:
+            parts = [encrypt_batch(start) for start in starts]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(encrypt_batch, starts))
+        ciphertext = self.pack_ciphertext([chunk for part in parts for chunk in part], codec)
+
+        mac = self.calculate_mac(ciphertext) if self.use_mac else None
+        return ciphertext, mac
+
+    def encrypt_shard(self, data: bytes, start_chunk_index: int) -> Tuple[bytes, Optional[int]]:
+        """Encrypt one shard of a larger payload, returning (segment, shard MAC).
+
+        data is split into chunk_size chunks numbered from start_chunk_index,
+        so every shard but the last must be a whole number of chunks. The
+        segment is the chunk payloads back to back, as long as data; merging
+        the segments of consecutive shards (see src.shard) yields the
+        ciphertext encrypt_bytes would produce for the whole payload, with
+        FLAG_SHARDED_MAC set. Shards can be encrypted independently, in any
+        order, by processes or machines sharing the engine parameters.
+
+        Args:
+            data: Bytes of the shard
+            start_chunk_index: Index of the shard's first chunk in the payload
+
+        Returns:
+            Tuple of (segment, XOR of the chunks' tags, or None if the engine
+            has MACs disabled)
+
+        Raises:
+            ValueError: If the engine does not use compact framing, uses
+                compression, or start_chunk_index is negative
+        """
+        if self.framing != FRAMING_COMPACT:
+            raise ValueError("Sharded encryption requires compact framing")
+        if self.compression is not None:
+            raise ValueError("Sharded encryption does not support compression")
+        if start_chunk_index < 0:
+            raise ValueError("Start chunk index must be non-negative")
+        segment = bytearray()
+        shard_mac = 0
+        for chunk_index, chunk in enumerate(self._split_bytes(data), start_chunk_index):
+            encrypted = self.encrypt_chunk(chunk, chunk_index)
+            if self.use_mac:
+                shard_mac ^= self.chunk_tag(encrypted, chunk_index)
+            segment += encrypted
+        return bytes(segment), shard_mac if self.use_mac else None
+
+    def decrypt_bytes(self, ciphertext: bytes, mac: Optional[int] = None) -> bytes:
+        """Decrypt ciphertext to bytes, verifying the MAC first if one is given."""
+        if self.use_mac and mac is not None:
+            if not self.verify_mac(ciphertext, mac):
+                raise ValueError("MAC verification failed")
+
+        width = self.ciphertext_width(ciphertext)
+        codec = self.ciphertext_codec(ciphertext)
+        chunks = (self.decrypt_chunk(chunk_data, chunk_index, width)
+                  for chunk_index, chunk_data in enumerate(self.iter_frames(ciphertext)))
+        if codec is not None:
+            chunks = iter_decompress(chunks, codec)
+        decrypted_accumulator = bytearray()
+        for chunk in chunks:
+            decrypted_accumulator += chunk
+        return bytes(decrypted_accumulator)
+
+    def decrypt(self, ciphertext: bytes, mac: Optional[int] = None) -> str:
+        """
+        Decrypt ciphertext. If embed_length is True,
+        read 2 bytes length field before each chunk.
+        The plaintext is decoded from UTF-8 once, after all chunks are decrypted.
+        """
+        try:
+            return self.decrypt_bytes(ciphertext, mac).decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError("Decryption failed: Invalid key or corrupted data")
+
+def validate_input(precision: int, primes: List[int], secret: str, chunk_size: int, 
+                  base_k: int, mac_value: Optional[str] = None, ciphertext: Optional[str] = None,
+                  framing: str = FRAMING_LENGTH, keystream_width: int = 1,
+                  chaotic_map: str = MAP_DECIMAL, compression: Optional[str] = None) -> None:
+    """Validate input parameters for encryption/decryption operations.
+    
+    Args:
+        precision: Precision for calculations (1-100)
+        primes: List of prime numbers
+        secret: Shared secret key
+        chunk_size: Size of chunks for processing (1-1024, or up to 8 MiB with compact framing)
+        base_k: Base k value for iterations (1-100)
+        mac_value: Optional MAC value for verification
+        ciphertext: Optional ciphertext for decryption
+        framing: Chunk framing, which determines the largest allowed chunk size
+        keystream_width: Keystream bytes extracted per chaotic step
+        chaotic_map: Chaotic map variant ('decimal' or 'binary64')
+        compression: Optional compression codec or 'auto'
+    
+    Raises:
+        ValueError: If any input parameter is invalid
+    """
+    # Validate precision
+    if not isinstance(precision, int) or precision < 1 or precision > 100:
+        raise ValueError("Precision must be an integer between 1 and 100")
+    
+    # Validate primes
+    if not primes:
+        raise ValueError("At least one prime number must be provided")
+    for prime in primes:
+        if not isinstance(prime, int) or prime < 2:
+            raise ValueError("All primes must be integers greater than 1")
+    
+    # Validate secret
+    if not secret or not isinstance(secret, str):
+        raise ValueError("Secret must be a non-empty string")
+    
+    # Validate chunk_size
+    max_chunk_size = MAX_LARGE_CHUNK_SIZE if framing == FRAMING_COMPACT else MAX_CHUNK_SIZE
+    if not isinstance(chunk_size, int) or chunk_size < 1 or chunk_size > max_chunk_size:
+        raise ValueError(f"Chunk size must be an integer between 1 and {max_chunk_size}")
+    
+    # Validate base_k
+    if not isinstance(base_k, int) or base_k < 1 or base_k > 100:
+        raise ValueError("Base k must be an integer between 1 and 100")
+
+    # Validate map variant and keystream width
+    modulus = check_chaotic_map(chaotic_map, precision, primes, framing)
+    check_keystream_width(keystream_width, modulus, framing)
+
+    # Validate compression
+    check_compression(compression)
+    if compression is not None and framing != FRAMING_COMPACT:
+        raise ValueError("Compression requires compact framing")
+    
+    # Validate mac_value if provided
+    if mac_value is not None:
+        try:
+            int(mac_value)
+        except ValueError:
+            raise ValueError("MAC value must be a valid integer")
+    
+    # Validate ciphertext if provided
+    if ciphertext is not None:
+        if not isinstance(ciphertext, str):
+            raise ValueError("Ciphertext must be a string")
+        if not ciphertext:
+            raise ValueError("Ciphertext cannot be empty")
+        try:
+            bytes.fromhex(ciphertext)
+        except ValueError:
+            raise ValueError("Ciphertext must be a valid hexadecimal string")
@@ -0,0 +1,209 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import get_engine
+from .core import ChaosEncrypt
+
+# Vector length used in the paper: the first 64 ciphertext bytes, zero-padded
+DEFAULT_WINDOW = 64
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Texts handed to an encryption worker per task
+TEXTS_PER_TASK = 1024
+LABEL_PREFIX = 'S'
+OUTPUT_FORMATS = ('.csv', '.npy')
+
+
+def ciphertext_window(encryptor: ChaosEncrypt, text: str, window: int = DEFAULT_WINDOW) -> bytes:
+    """Return the first window bytes of a text's ciphertext payload.
+
+    The payload is the concatenation of the encrypted chunks without framing
+    or MAC, so byte ``i`` lines up with plaintext byte ``i``. Chunks are
+    encrypted independently, so encryption stops as soon as the window is
+    covered; the result equals ``encrypt`` on the whole text, truncated.
+    """
+    out = bytearray()
+    for chunk_index, chunk in enumerate(encryptor.iter_chunks(text)):
+        out += encryptor.encrypt_chunk(chunk.encode('utf-8'), chunk_index)
+        if len(out) >= window:
+            break
+    return bytes(out[:window])
+
+
+def _encrypt_windows(params: Dict, secret: str, texts: List[str], window: int) -> bytes:
+    encryptor = get_engine(params, secret)
+    return b''.join(ciphertext_window(encryptor, text, window).ljust(window, b'\0') for text in texts)
+
+
+def vectorize(texts: Sequence[str], params: Dict, secret: str, window: int = DEFAULT_WINDOW,
+              workers: int = 1) -> np.ndarray:
+    """Encrypt a corpus and return its ciphertext vectors as an (n, window) float64 matrix.
+
+    Each row holds the first window ciphertext bytes of one text, zero-padded
+    when the ciphertext is shorter.
+
+    Args:
+        texts: Plaintexts
+        params: Engine parameters as used by the batch commands (see batch.PARAM_KEYS)
+        secret: Shared secret
+        window: Vector length in bytes
+        workers: Number of encryption processes
+
+    Returns:
+        Matrix of byte values
+    """
+    if window <= 0:
+        raise ValueError("Window must be positive")
+    groups = [list(texts[i:i + TEXTS_PER_TASK]) for i in range(0, len(texts), TEXTS_PER_TASK)]
+    if workers <= 1 or len(groups) <= 1:
+        blobs = [_encrypt_windows(params, secret, group, window) for group in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+            blobs = list(executor.map(_encrypt_windows, [params] * len(groups), [secret] * len(groups),
+                                      groups, [window] * len(groups)))
+    matrix = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(texts), window)
+    return matrix.astype(np.float64)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return vectors scaled to unit length; all-zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors, dtype=np.float64), where=norms > 0)
+
+
+def block_rows(n: int, memory_budget: int, workers: int = 1) -> int:
+    """Return how many similarity rows each worker may compute at once.
+
+    A block of b rows takes ``b * n * 8`` bytes and up to ``workers + 1``
+    blocks are alive at a time (one per worker plus the one being written).
+    """
+    if memory_budget <= 0:
+        raise ValueError("Memory budget must be positive")
+    row_bytes = max(n, 1) * np.dtype(np.float64).itemsize
+    return max(1, min(n, memory_budget // ((workers + 1) * row_bytes)))
+
+
+def iter_similarity_blocks(vectors: np.ndarray, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                           workers: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (first row, block) pairs of the cosine similarity matrix, in row order.
+
+    Row blocks are computed by blocked matrix multiplication against the
+    normalised vectors on a thread pool (NumPy releases the GIL in matmul),
+    with at most ``workers`` blocks in flight so peak memory stays within
+    the budget whatever the corpus size.
+    """
+    unit = normalize_rows(vectors)
+    n = len(unit)
+    rows = block_rows(n, memory_budget, workers)
+    starts = range(0, n, rows)
+
+    def compute(start: int) -> np.ndarray:
+        return unit[start:start + rows] @ unit.T
+
+    if workers <= 1:
+        for start in starts:
+            yield start, compute(start)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for start in starts:
+            pending.append((start, executor.submit(compute, start)))
+            if len(pending) >= workers:
+                first, future = pending.pop(0)
+                yield first, future.result()
+        for first, future in pending:
+            yield first, future.result()
+
+
+def cosine_similarity(vectors: np.ndarray, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                      workers: int = 1) -> np.ndarray:
+    """Return the full (n, n) cosine similarity matrix of the rows of vectors."""
+    n = len(vectors)
+    out = np.empty((n, n), dtype=np.float64)
+    for start, block in iter_similarity_blocks(vectors, memory_budget, workers):
+        out[start:start + len(block)] = block
+    return out
+
+
+def labels(n: int) -> List[str]:
+    return [f'{LABEL_PREFIX}{i}' for i in range(n)]
+
+
+def write_csv(path: str, blocks: Iterator[Tuple[int, np.ndarray]], n: int):
+    """Write similarity blocks as a labelled CSV (header ``,S0,S1,...``, rows ``Si,...``).
+
+    Values use Python's shortest round-trip repr, matching the format of
+    Chaotic_Structural_Similarity_Matrix.csv.
+    """
+    names = labels(n)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(',' + ','.join(names) + '\n')
+        for start, block in blocks:
+            for offset, row in enumerate(block.tolist()):
+                f.write(names[start + offset] + ',' + ','.join(map(repr, row)) + '\n')
+
+
+def write_npy(path: str, blocks: Iterator[Tuple[int, np.ndarray]], n: int):
+    """Write similarity blocks into a memory-mapped .npy file, one block at a time."""
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n, n))
+    try:
+        for start, block in blocks:
+            out[start:start + len(block)] = block
+        out.flush()
+    finally:
+        del out
+
+
+def read_corpus(path: str) -> List[str]:
+    """Read a corpus: a text file with one text per line, or a directory with one text per file.
+
+    Directory entries are read recursively in sorted path order.
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        texts = []
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+        return texts
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def run_cse(texts: Sequence[str], params: Dict, secret: str, output: str,
+            window: int = DEFAULT_WINDOW, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+            workers: int = 1, vectors_path: Optional[str] = None) -> int:
+    """Encrypt a corpus and write its ciphertext cosine similarity matrix.
+
+    Args:
+        texts: Plaintexts
+        params: Engine parameters (see batch.PARAM_KEYS)
+        secret: Shared secret
+        output: Output path ending in .csv or .npy
+        window: Vector length in bytes
+        memory_budget: Bytes available for similarity blocks in flight
+        workers: Number of encryption processes and matmul threads
+        vectors_path: Optional .npy path for the (n, window) vector matrix
+
+    Returns:
+        Number of texts
+
+    Raises:
+        ValueError: If the output format is unknown or a parameter is invalid
+    """
+    extension = os.path.splitext(output)[1].lower()
+    if extension not in OUTPUT_FORMATS:
+        raise ValueError(f"Output must end in one of: {', '.join(OUTPUT_FORMATS)}")
+    block_rows(len(texts), memory_budget, workers)  # validate before encrypting
+    vectors = vectorize(texts, params, secret, window=window, workers=workers)
+    if vectors_path:
+        np.save(vectors_path, vectors.astype(np.uint8))
+    blocks = iter_similarity_blocks(vectors, memory_budget, workers)
+    if extension == '.csv':
+        write_csv(output, blocks, len(vectors))
+    else:
+        write_npy(output, blocks, len(vectors))
+    return len(vectors)
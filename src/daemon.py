@@ -0,0 +1,374 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .core import ChaosEncrypt, validate_input
+
+# Request:  op, has_mac, config length, payload length
+#           followed by config JSON, optional MAC and payload
+# Response: status, has_mac, payload length
+#           followed by optional MAC and payload (error message on failure)
+REQUEST_HEADER = struct.Struct('>BBHI')
+RESPONSE_HEADER = struct.Struct('>BBI')
+MAC_BYTES = 32
+
+OP_ENCRYPT = 1
+OP_DECRYPT = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+DEFAULT_MAX_ENGINES = 64
+# Per-engine bound on memoised (k, seed) pairs
+MAX_CACHED_CHUNKS = 65536
+
+
+SOCKET_NAME = 'chaosencrypt.sock'
+
+
+def _fallback_directory() -> str:
+    return os.path.join(tempfile.gettempdir(), f"chaosencrypt-{os.getuid()}")
+
+
+def default_socket_path() -> str:
+    """Return the socket path used when none is given explicitly.
+
+    Requests carry the shared secret, so the default lives in a per-user
+    directory: $XDG_RUNTIME_DIR, else a private (0700) directory under the
+    temporary directory that the server creates.
+    """
+    if os.environ.get('CHAOSENCRYPT_SOCKET'):
+        return os.environ['CHAOSENCRYPT_SOCKET']
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or _fallback_directory(), SOCKET_NAME)
+
+
+def _make_private_directory(directory: str):
+    """Create directory with mode 0700 unless it exists, then check nobody else can use it."""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise ValueError(f"'{directory}' must be a directory only the current user can access")
+
+
+def _pack_mac(mac: Optional[int]) -> bytes:
+    if mac is None:
+        return b''
+    if not isinstance(mac, int) or not 0 <= mac < 1 << (8 * MAC_BYTES):
+        raise ValueError(f"MAC must be an integer between 0 and 2**{8 * MAC_BYTES} - 1")
+    return mac.to_bytes(MAC_BYTES, 'big')
+
+
+def _recv_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ConnectionError("Connection closed mid-frame")
+    return data
+
+
+class WarmChaosEncrypt(ChaosEncrypt):
+    """ChaosEncrypt that memoises the per-chunk HMAC derivations.
+
+    A long-running daemon sees the same chunk indices for every request under
+    a configuration, so k and the seed are derived once and reused.
+    """
+
+    __slots__ = ('_k_cache', '_seed_cache')
+
+    def __init__(self, *args, **kwargs):
+        # Set before the base class freezes the configuration; the caches
+        # themselves are only ever mutated
+        self._k_cache: Dict[int, int] = {}
+        self._seed_cache: Dict[int, int] = {}
+        super().__init__(*args, **kwargs)
+
+    def derive_k(self, chunk_index: int) -> int:
+        k = self._k_cache.get(chunk_index)
+        if k is None:
+            k = super().derive_k(chunk_index)
+            if chunk_index < MAX_CACHED_CHUNKS:
+                self._k_cache[chunk_index] = k
+        return k
+
+    def derive_seed(self, chunk_index: int) -> int:
+        seed = self._seed_cache.get(chunk_index)
+        if seed is None:
+            seed = super().derive_seed(chunk_index)
+            if chunk_index < MAX_CACHED_CHUNKS:
+                self._seed_cache[chunk_index] = seed
+        return seed
+
+
+def encode_config(precision: int = 12, primes: Optional[List[int]] = None, secret: str = "",
+                  chunk_size: int = 16, base_k: int = 6, dynamic_k: bool = True,
+                  xor: bool = True, mac: bool = True) -> bytes:
+    """Serialise an engine configuration for the wire.
+
+    The encoding is canonical so that equal configurations map to the same
+    warm engine on the server.
+    """
+    return json.dumps({
+        'precision': precision,
+        'primes': list(primes or [9973]),
+        'secret': secret,
+        'chunk_size': chunk_size,
+        'base_k': base_k,
+        'dynamic_k': dynamic_k,
+        'xor': xor,
+        'mac': mac,
+    }, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class EngineCache:
+    def __init__(self, max_engines: int = DEFAULT_MAX_ENGINES):
+        """Initialize an LRU cache of warm engines keyed by raw config bytes.
+
+        Args:
+            max_engines: Maximum number of configurations kept warm
+        """
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[bytes, WarmChaosEncrypt]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, config: bytes) -> WarmChaosEncrypt:
+        """Return the engine for config, building and validating it on first use."""
+        with self._lock:
+            engine = self._engines.get(config)
+            if engine is not None:
+                self._engines.move_to_end(config)
+                return engine
+
+        try:
+            params = json.loads(config.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("Invalid engine configuration")
+        if not isinstance(params, dict) or not isinstance(params.get('primes'), list):
+            raise ValueError("Invalid engine configuration")
+        validate_input(
+            precision=params['precision'],
+            primes=params['primes'],
+            secret=params['secret'],
+            chunk_size=params['chunk_size'],
+            base_k=params['base_k']
+        )
+        engine = WarmChaosEncrypt(
+            precision=params['precision'],
+            primes=params['primes'],
+            shared_secret=params['secret'],
+            chunk_size=params['chunk_size'],
+            base_k=params['base_k'],
+            use_dynamic_k=params['dynamic_k'],
+            use_xor=params['xor'],
+            use_mac=params['mac']
+        )
+        with self._lock:
+            self._engines[config] = engine
+            while len(self._engines) > self.max_engines:
+                self._engines.popitem(last=False)
+        return engine
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        engines = self.server.engines
+        while True:
+            header = self.rfile.read(REQUEST_HEADER.size)
+            if not header:
+                return
+            if len(header) != REQUEST_HEADER.size:
+                return
+            op, has_mac, config_len, payload_len = REQUEST_HEADER.unpack(header)
+            try:
+                config = _recv_exact(self.rfile, config_len)
+                mac = int.from_bytes(_recv_exact(self.rfile, MAC_BYTES), 'big') if has_mac else None
+                payload = _recv_exact(self.rfile, payload_len)
+            except ConnectionError:
+                return
+
+            try:
+                engine = engines.get(config)
+                mac_value = None
+                if op == OP_ENCRYPT:
+                    response, mac_value = engine.encrypt(payload.decode('utf-8'))
+                elif op == OP_DECRYPT:
+                    response = engine.decrypt(payload, mac).encode('utf-8')
+                else:
+                    raise ValueError(f"Unknown operation {op}")
+                status = STATUS_OK
+            except (TypeError, ValueError, OverflowError, KeyError, UnicodeError) as e:
+                # Any malformed request gets an error reply, keeping the connection alive
+                status, mac_value = STATUS_ERROR, None
+                response = str(e).encode('utf-8')
+
+            header = RESPONSE_HEADER.pack(status, int(mac_value is not None), len(response))
+            self.wfile.write(header + _pack_mac(mac_value) + response)
+
+
+def _remove_stale_socket(socket_path: str):
+    """Unlink socket_path if it is a socket nobody is listening on."""
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"'{socket_path}' exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise ValueError(f"A daemon is already listening on '{socket_path}'")
+
+
+class ChaosEncryptServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, max_engines: int = DEFAULT_MAX_ENGINES):
+        """Initialize a daemon serving encrypt/decrypt requests on a Unix socket.
+
+        Args:
+            socket_path: Filesystem path of the socket; a stale socket is replaced
+            max_engines: Maximum number of configurations kept warm
+
+        Raises:
+            ValueError: If socket_path exists and is not a socket, another
+                daemon is listening on it, or the default directory is not private
+        """
+        if os.path.dirname(os.path.abspath(socket_path)) == _fallback_directory():
+            _make_private_directory(_fallback_directory())
+        _remove_stale_socket(socket_path)
+        self.engines = EngineCache(max_engines)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class RemoteChaosEncrypt:
+    """Proxy with the ChaosEncrypt encrypt/decrypt signature backed by a daemon."""
+
+    def __init__(self, client: "DaemonClient", config: bytes):
+        self.client = client
+        self.config = config
+
+    def encrypt(self, plaintext: str) -> Tuple[bytes, Optional[int]]:
+        return self.client.encrypt(self.config, plaintext)
+
+    def decrypt(self, ciphertext: bytes, mac: Optional[int] = None) -> str:
+        return self.client.decrypt(self.config, ciphertext, mac)
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        """Connect to a running daemon.
+
+        Args:
+            socket_path: Socket path, defaults to default_socket_path()
+            timeout: Optional socket timeout in seconds
+
+        Raises:
+            PermissionError: If the socket belongs to another user, who
+                would receive the shared secrets sent with each request
+        """
+        self.socket_path = socket_path or default_socket_path()
+        if os.stat(self.socket_path).st_uid != os.getuid():
+            raise PermissionError(f"Socket '{self.socket_path}' is owned by another user")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.socket_path)
+        self.rfile = self.sock.makefile('rb')
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def engine(self, config: bytes) -> RemoteChaosEncrypt:
+        """Return a proxy bound to config (see encode_config)."""
+        return RemoteChaosEncrypt(self, config)
+
+    @staticmethod
+    def _frame(op: int, config: bytes, payload: bytes, mac: Optional[int] = None) -> bytes:
+        header = REQUEST_HEADER.pack(op, int(mac is not None), len(config), len(payload))
+        return header + config + _pack_mac(mac) + payload
+
+    def _read_frame(self) -> Tuple[int, Optional[int], bytes]:
+        status, has_mac, length = RESPONSE_HEADER.unpack(_recv_exact(self.rfile, RESPONSE_HEADER.size))
+        mac = int.from_bytes(_recv_exact(self.rfile, MAC_BYTES), 'big') if has_mac else None
+        return status, mac, _recv_exact(self.rfile, length)
+
+    @staticmethod
+    def _check(frame: Tuple[int, Optional[int], bytes]) -> Tuple[Optional[int], bytes]:
+        status, mac, payload = frame
+        if status != STATUS_OK:
+            raise ValueError(payload.decode('utf-8', errors='replace'))
+        return mac, payload
+
+    def _read_response(self) -> Tuple[Optional[int], bytes]:
+        return self._check(self._read_frame())
+
+    def encrypt(self, config: bytes, plaintext: str) -> Tuple[bytes, Optional[int]]:
+        """Encrypt plaintext on the daemon, returning (ciphertext, MAC)."""
+        self.sock.sendall(self._frame(OP_ENCRYPT, config, plaintext.encode('utf-8')))
+        mac, ciphertext = self._read_response()
+        return ciphertext, mac
+
+    def decrypt(self, config: bytes, ciphertext: bytes, mac: Optional[int] = None) -> str:
+        """Decrypt ciphertext on the daemon, verifying mac if given."""
+        self.sock.sendall(self._frame(OP_DECRYPT, config, ciphertext, mac))
+        return self._read_response()[1].decode('utf-8')
+
+    def _pipeline(self, frames: List[bytes], window: int) -> List[Tuple[Optional[int], bytes]]:
+        # Bounded window so neither side blocks on a full socket buffer. Every
+        # reply of a window is read before an error is raised, so the
+        # connection stays in step for later calls.
+        responses = []
+        for start in range(0, len(frames), window):
+            batch = frames[start:start + window]
+            self.sock.sendall(b''.join(batch))
+            replies = [self._read_frame() for _ in batch]
+            responses.extend(self._check(reply) for reply in replies)
+        return responses
+
+    def encrypt_many(self, config: bytes, plaintexts: List[str],
+                     window: int = 32) -> List[Tuple[bytes, Optional[int]]]:
+        """Pipeline several encryptions, sending up to window requests before reading replies.
+
+        Raises:
+            ValueError: With the first failed item's error; later windows are not sent
+        """
+        frames = [self._frame(OP_ENCRYPT, config, plaintext.encode('utf-8')) for plaintext in plaintexts]
+        return [(ciphertext, mac) for mac, ciphertext in self._pipeline(frames, window)]
+
+    def decrypt_many(self, config: bytes, items: List[Tuple[bytes, Optional[int]]],
+                     window: int = 32) -> List[str]:
+        """Pipeline several decryptions of (ciphertext, MAC) pairs.
+
+        Raises:
+            ValueError: With the first failed item's error; later windows are not sent
+        """
+        frames = [self._frame(OP_DECRYPT, config, ciphertext, mac) for ciphertext, mac in items]
+        return [payload.decode('utf-8') for _, payload in self._pipeline(frames, window)]
@@ -0,0 +1,206 @@
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+# NumPy is only needed for compact length tables, so it is imported there
+if TYPE_CHECKING:
+    import numpy as np
+
+# Compact ciphertexts start with MAGIC and a format version. Length-framed
+# ciphertexts start with a 2-byte chunk length of at most 1024, so their first
+# byte is never MAGIC.
+MAGIC = 0xCE
+FORMAT_VERSION = 1
+# Header flag bits 0-2 hold the keystream extraction width minus one, so
+# ciphertexts written before multi-byte extraction (flags 0) read as width 1
+FLAG_WIDTH_MASK = 0x07
+MAX_KEYSTREAM_WIDTH = FLAG_WIDTH_MASK + 1
+# Bit 3 marks ciphertexts of the power-of-two (mod 2**64) chaotic map
+FLAG_BINARY_MAP = 0x08
+# Bits 4-5 name the codec the plaintext was compressed with (0: none)
+FLAG_COMPRESSION_MASK = 0x30
+FLAG_COMPRESSION_SHIFT = 4
+# Bit 6 marks ciphertexts merged from shards, whose MAC combines per-chunk
+# tags instead of covering the whole ciphertext
+FLAG_SHARDED_MAC = 0x40
+SUPPORTED_FLAGS = FLAG_WIDTH_MASK | FLAG_BINARY_MAP | FLAG_COMPRESSION_MASK | FLAG_SHARDED_MAC
+
+FRAMING_LENGTH = 'length'
+FRAMING_COMPACT = 'compact'
+FRAMINGS = (FRAMING_LENGTH, FRAMING_COMPACT)
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non-negative integer as an unsigned LEB128 varint."""
+    if value < 0:
+        raise ValueError("Varint value must be non-negative")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(buf: bytes, offset: int) -> Tuple[int, int]:
+    """Decode a varint at offset, returning (value, next offset)."""
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(buf):
+            raise ValueError("Ciphertext truncated. Incomplete varint.")
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def is_compact(ciphertext: bytes) -> bool:
+    """Return True if ciphertext starts with the compact framing header."""
+    return len(ciphertext) > 0 and ciphertext[0] == MAGIC
+
+
+def width_flags(width: int) -> int:
+    """Return the header flags recording a keystream extraction width."""
+    if not 1 <= width <= MAX_KEYSTREAM_WIDTH:
+        raise ValueError(f"Keystream width must be between 1 and {MAX_KEYSTREAM_WIDTH}")
+    return width - 1
+
+
+def flags_width(flags: int) -> int:
+    """Return the keystream extraction width recorded in header flags."""
+    return (flags & FLAG_WIDTH_MASK) + 1
+
+
+def pack_header(flags: int = 0) -> bytes:
+    """Return the compact framing header for the given flags."""
+    return bytes([MAGIC, FORMAT_VERSION]) + encode_varint(flags)
+
+
+def parse_header(ciphertext: bytes) -> Tuple[int, int]:
+    """Parse the compact framing header, returning (flags, body offset).
+
+    Raises:
+        ValueError: If the header is malformed or from an unsupported version
+    """
+    if len(ciphertext) < 3 or ciphertext[0] != MAGIC:
+        raise ValueError("Ciphertext is missing the compact framing header")
+    if ciphertext[1] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported ciphertext format version {ciphertext[1]}")
+    flags, offset = decode_varint(ciphertext, 2)
+    if flags & ~SUPPORTED_FLAGS:
+        raise ValueError("Unsupported ciphertext flags")
+    return flags, offset
+
+
+def pack_lengths(lengths: Sequence[int]) -> bytes:
+    """Pack chunk lengths into a compact length table.
+
+    Every chunk except the last is stored as its deficit from the longest of
+    them, using the smallest bit width that fits. For the UTF-8-safe chunker
+    the deficit is at most 3, so a chunk costs 2 bits instead of 2 bytes.
+
+    Layout: varint count, and if count > 0: varint nominal length, varint
+    last length, width byte, bit-packed deficits (MSB first).
+    """
+    import numpy as np
+
+    count = len(lengths)
+    out = bytearray(encode_varint(count))
+    if count == 0:
+        return bytes(out)
+
+    body = np.asarray(lengths[:-1], dtype=np.int64)
+    nominal = int(body.max()) if body.size else 0
+    deficits = nominal - body
+    width = int(deficits.max()).bit_length() if deficits.size else 0
+
+    out += encode_varint(nominal)
+    out += encode_varint(int(lengths[-1]))
+    out.append(width)
+    if width:
+        shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+        bits = ((deficits[:, None] >> shifts) & 1).astype(np.uint8)
+        out += np.packbits(bits.ravel()).tobytes()
+    return bytes(out)
+
+
+def unpack_lengths(buf: bytes, offset: int) -> Tuple["np.ndarray", int]:
+    """Unpack a length table written by pack_lengths.
+
+    Returns:
+        Tuple of (int64 array of chunk lengths, offset of the first chunk)
+
+    Raises:
+        ValueError: If the table is malformed, or its chunks do not fit in
+            the rest of buf
+    """
+    import numpy as np
+
+    count, offset = decode_varint(buf, offset)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), offset
+
+    nominal, offset = decode_varint(buf, offset)
+    last, offset = decode_varint(buf, offset)
+    if offset >= len(buf):
+        raise ValueError("Ciphertext truncated. Incomplete length table.")
+    width = buf[offset]
+    offset += 1
+    # The table is untrusted, so it is checked against the buffer before
+    # anything is allocated: deficits never exceed the nominal length, and
+    # every chunk but the last takes at least a bit of the deficits or the
+    # payload that follows
+    remaining = len(buf) - offset
+    if width > nominal.bit_length() or nominal > remaining or last > remaining:
+        raise ValueError("Corrupted length table")
+    if count - 1 > 8 * remaining:
+        raise ValueError("Ciphertext truncated. Incomplete length table.")
+    n_bits = (count - 1) * width
+    n_bytes = (n_bits + 7) // 8
+    if n_bytes > remaining:
+        raise ValueError("Ciphertext truncated. Incomplete length table.")
+
+    lengths = np.full(count, nominal, dtype=np.int64)
+    lengths[-1] = last
+    if width and count > 1:
+        packed = np.frombuffer(buf, dtype=np.uint8, count=n_bytes, offset=offset)
+        bits = np.unpackbits(packed)[:n_bits].reshape(count - 1, width).astype(np.int64)
+        lengths[:-1] -= bits @ (1 << np.arange(width - 1, -1, -1, dtype=np.int64))
+        offset += n_bytes
+    if (lengths < 0).any():
+        raise ValueError("Corrupted length table")
+    if int(lengths.sum()) > len(buf) - offset:
+        raise ValueError("Ciphertext truncated. Chunk lengths do not match the payload size.")
+    return lengths, offset
+
+
+def pack_compact(encrypted_chunks: List[bytes], flags: int = 0) -> bytes:
+    """Assemble a compact ciphertext from encrypted chunk payloads."""
+    return (pack_header(flags)
+            + pack_lengths([len(chunk) for chunk in encrypted_chunks])
+            + b''.join(encrypted_chunks))
+
+
+def split_compact(ciphertext: bytes) -> Tuple[int, List[memoryview]]:
+    """Locate every chunk of a compact ciphertext in one pass over the length table.
+
+    Returns:
+        Tuple of (header flags, list of chunk payload views)
+
+    Raises:
+        ValueError: If the ciphertext is malformed or truncated
+    """
+    import numpy as np
+
+    flags, offset = parse_header(ciphertext)
+    lengths, offset = unpack_lengths(ciphertext, offset)
+    ends = np.cumsum(lengths) + offset
+    if (ends[-1] if ends.size else offset) != len(ciphertext):
+        raise ValueError("Ciphertext truncated. Chunk lengths do not match the payload size.")
+    starts = ends - lengths
+    view = memoryview(ciphertext)
+    return flags, [view[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
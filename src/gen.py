@@ -1,21 +1,29 @@
-import numpy as np
+"""Write a file of chaotic-map random bytes for external statistical test suites.
 
-# Set seed for reproducibility
-np.random.seed(42)
+Usage:
+    python -m src.gen [--bytes N] [--seed S] [--output PATH]
+"""
+import argparse
 
-# Generate 100 million random floats in [0,1)
-n = 100_000_000
-random_floats = np.random.rand(n)
+from .prng import ChaosRandom
 
-# Multiply by 9973 and take mod 1
-chaos_values = (random_floats * 9973) % 1
+# Bytes generated per write, so memory stays flat for any output size
+WRITE_SIZE = 16 * 1024 * 1024
 
-# Convert to 8-bit integers (scale to 0-255)
-chaos_bytes = (chaos_values * 256).astype(np.uint8)
 
-# Save to binary file
-bin_file_path = "chaos_9973_mod1_100M.bin"
-chaos_bytes.tofile(bin_file_path)
+def write_random_file(path: str, n_bytes: int, seed=42, **engine_options):
+    """Write n_bytes of the ChaosRandom stream for seed to path."""
+    rng = ChaosRandom(seed, **engine_options)
+    with open(path, 'wb') as f:
+        for start in range(0, n_bytes, WRITE_SIZE):
+            f.write(rng.randbytes(min(WRITE_SIZE, n_bytes - start)))
 
-bin_file_path
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bytes', type=int, default=100_000_000, help='Number of bytes to write')
+    parser.add_argument('--seed', type=int, default=42, help='Generator seed')
+    parser.add_argument('--output', default='chaos_9973_100M.bin', help='Output file')
+    args = parser.parse_args()
+    write_random_file(args.output, args.bytes, args.seed)
+    print(args.output)
@@ -0,0 +1,304 @@
+import math
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Assessed min-entropy per keystream byte used to derive the cutoffs. The
+# default map at precision 12 gives about 6 bits (the low byte of
+# state * prime mod 10**12 cycles with period 64), so 4 leaves margin.
+DEFAULT_MIN_ENTROPY = 4.0
+# False positive probability per test (SP 800-90B recommends 2**-20..2**-40)
+DEFAULT_ALPHA = 2.0 ** -20
+# Adaptive proportion test window for non-binary samples (SP 800-90B 4.4.2)
+APT_WINDOW = 512
+# Keystream is buffered and tested in batches of this many bytes, so short
+# per-chunk keystreams cost one buffer append each
+DEFAULT_BATCH_SIZE = 64 * 1024
+# Fewest samples a batch needs for its entropy estimate to be checked
+MIN_ENTROPY_SAMPLES = 4096
+# Byte histograms are the costliest part of a batch, so by default only
+# every eighth whole batch is histogrammed; sampling whole batches keeps the
+# estimate unbiased for periodic keystreams
+DEFAULT_ENTROPY_INTERVAL = 8
+
+REPETITION_COUNT = 'repetition_count'
+ADAPTIVE_PROPORTION = 'adaptive_proportion'
+ENTROPY = 'entropy'
+
+
+class HealthTestError(ValueError):
+    """Raised when the keystream fails an online health test."""
+
+    def __init__(self, failure: Dict):
+        super().__init__(f"Keystream health test failed: {failure['test']} "
+                         f"({failure['value']} vs cutoff {failure['cutoff']} at byte {failure['offset']})")
+        self.failure = failure
+
+
+def repetition_count_cutoff(min_entropy: float, alpha: float = DEFAULT_ALPHA) -> int:
+    """Return the repetition count test cutoff C = 1 + ceil(-log2(alpha) / H)."""
+    return 1 + math.ceil(-math.log2(alpha) / min_entropy)
+
+
+def adaptive_proportion_cutoff(min_entropy: float, alpha: float = DEFAULT_ALPHA,
+                               window: int = APT_WINDOW) -> int:
+    """Return the adaptive proportion test cutoff 1 + CRITBINOM(W, 2**-H, 1 - alpha).
+
+    The binomial tail is summed in log space from the top, so alpha far
+    below float epsilon is handled exactly enough.
+    """
+    p = 2.0 ** -min_entropy
+    if p >= 1.0:
+        return window
+    log_p, log_q = math.log(p), math.log1p(-p)
+    tail = 0.0
+    for k in range(window, -1, -1):
+        log_pmf = (math.lgamma(window + 1) - math.lgamma(k + 1) - math.lgamma(window - k + 1)
+                   + k * log_p + (window - k) * log_q)
+        if tail + math.exp(log_pmf) > alpha:
+            # P(X > k) <= alpha but P(X >= k) > alpha: k is the critical value
+            return min(1 + k, window)
+        tail += math.exp(log_pmf)
+    return 1
+
+
+def mcv_min_entropy(counts: np.ndarray) -> float:
+    """Most common value min-entropy estimate (SP 800-90B 6.3.1) from a histogram."""
+    n = int(counts.sum())
+    if n < 2:
+        return 0.0
+    p_hat = counts.max() / n
+    p_upper = min(1.0, p_hat + 2.576 * math.sqrt(p_hat * (1.0 - p_hat) / (n - 1)))
+    return -math.log2(p_upper)
+
+
+def shannon_entropy(counts: np.ndarray) -> float:
+    """Plug-in Shannon entropy in bits per byte of a histogram."""
+    n = counts.sum()
+    if not n:
+        return 0.0
+    p = counts[counts > 0] / n
+    return float(-(p * np.log2(p)).sum())
+
+
+class KeystreamHealth:
+    """Online SP 800-90B style health tests over generated keystream.
+
+    Attach an instance to an engine (``encryptor.health_monitor = ...``) and
+    every keystream block produced by ``keystream_from_state`` is fed to the
+    repetition count test, the adaptive proportion test and running byte
+    histograms. Keystream is tested in batches of batch_size bytes, so a
+    failure is reported at most one batch after the offending bytes; call
+    flush() to test what is buffered.
+
+    On failure the callback is invoked with a failure dictionary, or, with
+    no callback, HealthTestError is raised from the keystream call. A
+    monitor belongs to one process: engines pickled into worker processes
+    carry a copy whose counters are not merged back.
+    """
+
+    def __init__(self, min_entropy: float = DEFAULT_MIN_ENTROPY, alpha: float = DEFAULT_ALPHA,
+                 window: int = APT_WINDOW, batch_size: int = DEFAULT_BATCH_SIZE,
+                 entropy_floor: Optional[float] = None,
+                 entropy_interval: int = DEFAULT_ENTROPY_INTERVAL,
+                 on_failure: Optional[Callable[[Dict], None]] = None):
+        """Initialize the health tests.
+
+        Args:
+            min_entropy: Assessed min-entropy per byte (bits) used for the cutoffs
+            alpha: False positive probability per test
+            window: Adaptive proportion test window in bytes
+            batch_size: Bytes buffered before the tests run
+            entropy_floor: Optionally fail when a batch's MCV min-entropy
+                estimate drops below this many bits per byte
+            entropy_interval: Histogram one batch in this many for the
+                entropy estimates (1 histograms every byte)
+            on_failure: Called with each failure instead of raising
+        """
+        if not 0 < min_entropy <= 8:
+            raise ValueError("Min-entropy must be in (0, 8] bits per byte")
+        if not 0 < alpha < 1:
+            raise ValueError("Alpha must be between 0 and 1")
+        if window < 2 or batch_size < 1 or entropy_interval < 1:
+            raise ValueError("Window must be at least 2, batch size and entropy interval positive")
+        self.min_entropy = min_entropy
+        self.alpha = alpha
+        self.window = window
+        self.batch_size = batch_size
+        self.entropy_floor = entropy_floor
+        self.entropy_interval = entropy_interval
+        self.on_failure = on_failure
+        self.rct_cutoff = repetition_count_cutoff(min_entropy, alpha)
+        self.apt_cutoff = adaptive_proportion_cutoff(min_entropy, alpha, window)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters and buffered keystream."""
+        self.samples = 0
+        self.batches = 0
+        self.entropy_samples = 0
+        self.failures = {REPETITION_COUNT: 0, ADAPTIVE_PROPORTION: 0, ENTROPY: 0}
+        self.max_run = 0
+        self.max_proportion = 0
+        self.counts = np.zeros(256, dtype=np.int64)
+        self.batch_min_entropy: Optional[float] = None
+        self.lowest_batch_min_entropy: Optional[float] = None
+        self._pending = bytearray()
+        self._last: Optional[int] = None
+        self._run = 0
+        self._apt_carry = b''
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def update(self, keystream: bytes):
+        """Feed generated keystream; tests run whenever a batch fills up."""
+        with self._lock:
+            if not self._pending and len(keystream) >= self.batch_size:
+                failures = self._process(keystream)
+            else:
+                self._pending += keystream
+                if len(self._pending) < self.batch_size:
+                    return
+                failures = self._process(bytes(self._pending))
+                self._pending.clear()
+        self._report(failures)
+
+    def flush(self):
+        """Test any buffered keystream now."""
+        with self._lock:
+            if not self._pending:
+                return
+            failures = self._process(bytes(self._pending))
+            self._pending.clear()
+        self._report(failures)
+
+    def _report(self, failures: List[Dict]):
+        for failure in failures:
+            if self.on_failure is None:
+                raise HealthTestError(failure)
+            self.on_failure(failure)
+
+    def _failure(self, test: str, value, cutoff, offset: int) -> Dict:
+        self.failures[test] += 1
+        return {'test': test, 'value': value, 'cutoff': cutoff, 'offset': offset}
+
+    def _process(self, data: bytes) -> List[Dict]:
+        block = np.frombuffer(data, dtype=np.uint8)
+        base = self.samples
+        failures = self._repetition_count(block, base) + self._adaptive_proportion(block, base)
+
+        self.samples += len(block)
+        self.batches += 1
+        if (self.batches - 1) % self.entropy_interval:
+            return failures
+        counts = np.bincount(block, minlength=256)
+        self.counts += counts
+        self.entropy_samples += len(block)
+        if len(block) >= MIN_ENTROPY_SAMPLES:
+            self.batch_min_entropy = mcv_min_entropy(counts)
+            if self.lowest_batch_min_entropy is None or self.batch_min_entropy < self.lowest_batch_min_entropy:
+                self.lowest_batch_min_entropy = self.batch_min_entropy
+            if self.entropy_floor is not None and self.batch_min_entropy < self.entropy_floor:
+                failures.append(self._failure(ENTROPY, round(self.batch_min_entropy, 3),
+                                              self.entropy_floor, base))
+        return failures
+
+    def _repetition_count(self, block: np.ndarray, base: int) -> List[Dict]:
+        """Track runs of identical bytes, including runs spanning batches.
+
+        Equal neighbours are rare in a healthy keystream, so the runs are
+        found from the sparse positions where a byte repeats its predecessor.
+        """
+        n = len(block)
+        repeats = np.flatnonzero(block[1:] == block[:-1])
+        if len(repeats):
+            breaks = np.flatnonzero(np.diff(repeats) != 1)
+            starts = repeats[np.concatenate(([0], breaks + 1))]
+            runs = repeats[np.concatenate((breaks, [len(repeats) - 1]))] - starts + 2
+        else:
+            starts = runs = np.zeros(0, dtype=np.int64)
+
+        leading = int(runs[0]) if len(runs) and starts[0] == 0 else 1
+        trailing = int(runs[-1]) if len(runs) and starts[-1] + runs[-1] == n else 1
+        # Join the run at the start of the batch onto the one ending the previous batch
+        previous = self._run if block[0] == self._last else 0
+        first = previous + leading
+        if leading == n:
+            trailing = first
+
+        failures = []
+        # A run that already failed in the previous batch is not counted again
+        if first >= self.rct_cutoff and previous < self.rct_cutoff:
+            failures.append(self._failure(REPETITION_COUNT, first, self.rct_cutoff, base))
+        for i in np.flatnonzero((runs >= self.rct_cutoff) & (starts > 0)):
+            failures.append(self._failure(REPETITION_COUNT, int(runs[i]), self.rct_cutoff,
+                                          base + int(starts[i])))
+        self.max_run = max(self.max_run, first, int(runs.max()) if len(runs) else 0)
+        self._last = int(block[-1])
+        self._run = trailing
+        return failures
+
+    def _adaptive_proportion(self, block: np.ndarray, base: int) -> List[Dict]:
+        """Count each window's first byte within the window, windows spanning batches."""
+        failures = []
+        offset = 0
+        if self._apt_carry:
+            need = self.window - len(self._apt_carry)
+            if len(block) < need:
+                self._apt_carry += block.tobytes()
+                return failures
+            window = np.frombuffer(self._apt_carry + block[:need].tobytes(), dtype=np.uint8)
+            failures += self._check_windows(window.reshape(1, -1), base - len(self._apt_carry))
+            offset = need
+
+        full = (len(block) - offset) // self.window * self.window
+        if full:
+            windows = block[offset:offset + full].reshape(-1, self.window)
+            failures += self._check_windows(windows, base + offset)
+        self._apt_carry = block[offset + full:].tobytes()
+        return failures
+
+    def _check_windows(self, windows: np.ndarray, base: int) -> List[Dict]:
+        matches = windows == windows[:, :1]
+        if self.window % 8 == 0:
+            # Sum the 0/1 bytes eight at a time as uint64 lanes (each lane
+            # totals at most window/8), then add up the lanes
+            lanes = matches.view(np.uint64).sum(axis=1)
+            counts = lanes.view(np.uint8).reshape(-1, 8).sum(axis=1, dtype=np.int64)
+        else:
+            counts = np.count_nonzero(matches, axis=1)
+        self.max_proportion = max(self.max_proportion, int(counts.max()))
+        return [self._failure(ADAPTIVE_PROPORTION, int(counts[i]), self.apt_cutoff, base + i * self.window)
+                for i in np.flatnonzero(counts >= self.apt_cutoff)]
+
+    def stats(self) -> Dict:
+        """Return the counters and entropy estimates as a JSON-serialisable dictionary."""
+        with self._lock:
+            return {
+                'samples': self.samples,
+                'pending': len(self._pending),
+                'batches': self.batches,
+                'failures': dict(self.failures),
+                'healthy': not any(self.failures.values()),
+                'min_entropy_assessed': self.min_entropy,
+                'repetition_count': {'cutoff': self.rct_cutoff, 'max_run': self.max_run},
+                'adaptive_proportion': {'cutoff': self.apt_cutoff, 'window': self.window,
+                                        'max_count': self.max_proportion},
+                'entropy': {
+                    'samples': self.entropy_samples,
+                    'shannon': shannon_entropy(self.counts),
+                    'min_entropy': mcv_min_entropy(self.counts),
+                    'batch_min_entropy': self.batch_min_entropy,
+                    'lowest_batch_min_entropy': self.lowest_batch_min_entropy,
+                    'distinct_values': int((self.counts > 0).sum()),
+                },
+            }
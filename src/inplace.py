@@ -0,0 +1,178 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from .batch import MAC_SUFFIX
+from .core import SUB_CHUNK_SIZE, ChaosEncrypt, _xor_bytes
+
+MAC_SIDECAR = 'sidecar'
+MAC_TRAILER = 'trailer'
+MAC_MODES = (MAC_SIDECAR, MAC_TRAILER)
+MAC_BYTES = 32
+TRAILER_MAGIC = b'CETRAIL1'
+TRAILER_SIZE = MAC_BYTES + len(TRAILER_MAGIC)
+# Regions are whole multiples of the mmap offset granularity so each one can
+# be mapped on its own; 256 granules is 1 MiB on 4 KiB-page systems
+DEFAULT_REGION_SIZE = 256 * mmap.ALLOCATIONGRANULARITY
+MAC_READ_SIZE = 1 << 20
+
+
+def _regions(length: int, region_size: int) -> List[Tuple[int, int]]:
+    if region_size <= 0 or region_size % mmap.ALLOCATIONGRANULARITY:
+        raise ValueError(f"Region size must be a positive multiple of {mmap.ALLOCATIONGRANULARITY}")
+    return [(start, min(region_size, length - start)) for start in range(0, length, region_size)]
+
+
+def xor_region(encryptor: ChaosEncrypt, path: str, offset: int, length: int):
+    """XOR length bytes of a file at offset with their keystream, in place.
+
+    Byte ``i`` of the file belongs to chunk ``i // chunk_size`` at keystream
+    position ``i % chunk_size``, so any region can be processed independently
+    by jumping ahead to its first position.
+
+    Args:
+        encryptor: Engine in XOR mode
+        path: File to modify
+        offset: Region start, a multiple of mmap.ALLOCATIONGRANULARITY
+        length: Region length in bytes
+    """
+    chunk_size = encryptor.chunk_size
+    with open(path, 'r+b') as f, mmap.mmap(f.fileno(), length, offset=offset) as view:
+        chunk_index, state, k = None, None, None
+        pos = 0
+        while pos < length:
+            index, position = divmod(offset + pos, chunk_size)
+            if index != chunk_index:
+                chunk_index = index
+                k = encryptor.derive_k(chunk_index)
+                state = encryptor.warm_state(encryptor.derive_seed(chunk_index), k)
+            n = min(length - pos, chunk_size - position, SUB_CHUNK_SIZE)
+            keystream = encryptor.keystream_at(state, k, position, n)
+            view[pos:pos + n] = _xor_bytes(view[pos:pos + n], keystream)
+            pos += n
+
+
+def _xor_file(encryptor: ChaosEncrypt, path: str, length: int, workers: int, region_size: int):
+    regions = _regions(length, region_size)
+    if workers <= 1 or len(regions) <= 1:
+        for offset, size in regions:
+            xor_region(encryptor, path, offset, size)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(regions))) as executor:
+        futures = [executor.submit(xor_region, encryptor, path, offset, size) for offset, size in regions]
+        for future in futures:
+            future.result()
+
+
+def _file_mac(encryptor: ChaosEncrypt, path: str, length: int) -> int:
+    h = encryptor.new_mac()
+    with open(path, 'rb') as f:
+        remaining = length
+        while remaining:
+            block = f.read(min(MAC_READ_SIZE, remaining))
+            if not block:
+                raise ValueError("File changed size while computing its MAC")
+            h.update(block)
+            remaining -= len(block)
+    return encryptor.finalize_mac(h)
+
+
+def _check_engine(encryptor: ChaosEncrypt, mac_mode: str):
+    if not encryptor.use_xor:
+        raise ValueError("In-place encryption requires XOR mode")
+    if mac_mode not in MAC_MODES:
+        raise ValueError(f"MAC mode must be one of: {', '.join(MAC_MODES)}")
+
+
+def encrypt_file_inplace(encryptor: ChaosEncrypt, path: str, mac_mode: str = MAC_SIDECAR,
+                         workers: int = 1, region_size: int = DEFAULT_REGION_SIZE) -> Optional[int]:
+    """Encrypt a file in place without framing, so its length is unchanged.
+
+    The result equals the concatenated chunk payloads of ``encrypt_bytes``
+    over fixed chunk_size slices. The MAC over the encrypted file is written
+    to ``path + '.mac'`` (sidecar) or appended as a 40-byte trailer. The file
+    is modified as it goes: an interrupted run leaves it partly encrypted.
+
+    Args:
+        encryptor: Engine in XOR mode
+        path: File to encrypt
+        mac_mode: 'sidecar' or 'trailer'
+        workers: Number of processes handling regions in parallel
+        region_size: Bytes per region (multiple of mmap.ALLOCATIONGRANULARITY)
+
+    Returns:
+        The MAC, or None if the engine has MACs disabled
+
+    Raises:
+        ValueError: If the engine is not in XOR mode or mac_mode is unknown
+    """
+    _check_engine(encryptor, mac_mode)
+    length = os.path.getsize(path)
+    _xor_file(encryptor, path, length, workers, region_size)
+    if not encryptor.use_mac:
+        return None
+
+    mac = _file_mac(encryptor, path, length)
+    if mac_mode == MAC_TRAILER:
+        with open(path, 'ab') as f:
+            f.write(mac.to_bytes(MAC_BYTES, 'big') + TRAILER_MAGIC)
+    else:
+        with open(path + MAC_SUFFIX, 'w') as f:
+            f.write(str(mac))
+    return mac
+
+
+def _read_mac(path: str, mac_mode: str, length: int) -> Tuple[Optional[int], int]:
+    """Return (stored MAC or None, ciphertext length) for an encrypted file."""
+    if mac_mode == MAC_TRAILER:
+        if length < TRAILER_SIZE:
+            return None, length
+        with open(path, 'rb') as f:
+            f.seek(length - TRAILER_SIZE)
+            trailer = f.read(TRAILER_SIZE)
+        if trailer[MAC_BYTES:] != TRAILER_MAGIC:
+            return None, length
+        return int.from_bytes(trailer[:MAC_BYTES], 'big'), length - TRAILER_SIZE
+
+    if not os.path.exists(path + MAC_SUFFIX):
+        return None, length
+    with open(path + MAC_SUFFIX, 'r') as f:
+        return int(f.read().strip()), length
+
+
+def decrypt_file_inplace(encryptor: ChaosEncrypt, path: str, mac: Optional[int] = None,
+                         mac_mode: str = MAC_SIDECAR, workers: int = 1,
+                         region_size: int = DEFAULT_REGION_SIZE):
+    """Verify and decrypt a file encrypted by encrypt_file_inplace, in place.
+
+    The MAC (given explicitly, or read from the sidecar or trailer) is checked
+    before any byte is modified. On success the trailer is truncated away and
+    the sidecar removed.
+
+    Args:
+        encryptor: Engine in XOR mode with the encryption parameters
+        path: File to decrypt
+        mac: MAC to verify against instead of the stored one
+        mac_mode: 'sidecar' or 'trailer'
+        workers: Number of processes handling regions in parallel
+        region_size: Bytes per region (multiple of mmap.ALLOCATIONGRANULARITY)
+
+    Raises:
+        ValueError: If no MAC is available, MAC verification fails, or the
+            engine is not in XOR mode
+    """
+    _check_engine(encryptor, mac_mode)
+    stored, length = _read_mac(path, mac_mode, os.path.getsize(path))
+    if encryptor.use_mac:
+        mac = stored if mac is None else mac
+        if mac is None:
+            raise ValueError(f"No MAC found for '{path}' ({mac_mode})")
+        if _file_mac(encryptor, path, length) != mac:
+            raise ValueError("MAC verification failed")
+
+    _xor_file(encryptor, path, length, workers, region_size)
+    if length != os.path.getsize(path):
+        os.truncate(path, length)
+    if mac_mode == MAC_SIDECAR and stored is not None:
+        os.remove(path + MAC_SUFFIX)
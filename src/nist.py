@@ -0,0 +1,151 @@
+import math
+from typing import Dict
+
+import numpy as np
+
+# Significance level used by SP 800-22: a test passes when its p-value is at least this
+DEFAULT_ALPHA = 0.01
+BLOCK_FREQUENCY_SIZE = 128
+# Pattern length of the approximate entropy test; SP 800-22 requires
+# m < log2(n) - 5, so sequences need at least 2**(m + 6) bits
+APPROXIMATE_ENTROPY_LENGTH = 8
+MIN_BITS = 1 << (APPROXIMATE_ENTROPY_LENGTH + 6)
+_MAX_ITERATIONS = 10000
+
+
+def igamc(a: float, x: float) -> float:
+    """Return the regularised upper incomplete gamma function Q(a, x)."""
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Series for the lower function P(a, x)
+        term = total = 1.0 / a
+        n = a
+        for _ in range(_MAX_ITERATIONS):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Continued fraction for Q(a, x) (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, _MAX_ITERATIONS):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def _normal_cdf(x: float) -> float:
+    return 0.5 * math.erfc(-x / math.sqrt(2))
+
+
+def frequency(bits: np.ndarray) -> float:
+    """Frequency (monobit) test: are ones and zeros equally common?"""
+    n = len(bits)
+    s = 2 * int(bits.sum()) - n
+    return math.erfc(abs(s) / math.sqrt(n) / math.sqrt(2))
+
+
+def block_frequency(bits: np.ndarray, block_size: int = BLOCK_FREQUENCY_SIZE) -> float:
+    """Block frequency test: is the proportion of ones near 1/2 in every block?"""
+    n_blocks = len(bits) // block_size
+    proportions = bits[:n_blocks * block_size].reshape(n_blocks, block_size).mean(axis=1)
+    chi_squared = 4 * block_size * float(((proportions - 0.5) ** 2).sum())
+    return igamc(n_blocks / 2, chi_squared / 2)
+
+
+def runs(bits: np.ndarray) -> float:
+    """Runs test: do runs of identical bits occur as often as for a random sequence?"""
+    n = len(bits)
+    pi = float(bits.mean())
+    if abs(pi - 0.5) >= 2 / math.sqrt(n):
+        # The frequency prerequisite fails, SP 800-22 reports p = 0
+        return 0.0
+    observed = 1 + int(np.count_nonzero(bits[1:] != bits[:-1]))
+    return math.erfc(abs(observed - 2 * n * pi * (1 - pi)) / (2 * math.sqrt(2 * n) * pi * (1 - pi)))
+
+
+def cumulative_sums(bits: np.ndarray) -> float:
+    """Cumulative sums (forward) test: does the random walk of +-1 steps stray too far?"""
+    n = len(bits)
+    z = int(np.abs(np.cumsum(2 * bits.astype(np.int64) - 1)).max())
+    if z == 0:
+        return 1.0
+    root = math.sqrt(n)
+    total = 1.0
+    for k in range((-n // z + 1) // 4, (n // z - 1) // 4 + 1):
+        total -= _normal_cdf((4 * k + 1) * z / root) - _normal_cdf((4 * k - 1) * z / root)
+    for k in range((-n // z - 3) // 4, (n // z - 1) // 4 + 1):
+        total += _normal_cdf((4 * k + 3) * z / root) - _normal_cdf((4 * k + 1) * z / root)
+    return min(max(total, 0.0), 1.0)
+
+
+def _pattern_phi(bits: np.ndarray, m: int) -> float:
+    n = len(bits)
+    extended = np.concatenate([bits, bits[:m - 1]]).astype(np.int64)
+    values = np.zeros(n, dtype=np.int64)
+    for j in range(m):
+        values = (values << 1) | extended[j:j + n]
+    counts = np.bincount(values, minlength=1 << m)
+    frequencies = counts[counts > 0] / n
+    return float((frequencies * np.log(frequencies)).sum())
+
+
+def approximate_entropy(bits: np.ndarray, m: int = APPROXIMATE_ENTROPY_LENGTH) -> float:
+    """Approximate entropy test: are overlapping m- and (m+1)-bit patterns equally common?"""
+    n = len(bits)
+    apen = _pattern_phi(bits, m) - _pattern_phi(bits, m + 1)
+    chi_squared = 2 * n * (math.log(2) - apen)
+    return igamc(2 ** (m - 1), chi_squared / 2)
+
+
+TESTS = {
+    'frequency': frequency,
+    'block_frequency': block_frequency,
+    'runs': runs,
+    'cumulative_sums': cumulative_sums,
+    'approximate_entropy': approximate_entropy,
+}
+
+
+def run_tests(data: bytes, alpha: float = DEFAULT_ALPHA) -> Dict:
+    """Run the SP 800-22 style tests over a byte sequence.
+
+    Bits are taken most significant first. This is a subset of the suite
+    for quick comparisons between parameter sets, not a certification run.
+
+    Args:
+        data: Sequence to test, at least MIN_BITS / 8 bytes
+        alpha: Significance level
+
+    Returns:
+        Dictionary with the p-value of every test, the number passed and
+        the number run
+
+    Raises:
+        ValueError: If data is too short
+    """
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    if len(bits) < MIN_BITS:
+        raise ValueError(f"Statistical tests need at least {MIN_BITS // 8} bytes")
+    p_values = {name: test(bits) for name, test in TESTS.items()}
+    return {
+        'p_values': p_values,
+        'passed': sum(p >= alpha for p in p_values.values()),
+        'tests': len(p_values),
+    }
@@ -0,0 +1,201 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .backends import MAX_UINT64_MODULUS_BITS, mulmod_u64
+from .core import ChaosEncrypt
+
+# Bob's noise is drawn from [last + 1, last + NOISE_RANGE], as in the JS demo
+NOISE_RANGE = 1000
+
+class OrbitBreakSimulator:
+    def __init__(self, encryptor: ChaosEncrypt, max_k: int = 64):
+        """Initialize a batched Orbit Break simulator.
+
+        Orbits are computed with jump-ahead: the state after ``n`` steps is
+        ``seed * P[n] mod modulus`` where ``P`` holds prefix products of the
+        encryptor's prime schedule, so every session and every step is one
+        vectorised multiplication.
+
+        Args:
+            encryptor: ChaosEncrypt instance providing primes and precision
+            max_k: Largest secret k a session may use
+        """
+        if max_k < 1:
+            raise ValueError("max_k must be at least 1")
+        self.encryptor = encryptor
+        self.modulus = encryptor.modulus
+        self.max_k = max_k
+        self.use_uint64 = self.modulus.bit_length() <= MAX_UINT64_MODULUS_BITS
+        self.prefix = self._prefix_products(max_k + 1)
+
+    def _prefix_products(self, steps: int) -> np.ndarray:
+        """Return P[0..steps] where P[n] is the product of the first n primes used."""
+        products = [1 % self.modulus]
+        for step in range(steps):
+            products.append(self.encryptor.chaotic_step(products[-1], step))
+        return self._as_array(products)
+
+    def _as_array(self, values: Sequence[int]) -> np.ndarray:
+        if self.use_uint64:
+            return np.array(values, dtype=np.uint64)
+        return np.array(list(values), dtype=object)
+
+    def _mul(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        if self.use_uint64:
+            return mulmod_u64(a, b, self.modulus)
+        return (a * b) % self.modulus
+
+    def random_seeds(self, n_sessions: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw uniformly distributed initial states for n_sessions sessions."""
+        if self.use_uint64:
+            return rng.integers(0, self.modulus, size=n_sessions, dtype=np.uint64)
+        width = (self.modulus.bit_length() + 71) // 8
+        raw = rng.bytes(width * n_sessions)
+        return self._as_array([
+            int.from_bytes(raw[i * width:(i + 1) * width], 'big') % self.modulus
+            for i in range(n_sessions)
+        ])
+
+    def orbits(self, seeds: np.ndarray) -> np.ndarray:
+        """Return the states after steps 1..max_k+1 for every seed.
+
+        Args:
+            seeds: Initial states, one per session
+
+        Returns:
+            Array of shape (len(seeds), max_k + 1)
+        """
+        seeds = self._as_array(seeds) if not isinstance(seeds, np.ndarray) else seeds
+        return self._mul(seeds[:, None], self.prefix[None, 1:])
+
+    def transmit(self, seeds: np.ndarray, ks: np.ndarray, noise_offsets: np.ndarray) -> np.ndarray:
+        """Build Bob's transmissions for a batch of sessions.
+
+        Session ``i`` sends the orbit values for steps 1..ks[i] followed by
+        noise ``(x_k + noise_offsets[i] + 1) % modulus``. Columns after the
+        break repeat the noise value; they are never reached by detection.
+
+        Args:
+            seeds: Initial states, one per session
+            ks: Secret step counts (1..max_k), one per session
+            noise_offsets: Non-negative noise offsets, one per session
+
+        Returns:
+            Array of shape (len(seeds), max_k + 1)
+        """
+        ks = np.asarray(ks, dtype=np.int64)
+        if ks.size and (ks.min() < 1 or ks.max() > self.max_k):
+            raise ValueError(f"k must be between 1 and {self.max_k}")
+
+        transmitted = self.orbits(seeds)
+        rows = np.arange(len(ks))
+        last = transmitted[rows, ks - 1]
+        noise = (last + self._as_array([int(o) + 1 for o in noise_offsets])) % self.modulus
+        if self.use_uint64:
+            noise = noise.astype(np.uint64)
+        after_break = np.arange(self.max_k + 1)[None, :] >= ks[:, None]
+        return np.where(after_break, noise[:, None], transmitted)
+
+    def detect(self, seeds: np.ndarray, transmitted: np.ndarray) -> np.ndarray:
+        """Infer k for every session with a single scan for the first divergence.
+
+        Args:
+            seeds: Initial states agreed with Bob, one per session
+            transmitted: Received values as produced by transmit()
+
+        Returns:
+            int64 array of inferred k values, -1 where no break was seen
+        """
+        mismatch = transmitted != self.orbits(seeds)
+        first = mismatch.argmax(axis=1)
+        return np.where(mismatch.any(axis=1), first, -1).astype(np.int64)
+
+    def simulate_session(self, seed: int, k: int, noise_offset: int) -> int:
+        """Reference scalar simulation mirroring ``simulateOrbitBreak``.
+
+        Args:
+            seed: Initial agreed state
+            k: Bob's secret step count
+            noise_offset: Offset used to build the noise value
+
+        Returns:
+            The k inferred by Alice, or -1 if no break was detected
+        """
+        transmitted = []
+        state = seed
+        for step in range(k):
+            state = self.encryptor.chaotic_step(state, step)
+            transmitted.append(state)
+        transmitted.append((state + noise_offset + 1) % self.modulus)
+
+        expected = seed
+        for step, received in enumerate(transmitted):
+            expected = self.encryptor.chaotic_step(expected, step)
+            if received != expected:
+                return step
+        return -1
+
+    def measure(self, n_sessions: int, seed: Optional[int] = None) -> Dict[str, float]:
+        """Run n_sessions random sessions and report detection accuracy and latency.
+
+        Args:
+            n_sessions: Number of concurrent sessions to simulate
+            seed: Seed for the random session generator
+
+        Returns:
+            Dictionary with accuracy, mean latency in received values and
+            wall-clock timings for transmission and detection
+        """
+        rng = np.random.default_rng(seed)
+        seeds = self.random_seeds(n_sessions, rng)
+        ks = rng.integers(1, self.max_k + 1, size=n_sessions)
+        noise_offsets = rng.integers(0, NOISE_RANGE, size=n_sessions)
+
+        start = time.perf_counter()
+        transmitted = self.transmit(seeds, ks, noise_offsets)
+        transmit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detected = self.detect(seeds, transmitted)
+        detect_seconds = time.perf_counter() - start
+
+        found = detected >= 0
+        return {
+            'sessions': n_sessions,
+            'precision': self.encryptor.precision,
+            'primes': list(self.encryptor.primes),
+            'accuracy': float(np.mean(detected == ks)) if n_sessions else 1.0,
+            'missed': int(np.sum(~found)),
+            'mean_latency_steps': float(np.mean(detected[found] + 1)) if found.any() else 0.0,
+            'transmit_seconds': transmit_seconds,
+            'detect_seconds': detect_seconds,
+            'sessions_per_second': n_sessions / max(transmit_seconds + detect_seconds, 1e-12),
+        }
+
+
+def sweep_orbit_break(precisions: Sequence[int],
+                      prime_sets: Sequence[List[int]],
+                      n_sessions: int = 10000,
+                      max_k: int = 64,
+                      seed: Optional[int] = None) -> List[Dict[str, float]]:
+    """Measure Orbit Break detection for every precision/prime combination.
+
+    Args:
+        precisions: Precisions to evaluate
+        prime_sets: Prime lists to evaluate
+        n_sessions: Sessions simulated per combination
+        max_k: Largest secret k drawn for a session
+        seed: Seed for the random session generator
+
+    Returns:
+        List of result dictionaries as returned by OrbitBreakSimulator.measure
+    """
+    results = []
+    for precision in precisions:
+        for primes in prime_sets:
+            encryptor = ChaosEncrypt(precision=precision, primes=list(primes))
+            simulator = OrbitBreakSimulator(encryptor, max_k=max_k)
+            results.append(simulator.measure(n_sessions, seed=seed))
+    return results
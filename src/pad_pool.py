@@ -0,0 +1,240 @@
+import hashlib
+import hmac
+import json
+import struct
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Set, Tuple
+
+from .core import ChaosEncrypt
+
+# magic, parameter fingerprint, generation, pad size, pad count
+HEADER = struct.Struct('<8s32sQII')
+MAGIC = b'CEPADS01'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Pads kept per process for chunk indices beyond the shared segment
+DEFAULT_LOCAL_PADS = 256
+
+_FINGERPRINT_SLICE = slice(8, 48)
+# Segments created by this process (or inherited by fork); the resource
+# tracker registers each name once, so attaching to one of them must not
+# unregister it before the owner unlinks
+_owned: Set[str] = set()
+
+
+def _engine_params(encryptor: ChaosEncrypt) -> Tuple:
+    """Return the parameters that determine a chunk's keystream."""
+    return (encryptor.shared_secret, encryptor.precision, tuple(encryptor.primes),
+            encryptor.base_k, encryptor.use_dynamic_k, encryptor.keystream_width, encryptor.chaotic_map)
+
+
+def pad_fingerprint(encryptor: ChaosEncrypt) -> bytes:
+    """Return a keyed fingerprint of the keystream parameters.
+
+    The fingerprint is stored in the shared segment, so it is an HMAC under
+    the shared secret rather than a plain hash of the parameters.
+    """
+    secret, precision, primes, base_k, dynamic_k, width, chaotic_map = _engine_params(encryptor)
+    params = json.dumps([precision, list(primes), base_k, dynamic_k, width, chaotic_map],
+                        separators=(',', ':'))
+    return hmac.new(secret.encode(), b'pad-pool:' + params.encode(), hashlib.sha256).digest()
+
+
+class PadPool:
+    """Per-chunk keystream pads shared between processes.
+
+    The owner precomputes the keystream for chunk indices ``0..count-1`` into
+    a ``multiprocessing.shared_memory`` segment; workers attach by name, map
+    it read-only and XOR against it. Every pad is ``pad_size`` bytes and any
+    shorter chunk uses its prefix. Indices past the segment are generated on
+    first use and kept in a per-process LRU of ``local_pads`` entries, so the
+    least recently used high indices are evicted first.
+
+    The segment header carries a parameter fingerprint and a generation
+    counter. ``invalidate``/``rebuild`` bump the generation; shared pads are
+    only served while the header still matches, and nothing is served to an
+    engine whose parameters differ, so callers fall back to generating the
+    keystream themselves.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, params: Tuple, fingerprint: bytes,
+                 owner: bool, local_pads: int = DEFAULT_LOCAL_PADS):
+        magic, _, _, pad_size, count = HEADER.unpack_from(shm.buf)
+        if magic != MAGIC:
+            shm.close()
+            raise ValueError("Shared memory segment is not a keystream pad pool")
+        self._shm = shm
+        self._view = shm.buf if owner else shm.buf.toreadonly()
+        self.owner = owner
+        self.params = params
+        self.fingerprint = fingerprint
+        self.pad_size = pad_size
+        self.count = count
+        self.local_pads = local_pads
+        self._local: "OrderedDict[int, bytes]" = OrderedDict()
+        # Guards the LRU, which threads sharing an engine update concurrently
+        self._local_lock = threading.Lock()
+        self._expected = self._view[_FINGERPRINT_SLICE].tobytes()
+        if self._expected[:32] != fingerprint:
+            self.close()
+            raise ValueError("Pad pool was built for different encryption parameters")
+
+    @classmethod
+    def create(cls, encryptor: ChaosEncrypt, n_chunks: int,
+               max_bytes: int = DEFAULT_MAX_BYTES, name: Optional[str] = None,
+               local_pads: int = DEFAULT_LOCAL_PADS) -> "PadPool":
+        """Allocate a segment and fill it with pads for chunk indices 0..n_chunks-1.
+
+        Args:
+            encryptor: Engine whose keystream the pads hold (XOR mode)
+            n_chunks: Number of leading chunk indices to precompute
+            max_bytes: Upper bound on the segment size; fewer pads are kept
+                if n_chunks would exceed it
+            name: Segment name (random if None)
+            local_pads: Per-process LRU size for indices past the segment
+
+        Raises:
+            ValueError: If the engine is not in XOR mode or max_bytes cannot
+                hold a single pad
+        """
+        if not encryptor.use_xor:
+            raise ValueError("Pad pools require XOR mode")
+        pad_size = encryptor.chunk_size
+        count = min(n_chunks, (max_bytes - HEADER.size) // pad_size)
+        if count < 1:
+            raise ValueError(f"max_bytes must hold at least one {pad_size}-byte pad")
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + count * pad_size)
+        _owned.add(shm._name)
+        HEADER.pack_into(shm.buf, 0, MAGIC, bytes(32), 0, pad_size, count)
+        pool = cls(shm, _engine_params(encryptor), bytes(32), True, local_pads)
+        pool.rebuild(encryptor)
+        return pool
+
+    @classmethod
+    def attach(cls, name: str, encryptor: ChaosEncrypt,
+               local_pads: int = DEFAULT_LOCAL_PADS) -> "PadPool":
+        """Map an existing pool read-only for use with encryptor.
+
+        Raises:
+            ValueError: If the pool was built for other parameters
+            FileNotFoundError: If no segment with that name exists
+        """
+        return cls._open(name, _engine_params(encryptor), pad_fingerprint(encryptor), local_pads)
+
+    @classmethod
+    def _open(cls, name: str, params: Tuple, fingerprint: bytes, local_pads: int) -> "PadPool":
+        shm = shared_memory.SharedMemory(name=name)
+        if shm._name not in _owned:
+            try:
+                # Only the owner may unlink the segment
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:  # pragma: no cover - tracker internals vary by platform
+                pass
+        return cls(shm, params, fingerprint, False, local_pads)
+
+    def __reduce__(self):
+        # Engines carrying a pool can be sent to worker processes; the copy
+        # re-attaches read-only by name
+        return (PadPool._open, (self.name, self.params, self.fingerprint, self.local_pads))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.count * self.pad_size
+
+    def is_valid(self) -> bool:
+        """Return whether the shared segment still holds this pool's pads."""
+        return self._view[_FINGERPRINT_SLICE] == self._expected
+
+    def invalidate(self):
+        """Mark the segment stale for every attached process (owner only)."""
+        if not self.owner:
+            raise ValueError("Only the owning process can invalidate a pad pool")
+        _, _, generation, _, _ = HEADER.unpack_from(self._view)
+        HEADER.pack_into(self._view, 0, MAGIC, bytes(32), generation + 1, self.pad_size, self.count)
+        with self._local_lock:
+            self._local.clear()
+
+    def rebuild(self, encryptor: ChaosEncrypt):
+        """Refill the segment for encryptor's parameters (owner only).
+
+        Every existing attachment stops matching, since the generation has
+        moved on; processes attach again to use the new pads.
+        """
+        if encryptor.chunk_size > self.pad_size:
+            raise ValueError(f"Pad pool holds {self.pad_size}-byte pads; chunk size is {encryptor.chunk_size}")
+        self.invalidate()
+        offset = HEADER.size
+        for chunk_index in range(self.count):
+            self._view[offset:offset + self.pad_size] = self._generate(encryptor, chunk_index)
+            offset += self.pad_size
+        self.params = _engine_params(encryptor)
+        self.fingerprint = pad_fingerprint(encryptor)
+        _, _, generation, _, _ = HEADER.unpack_from(self._view)
+        # Publishing the fingerprint last makes the new pads visible
+        HEADER.pack_into(self._view, 0, MAGIC, self.fingerprint, generation, self.pad_size, self.count)
+        self._expected = self._view[_FINGERPRINT_SLICE].tobytes()
+
+    def _generate(self, encryptor: ChaosEncrypt, chunk_index: int) -> bytes:
+        k = encryptor.derive_k(chunk_index)
+        return encryptor.generate_keystream(self.pad_size, encryptor.derive_seed(chunk_index), k)
+
+    def keystream(self, encryptor: ChaosEncrypt, chunk_index: int, length: int) -> Optional[bytes]:
+        """Return the first length keystream bytes of a chunk, or None on a miss.
+
+        Args:
+            encryptor: Engine requesting the pad; its parameters must match
+            chunk_index: Chunk index the keystream belongs to
+            length: Number of bytes needed (at most pad_size)
+
+        Returns:
+            Keystream bytes, or None if the pool is stale, built for other
+            parameters, or length exceeds the pad size
+        """
+        if length > self.pad_size or _engine_params(encryptor) != self.params:
+            return None
+        if chunk_index < self.count:
+            start = HEADER.size + chunk_index * self.pad_size
+            pad = self._view[start:start + length].tobytes()
+            # Checked after the copy so a concurrent rebuild cannot go unnoticed
+            return pad if self.is_valid() else None
+
+        with self._local_lock:
+            pad = self._local.get(chunk_index)
+            if pad is not None:
+                self._local.move_to_end(chunk_index)
+        if pad is None:
+            pad = self._generate(encryptor, chunk_index)
+            with self._local_lock:
+                self._local[chunk_index] = pad
+                if len(self._local) > self.local_pads:
+                    self._local.popitem(last=False)
+        return pad[:length]
+
+    def close(self):
+        """Release this process's mapping."""
+        self._view.release()
+        self._shm.close()
+
+    def unlink(self):
+        """Destroy the segment (owner only); attached mappings stay usable until closed."""
+        self._shm.unlink()
+        _owned.discard(self._shm._name)
+
+    def __del__(self):
+        # The read-only view must go before SharedMemory.__del__ closes the mmap
+        view = getattr(self, '_view', None)
+        if view is not None:
+            view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
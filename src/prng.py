@@ -0,0 +1,212 @@
+import hmac
+import hashlib
+import os
+import random
+from typing import TYPE_CHECKING, List, Optional
+
+from .core import MAP_BINARY64, ChaosEncrypt
+from .framing import FRAMING_COMPACT
+
+# NumPy is only needed for the array methods, so it is imported there
+if TYPE_CHECKING:
+    import numpy as np
+
+# The stream is the keystream of consecutive chunks of BLOCK_SIZE bytes,
+# chunk b keyed by chunk index b. Any position is reached by jump-ahead.
+BLOCK_SIZE = 1 << 20
+# Bytes generated ahead for the scalar random.Random methods
+BUFFER_SIZE = 64 * 1024
+# The mod 2**64 map with 4-byte extraction (the top half of each state) runs
+# on the wrapping uint64 backend
+DEFAULT_ENGINE_OPTIONS = {
+    'primes': [9973],
+    'chaotic_map': MAP_BINARY64,
+    'keystream_width': 4,
+    'framing': FRAMING_COMPACT,
+}
+# Scale of a 53-bit integer to a float in [0, 1)
+FLOAT_SCALE = 1.0 / (1 << 53)
+SPAWN_PREFIX = b'\xffchaosencrypt-prng-spawn'
+
+
+def seed_secret(a) -> str:
+    """Return the engine secret for a random.Random style seed.
+
+    Raises:
+        TypeError: If the seed is not None, int, float, str, bytes or bytearray
+    """
+    if a is None:
+        return os.urandom(32).hex()
+    if isinstance(a, (bytes, bytearray)):
+        return 'bytes:' + bytes(a).hex()
+    if isinstance(a, (int, float, str)) and not isinstance(a, bool):
+        return f"{type(a).__name__}:{a!r}"
+    raise TypeError("The only supported seed types are: None, int, float, str, bytes, and bytearray.")
+
+
+class ChaosRandom(random.Random):
+    """random.Random whose randomness comes from the ChaosEncrypt keystream.
+
+    The stream is the concatenation of the keystreams of chunks 0, 1, 2, ...
+    of BLOCK_SIZE bytes each, for an engine whose secret is derived from the
+    seed. Every random.Random method works (random, randrange, shuffle,
+    gauss, ...); randbytes, fill and random_floats generate in bulk through
+    the engine's NumPy backends. The stream position is a byte offset that
+    seek() and jumpahead() move in O(log n) by jump-ahead, and spawn()
+    derives independent child streams for parallel workers.
+
+    The output has the statistics of the chaotic map (see ``chaosencrypt
+    sweep``), not those of a vetted PRNG; it is not for cryptographic use.
+    """
+
+    def __init__(self, x=None, **engine_options):
+        """Create a generator seeded with x.
+
+        Args:
+            x: Seed as for random.Random (None draws one from os.urandom)
+            **engine_options: ChaosEncrypt options overriding
+                DEFAULT_ENGINE_OPTIONS, e.g. primes or precision
+        """
+        self._engine_options = dict(DEFAULT_ENGINE_OPTIONS, **engine_options)
+        self._spawned = 0
+        super().__init__(x)
+
+    def seed(self, a=None, version=2):
+        """Restart the stream at position 0 of the engine derived from a."""
+        self._secret = seed_secret(a)
+        self._engine = ChaosEncrypt(shared_secret=self._secret, **self._engine_options)
+        self._engine.prepare()
+        self._spawned = 0
+        self._position = 0
+        self._buffer = b''
+        self._buffer_start = 0
+        self._block: Optional[tuple] = None
+        self.gauss_next = None
+
+    @property
+    def engine(self) -> ChaosEncrypt:
+        """The engine whose keystream is the stream."""
+        return self._engine
+
+    def getstate(self) -> tuple:
+        return (self._secret, self._engine_options, self._position, self._spawned, self.gauss_next)
+
+    def setstate(self, state: tuple):
+        secret, engine_options, position, spawned, gauss_next = state
+        self._engine_options = dict(engine_options)
+        self._engine = ChaosEncrypt(shared_secret=secret, **self._engine_options)
+        self._secret = secret
+        self._spawned = spawned
+        self._position = position
+        self._buffer = b''
+        self._buffer_start = 0
+        self._block = None
+        self.gauss_next = gauss_next
+
+    def tell(self) -> int:
+        """Return the stream position in bytes."""
+        return self._position
+
+    def seek(self, position: int):
+        """Move to a byte position of the stream; earlier positions may be revisited."""
+        if position < 0:
+            raise ValueError("Stream position must be non-negative")
+        self._position = position
+
+    def jumpahead(self, n: int):
+        """Skip n bytes of the stream without generating them."""
+        self.seek(self._position + n)
+
+    def spawn(self, n: int) -> List["ChaosRandom"]:
+        """Return n child generators with independent streams.
+
+        Each child's engine secret is an HMAC of this generator's secret
+        and a spawn counter, so repeated calls return new children and the
+        children can be spawned from in turn. Spawning does not advance
+        this generator's stream.
+        """
+        children = []
+        for _ in range(n):
+            h = hmac.new(self._secret.encode(), SPAWN_PREFIX + self._spawned.to_bytes(8, 'big'), hashlib.sha256)
+            self._spawned += 1
+            children.append(ChaosRandom('spawn:' + h.hexdigest(), **self._engine_options))
+        return children
+
+    def _generate(self, position: int, n: int) -> bytes:
+        """Return n stream bytes from position, without moving the stream."""
+        parts = []
+        while n > 0:
+            block, offset = divmod(position, BLOCK_SIZE)
+            if self._block is None or self._block[0] != block:
+                k = self._engine.derive_k(block)
+                self._block = (block, self._engine.warm_state(self._engine.derive_seed(block), k), k)
+            _, state, k = self._block
+            count = min(n, BLOCK_SIZE - offset)
+            parts.append(self._engine.keystream_at(state, k, offset, count))
+            position += count
+            n -= count
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def _read(self, n: int) -> bytes:
+        """Return the next n stream bytes, using the read-ahead buffer for short reads."""
+        start = self._position - self._buffer_start
+        if not 0 <= start <= len(self._buffer) - n:
+            if n > BUFFER_SIZE // 2:
+                data = self._generate(self._position, n)
+                self._position += n
+                return data
+            self._buffer = self._generate(self._position, BUFFER_SIZE)
+            self._buffer_start = self._position
+            start = 0
+        self._position += n
+        return self._buffer[start:start + n]
+
+    def random(self) -> float:
+        """Return the next float in [0, 1), from the top 53 bits of 8 stream bytes."""
+        return (int.from_bytes(self._read(8), 'big') >> 11) * FLOAT_SCALE
+
+    def getrandbits(self, k: int) -> int:
+        """Return an integer of k random bits, from the top bits of ceil(k / 8) stream bytes."""
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        n = (k + 7) // 8
+        return int.from_bytes(self._read(n), 'big') >> (8 * n - k)
+
+    def randbytes(self, n: int) -> bytes:
+        """Return the next n stream bytes."""
+        return self._read(n)
+
+    def fill(self, out: "np.ndarray") -> "np.ndarray":
+        """Fill a contiguous array in place and return it.
+
+        Integer and boolean arrays get raw stream bytes (every bit
+        uniform); float32 and float64 arrays get uniform floats in [0, 1)
+        with 24 and 53 random bits.
+
+        Raises:
+            ValueError: If the array is not writable and C-contiguous, or
+                its dtype is neither integer, boolean nor float32/float64
+        """
+        import numpy as np
+
+        if not (out.flags.c_contiguous and out.flags.writeable):
+            raise ValueError("fill needs a writable C-contiguous array")
+        kind = out.dtype.kind
+        if kind in 'iub':
+            out.reshape(-1).view(np.uint8)[:] = np.frombuffer(self._read(out.nbytes), dtype=np.uint8)
+            if kind == 'b':
+                out.reshape(-1).view(np.uint8)[:] &= 1
+        elif out.dtype == np.float64:
+            bits = np.frombuffer(self._read(8 * out.size), dtype='>u8')
+            np.multiply(bits >> np.uint64(11), FLOAT_SCALE, out=out.reshape(-1))
+        elif out.dtype == np.float32:
+            bits = np.frombuffer(self._read(4 * out.size), dtype='>u4')
+            np.multiply(bits >> np.uint32(8), np.float32(1.0 / (1 << 24)), out=out.reshape(-1), casting='unsafe')
+        else:
+            raise ValueError(f"Cannot fill arrays of dtype {out.dtype}")
+        return out
+
+    def random_floats(self, n: int) -> "np.ndarray":
+        """Return n uniform float64 values in [0, 1), the same values n calls of random() would give."""
+        import numpy as np
+        return self.fill(np.empty(n, dtype=np.float64))
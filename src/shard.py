@@ -0,0 +1,230 @@
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .batch import MAC_SUFFIX
+from .core import ChaosEncrypt
+from .framing import FLAG_SHARDED_MAC, pack_header, pack_lengths
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+SEGMENT_SUFFIX = '.seg'
+COPY_BUFFER_SIZE = 1 << 20
+
+
+def plan_shards(length: int, chunk_size: int, shards: Optional[int] = None,
+                shard_size: Optional[int] = None) -> Dict:
+    """Split a payload into shards of whole chunks.
+
+    Exactly one of shards and shard_size must be given. The manifest is
+    plain JSON data: the payload length, chunk size, chunk count, and for
+    every shard its byte range and the index of its first chunk.
+
+    Args:
+        length: Payload length in bytes
+        chunk_size: Chunk size of the engine that will encrypt the shards
+        shards: Number of shards to aim for (fewer if there are fewer chunks)
+        shard_size: Bytes per shard, a multiple of chunk_size
+
+    Raises:
+        ValueError: If the arguments are inconsistent
+    """
+    if (shards is None) == (shard_size is None):
+        raise ValueError("Give either a shard count or a shard size")
+    if length < 0 or chunk_size <= 0:
+        raise ValueError("Length must be non-negative and chunk size positive")
+    n_chunks = -(-length // chunk_size)
+    if shards is not None:
+        if shards <= 0:
+            raise ValueError("Shard count must be positive")
+        per_shard = max(1, -(-n_chunks // shards))
+    else:
+        if shard_size <= 0 or shard_size % chunk_size:
+            raise ValueError(f"Shard size must be a positive multiple of the chunk size ({chunk_size})")
+        per_shard = shard_size // chunk_size
+
+    plan = []
+    for start_chunk in range(0, max(n_chunks, 1), per_shard):
+        offset = start_chunk * chunk_size
+        chunks = min(per_shard, n_chunks - start_chunk)
+        plan.append({
+            'index': len(plan),
+            'offset': offset,
+            'length': min(chunks * chunk_size, length - offset),
+            'start_chunk': start_chunk,
+            'chunks': chunks,
+        })
+    return {
+        'version': MANIFEST_VERSION,
+        'length': length,
+        'chunk_size': chunk_size,
+        'chunks': n_chunks,
+        'shards': plan,
+    }
+
+
+def check_manifest(manifest: Dict, encryptor: ChaosEncrypt):
+    """Raise ValueError unless manifest is a known version planned for encryptor's chunk size."""
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported shard manifest version: {manifest.get('version')}")
+    if manifest['chunk_size'] != encryptor.chunk_size:
+        raise ValueError(f"Manifest was planned for chunk size {manifest['chunk_size']}, "
+                         f"but the engine uses {encryptor.chunk_size}")
+
+
+def save_manifest(manifest: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_manifest(path: str) -> Dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def segment_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f"shard-{index:05d}{SEGMENT_SUFFIX}")
+
+
+def encrypt_shard_file(encryptor: ChaosEncrypt, manifest: Dict, index: int, input_path: str,
+                       directory: str) -> Optional[int]:
+    """Encrypt one shard of a file into its segment file.
+
+    Reads only the shard's byte range, so each worker needs just the
+    manifest and access to its part of the input. The segment is written to
+    segment_path(directory, index) and its shard MAC to a .mac sidecar.
+
+    Returns:
+        The shard MAC, or None if the engine has MACs disabled
+
+    Raises:
+        ValueError: If the manifest does not match the engine, or the input
+            is shorter than the manifest says
+    """
+    check_manifest(manifest, encryptor)
+    shard = manifest['shards'][index]
+    with open(input_path, 'rb') as f:
+        f.seek(shard['offset'])
+        data = f.read(shard['length'])
+    if len(data) != shard['length']:
+        raise ValueError(f"Input '{input_path}' is shorter than its shard manifest")
+
+    segment, shard_mac = encryptor.encrypt_shard(data, shard['start_chunk'])
+    path = segment_path(directory, index)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(segment)
+    os.replace(tmp_path, path)
+    if shard_mac is not None:
+        with open(path + MAC_SUFFIX, 'w') as f:
+            f.write(str(shard_mac))
+    return shard_mac
+
+
+def _merged_prefix(encryptor: ChaosEncrypt, manifest: Dict) -> Tuple[bytes, int]:
+    """Return (compact header and length table, header flags) of a merged ciphertext."""
+    n_chunks = manifest['chunks']
+    lengths = [manifest['chunk_size']] * n_chunks
+    if n_chunks:
+        lengths[-1] = manifest['length'] - (n_chunks - 1) * manifest['chunk_size']
+    flags = encryptor.header_flags() | FLAG_SHARDED_MAC
+    return pack_header(flags) + pack_lengths(lengths), flags
+
+
+def _merged_mac(encryptor: ChaosEncrypt, manifest: Dict, shard_macs: List[Optional[int]],
+                flags: int) -> Optional[int]:
+    if not encryptor.use_mac:
+        return None
+    if any(shard_mac is None for shard_mac in shard_macs):
+        raise ValueError("A shard MAC is missing")
+    return encryptor.combine_shard_macs(shard_macs, manifest['chunks'], flags)
+
+
+def merge_segments(encryptor: ChaosEncrypt, manifest: Dict, segments: List[bytes],
+                   shard_macs: List[Optional[int]]) -> Tuple[bytes, Optional[int]]:
+    """Merge the segments of every shard in memory, returning (ciphertext, MAC).
+
+    Segments and MACs are in manifest order. Nothing is decrypted: the
+    ciphertext is a compact header and length table followed by the
+    segments, and the MAC combines the shard MACs.
+
+    Raises:
+        ValueError: If a segment is missing or has the wrong length, or a
+            shard MAC is missing
+    """
+    check_manifest(manifest, encryptor)
+    if len(segments) != len(manifest['shards']):
+        raise ValueError(f"Expected {len(manifest['shards'])} segments, got {len(segments)}")
+    for shard, segment in zip(manifest['shards'], segments):
+        if len(segment) != shard['length']:
+            raise ValueError(f"Segment {shard['index']} has {len(segment)} bytes, expected {shard['length']}")
+    prefix, flags = _merged_prefix(encryptor, manifest)
+    return prefix + b''.join(segments), _merged_mac(encryptor, manifest, shard_macs, flags)
+
+
+def merge_files(encryptor: ChaosEncrypt, manifest: Dict, directory: str, output_path: str) -> Optional[int]:
+    """Merge the segment files in directory into one ciphertext file.
+
+    Segments are streamed into output_path, so memory use does not grow
+    with the payload. The merged MAC is also written to output_path + '.mac'.
+
+    Returns:
+        The merged MAC, or None if the engine has MACs disabled
+
+    Raises:
+        ValueError: If a segment or shard MAC is missing or a segment has
+            the wrong length
+    """
+    check_manifest(manifest, encryptor)
+    shard_macs = []
+    for shard in manifest['shards']:
+        path = segment_path(directory, shard['index'])
+        if not os.path.exists(path):
+            raise ValueError(f"Segment of shard {shard['index']} not found: '{path}'")
+        if os.path.getsize(path) != shard['length']:
+            raise ValueError(f"Segment '{path}' has {os.path.getsize(path)} bytes, expected {shard['length']}")
+        if encryptor.use_mac:
+            if not os.path.exists(path + MAC_SUFFIX):
+                raise ValueError(f"MAC of shard {shard['index']} not found: '{path}{MAC_SUFFIX}'")
+            with open(path + MAC_SUFFIX, 'r') as f:
+                shard_macs.append(int(f.read().strip()))
+
+    prefix, flags = _merged_prefix(encryptor, manifest)
+    mac = _merged_mac(encryptor, manifest, shard_macs, flags)
+    with open(output_path, 'wb') as out:
+        out.write(prefix)
+        for shard in manifest['shards']:
+            with open(segment_path(directory, shard['index']), 'rb') as f:
+                shutil.copyfileobj(f, out, COPY_BUFFER_SIZE)
+    if mac is not None:
+        with open(output_path + MAC_SUFFIX, 'w') as f:
+            f.write(str(mac))
+    return mac
+
+
+def encrypt_file_sharded(encryptor: ChaosEncrypt, input_path: str, output_path: str, directory: str,
+                         shards: int, workers: int = 1) -> Optional[int]:
+    """Plan, encrypt and merge a file, with local processes standing in for nodes.
+
+    The manifest and segments are written to directory, as a multi-node
+    job would share them; the merged ciphertext decrypts with decrypt_bytes.
+
+    Returns:
+        The merged MAC, or None if the engine has MACs disabled
+    """
+    manifest = plan_shards(os.path.getsize(input_path), encryptor.chunk_size, shards=shards)
+    os.makedirs(directory, exist_ok=True)
+    save_manifest(manifest, os.path.join(directory, MANIFEST_NAME))
+    indices = [shard['index'] for shard in manifest['shards']]
+    if workers <= 1 or len(indices) <= 1:
+        for index in indices:
+            encrypt_shard_file(encryptor, manifest, index, input_path, directory)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(indices))) as executor:
+            futures = [executor.submit(encrypt_shard_file, encryptor, manifest, index, input_path, directory)
+                       for index in indices]
+            for future in futures:
+                future.result()
+    return merge_files(encryptor, manifest, directory, output_path)
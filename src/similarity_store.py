@@ -0,0 +1,348 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORE_VERSION = 1
+META_FILE = 'meta.json'
+MATRIX_FILE = 'matrix.f64'
+FEATURE_KINDS = ('words', 'ngrams')
+# A feature present in at least 1/DENSE_FRACTION of the documents is counted
+# with a dense matrix product instead of its (long) posting list
+DENSE_FRACTION = 16
+DENSE_MAX_FEATURES = 256
+# New documents whose dense intersections are computed per matrix product
+ROW_BLOCK = 256
+
+
+def word_features(text: str) -> List[str]:
+    """Return the tokens calculate_word_similarity compares: encrypted words starting with 'w'."""
+    return [word for word in text.split() if word.startswith('w')]
+
+
+def char_features(text: str, n_gram_size: int) -> List[str]:
+    """Return the character n-grams calculate_char_similarity compares."""
+    return [text[i:i + n_gram_size] for i in range(len(text) - n_gram_size + 1)]
+
+
+def condensed_index(i: int, j: int) -> int:
+    """Return the position of pair (i, j), i > j, in the condensed matrix.
+
+    Pairs are stored lower-triangular and row-major, so document i's row
+    (its similarities to documents 0..i-1) starts at i*(i-1)/2 and adding
+    documents only appends to the file.
+    """
+    return i * (i - 1) // 2 + j
+
+
+def _read_array(path: str, dtype, count: int) -> np.ndarray:
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.fromfile(path, dtype=dtype, count=count)
+
+
+def _truncate(path: str, size: int):
+    """Drop bytes appended after the last committed metadata, e.g. by an interrupted add."""
+    if not os.path.exists(path):
+        open(path, 'wb').close()
+    elif os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+
+class _FeatureIndex:
+    """Vocabulary and per-document feature id sets for one feature kind."""
+
+    def __init__(self, directory: str, kind: str):
+        self.vocab_path = os.path.join(directory, kind + '.vocab')
+        self.ids_path = os.path.join(directory, kind + '.ids')
+        self.offsets_path = os.path.join(directory, kind + '.offsets')
+        self.vocab: Dict[str, int] = {}
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    def load(self, count: int, meta: Dict):
+        vocab_size = meta['vocab']
+        with open(self.vocab_path, 'r', encoding='utf-8') as f:
+            self.vocab = {json.loads(next(f)): i for i in range(vocab_size)}
+        ends = _read_array(self.offsets_path, np.int64, count)
+        self.offsets = np.concatenate(([0], ends)).astype(np.int64)
+        self.ids = _read_array(self.ids_path, np.int32, int(self.offsets[-1]))
+
+    def truncate(self, count: int, meta: Dict):
+        """Cut the data files back to their committed lengths."""
+        with open(self.vocab_path, 'a+b') as f:
+            f.seek(0)
+            size = sum(len(next(f)) for _ in range(meta['vocab']))
+        _truncate(self.vocab_path, size)
+        _truncate(self.ids_path, 4 * meta['ids'])
+        _truncate(self.offsets_path, 8 * count)
+
+    def meta(self) -> Dict:
+        return {'vocab': len(self.vocab), 'ids': len(self.ids)}
+
+    def encode(self, features: Iterable[str], new_vocab: List[str]) -> np.ndarray:
+        """Return the sorted unique ids of features, adding unseen ones to the vocabulary."""
+        ids = set()
+        for feature in features:
+            fid = self.vocab.get(feature)
+            if fid is None:
+                fid = self.vocab[feature] = len(self.vocab)
+                new_vocab.append(feature)
+            ids.add(fid)
+        return np.array(sorted(ids), dtype=np.int32)
+
+    def append(self, docs: List[np.ndarray], new_vocab: List[str]):
+        """Append encoded documents to memory and to the data files."""
+        with open(self.vocab_path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(feature) + '\n' for feature in new_vocab)
+        sizes = np.array([len(doc) for doc in docs], dtype=np.int64)
+        ends = self.offsets[-1] + np.cumsum(sizes)
+        new_ids = np.concatenate(docs).astype(np.int32) if docs else np.zeros(0, dtype=np.int32)
+        with open(self.ids_path, 'ab') as f:
+            new_ids.tofile(f)
+        with open(self.offsets_path, 'ab') as f:
+            ends.tofile(f)
+        self.ids = np.concatenate((self.ids, new_ids))
+        self.offsets = np.concatenate((self.offsets, ends))
+
+    def keep(self, docs: np.ndarray, suffix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, offsets) restricted to the given documents, writing them under suffix."""
+        sizes = np.diff(self.offsets)[docs]
+        ids = np.concatenate([self.ids[self.offsets[d]:self.offsets[d + 1]] for d in docs]) \
+            if len(docs) else np.zeros(0, dtype=np.int32)
+        offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        ids.astype(np.int32).tofile(self.ids_path + suffix)
+        offsets[1:].tofile(self.offsets_path + suffix)
+        return ids, offsets
+
+    def intersections(self, first: int) -> Iterable[Tuple[int, np.ndarray]]:
+        """Yield (i, counts) for every document i >= first, where counts[j] is the
+        number of features documents i and j share, for all j < i.
+
+        Features in a large fraction of documents go into a dense 0/1 matrix
+        whose products give their counts for a block of rows at once; the rest
+        are counted by a bincount over their posting lists.
+        """
+        n = len(self.offsets) - 1
+        sizes = np.diff(self.offsets)
+        doc_of = np.repeat(np.arange(n, dtype=np.int64), sizes)
+        df = np.bincount(self.ids, minlength=len(self.vocab))
+
+        threshold = max(2, n // DENSE_FRACTION)
+        dense = np.argsort(-df, kind='stable')[:DENSE_MAX_FEATURES]
+        dense = dense[df[dense] >= threshold]
+        column = np.full(len(self.vocab), -1, dtype=np.int64)
+        column[dense] = np.arange(len(dense))
+        is_dense = column[self.ids] >= 0
+        matrix = np.zeros((n, len(dense)), dtype=np.float32)
+        matrix[doc_of[is_dense], column[self.ids[is_dense]]] = 1.0
+
+        # Posting lists of the sparse features, grouped by feature, in document order
+        sparse = ~is_dense
+        sparse_ids = self.ids[sparse]
+        order = np.argsort(sparse_ids, kind='stable')
+        postings = doc_of[sparse][order]
+        starts = np.concatenate(([0], np.cumsum(np.bincount(sparse_ids, minlength=len(self.vocab)))))
+
+        for block in range(first, n, ROW_BLOCK):
+            stop = min(block + ROW_BLOCK, n)
+            # float32 counts are exact below 2**24 shared features
+            counts = (matrix[block:stop] @ matrix[:stop].T).astype(np.int64)
+            for i in range(block, stop):
+                features = self.ids[self.offsets[i]:self.offsets[i + 1]]
+                features = features[column[features] < 0]
+                row = counts[i - block, :i]
+                if len(features):
+                    docs = np.concatenate([postings[starts[f]:starts[f + 1]] for f in features])
+                    row = row + np.bincount(docs, minlength=n)[:i]
+                yield i, row
+
+
+class SimilarityStore:
+    """Persistent, incrementally updated SemanticClustering similarity matrix.
+
+    Documents are numbered in insertion order. The store keeps each
+    document's word and character n-gram feature sets and the condensed
+    matrix of pairwise similarities on disk, so adding m documents to a
+    store of n computes only the n*m + m*(m-1)/2 new pairs. Scores are
+    bit-identical to SemanticClustering.calculate_similarity with the same
+    n-gram size and weights.
+
+    Removed documents are tombstoned and keep their number until compact()
+    rewrites the store without them.
+    """
+
+    def __init__(self, path: str, n_gram_size: int = 2, word_weight: float = 0.7,
+                 char_weight: float = 0.3):
+        """Open the store in directory path, creating it if needed.
+
+        Args:
+            path: Store directory
+            n_gram_size: Size of character n-grams
+            word_weight: Weight for word-level similarity
+            char_weight: Weight for character-level similarity
+
+        Raises:
+            ValueError: If an existing store was built with other parameters
+        """
+        self.path = path
+        self.n_gram_size = n_gram_size
+        self.word_weight = word_weight
+        self.char_weight = char_weight
+        self.matrix_path = os.path.join(path, MATRIX_FILE)
+        self.indexes = {kind: _FeatureIndex(path, kind) for kind in FEATURE_KINDS}
+        self.count = 0
+        self.removed = set()
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            for index in self.indexes.values():
+                index.truncate(0, {'vocab': 0, 'ids': 0})
+            _truncate(self.matrix_path, 0)
+            self._write_meta()
+            return
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported similarity store version: {meta.get('version')}")
+        params = (meta['n_gram_size'], meta['word_weight'], meta['char_weight'])
+        if params != (n_gram_size, word_weight, char_weight):
+            raise ValueError(f"Store '{path}' was built with n_gram_size, word_weight, "
+                             f"char_weight = {params}")
+        self.count = meta['count']
+        self.removed = set(meta['removed'])
+        for kind, index in self.indexes.items():
+            index.truncate(self.count, meta[kind])
+            index.load(self.count, meta[kind])
+        _truncate(self.matrix_path, 8 * condensed_index(self.count, 0))
+
+    def _write_meta(self):
+        meta = {
+            'version': STORE_VERSION,
+            'n_gram_size': self.n_gram_size,
+            'word_weight': self.word_weight,
+            'char_weight': self.char_weight,
+            'count': self.count,
+            'removed': sorted(self.removed),
+        }
+        for kind, index in self.indexes.items():
+            meta[kind] = index.meta()
+        # Replacing the metadata commits everything appended before it
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+    def __len__(self) -> int:
+        return self.count - len(self.removed)
+
+    @property
+    def ids(self) -> List[int]:
+        """Numbers of the live (not removed) documents, in order."""
+        return [i for i in range(self.count) if i not in self.removed]
+
+    def add(self, texts: Sequence[str]) -> List[int]:
+        """Add documents, computing only their rows of the similarity matrix.
+
+        Args:
+            texts: Encrypted texts, as passed to calculate_similarities
+
+        Returns:
+            The numbers assigned to the new documents
+        """
+        first = self.count
+        features = {
+            'words': [word_features(text) for text in texts],
+            'ngrams': [char_features(text, self.n_gram_size) for text in texts],
+        }
+        for kind, index in self.indexes.items():
+            new_vocab: List[str] = []
+            docs = [index.encode(doc, new_vocab) for doc in features[kind]]
+            index.append(docs, new_vocab)
+        total = first + len(texts)
+
+        word_sizes = np.diff(self.indexes['words'].offsets).astype(np.float64)
+        char_sizes = np.diff(self.indexes['ngrams'].offsets).astype(np.float64)
+        rows = zip(self.indexes['words'].intersections(first), self.indexes['ngrams'].intersections(first))
+        with open(self.matrix_path, 'ab') as f:
+            for (i, word_common), (_, char_common) in rows:
+                word_sim = _jaccard(word_common, word_sizes[i], word_sizes[:i])
+                char_sim = _jaccard(char_common, char_sizes[i], char_sizes[:i])
+                (self.word_weight * word_sim + self.char_weight * char_sim).tofile(f)
+
+        self.count = total
+        self._write_meta()
+        return list(range(first, total))
+
+    def remove(self, ids: Iterable[int]):
+        """Tombstone documents; their space is reclaimed by compact()."""
+        ids = set(ids)
+        unknown = [i for i in ids if not 0 <= i < self.count or i in self.removed]
+        if unknown:
+            raise ValueError(f"Unknown or already removed documents: {sorted(unknown)}")
+        self.removed |= ids
+        self._write_meta()
+
+    def _condensed(self, mode: str = 'r') -> Optional[np.ndarray]:
+        size = condensed_index(self.count, 0)
+        if size == 0:
+            return None
+        return np.memmap(self.matrix_path, dtype=np.float64, mode=mode, shape=(size,))
+
+    def similarity(self, i: int, j: int) -> float:
+        """Return the similarity of documents i and j (1.0 on the diagonal)."""
+        for doc in (i, j):
+            if not 0 <= doc < self.count or doc in self.removed:
+                raise ValueError(f"Unknown document: {doc}")
+        if i == j:
+            return 1.0
+        i, j = max(i, j), min(i, j)
+        return float(self._condensed()[condensed_index(i, j)])
+
+    def matrix(self) -> np.ndarray:
+        """Return the similarity matrix of the live documents, as calculate_similarities would."""
+        live = np.array(self.ids, dtype=np.int64)
+        out = np.eye(len(live))
+        condensed = self._condensed()
+        for row, i in enumerate(live[1:], start=1):
+            start = condensed_index(int(i), 0)
+            out[row, :row] = condensed[start + live[:row]]
+        return np.maximum(out, out.T)
+
+    def compact(self) -> List[int]:
+        """Rewrite the store without removed documents and renumber the rest.
+
+        The new files are written alongside the old ones and swapped in at
+        the end; an interruption during the swap can leave the store
+        inconsistent, so back it up first if it cannot be rebuilt.
+
+        Returns:
+            The old number of each document, indexed by its new number
+        """
+        live = np.array(self.ids, dtype=np.int64)
+        suffix = '.compact'
+        condensed = self._condensed()
+        with open(self.matrix_path + suffix, 'wb') as f:
+            for row, i in enumerate(live[1:], start=1):
+                condensed[condensed_index(int(i), 0) + live[:row]].tofile(f)
+        del condensed
+        kept = {kind: index.keep(live, suffix) for kind, index in self.indexes.items()}
+
+        for kind, index in self.indexes.items():
+            os.replace(index.ids_path + suffix, index.ids_path)
+            os.replace(index.offsets_path + suffix, index.offsets_path)
+            index.ids, index.offsets = kept[kind]
+        os.replace(self.matrix_path + suffix, self.matrix_path)
+        self.count = len(live)
+        self.removed = set()
+        self._write_meta()
+        return live.tolist()
+
+
+def _jaccard(common: np.ndarray, size: float, sizes: np.ndarray) -> np.ndarray:
+    # Same division as len(common) / len(total), with 0.0 for two empty sets
+    union = size + sizes - common
+    return np.divide(common, union, out=np.zeros(len(common)), where=union > 0)
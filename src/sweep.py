@@ -0,0 +1,344 @@
+import hashlib
+import itertools
+import json
+import math
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .core import FRAMING_COMPACT, MAP_BINARY64, MAP_DECIMAL, ChaosEncrypt, validate_input
+from .cse import ciphertext_window, normalize_rows
+from .health import KeystreamHealth
+from .nist import MIN_BITS, run_tests
+
+# Bump when a metric changes, so cached results of older code are not reused
+SWEEP_VERSION = 1
+CACHE_ENV = 'CHAOSENCRYPT_SWEEP_CACHE'
+# Engine options per mode name; every mode uses the XOR keystream
+MODES = {
+    'dynamic-k': {},
+    'static-k': {'use_dynamic_k': False},
+    'binary64': {'chaotic_map': MAP_BINARY64},
+    'width-4': {'keystream_width': 4},
+}
+GRID_KEYS = ('precision', 'primes', 'base_k', 'chunk_size', 'mode')
+DEFAULT_SETTINGS = {
+    # Bytes of zero plaintext encrypted for the entropy and statistical tests
+    'sample_bytes': 256 * 1024,
+    # Leading chunks whose keystream orbits are measured
+    'cycle_chunks': 64,
+    # Structural echo corpus: sentence templates times variants of each
+    'cse_variants': 6,
+    'cse_window': 64,
+}
+CSE_TEMPLATES = (
+    "The {0} quarterly report shows revenue of {1} million across all regions.",
+    "Meeting moved to {1} pm, please tell {0} and update the shared calendar.",
+    "ERROR {1}: connection to {0} timed out after 30 seconds, retrying",
+    "Dear {0}, thank you for your order #{1}. It will ship within two days.",
+    "{0} scored {1} points in the final, a new record for the season.",
+    "def {0}(x):\n    return x * {1}\n",
+)
+CSE_NAMES = ('alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi')
+
+
+def default_cache_dir() -> str:
+    """Return $CHAOSENCRYPT_SWEEP_CACHE or the per-user cache location."""
+    path = os.environ.get(CACHE_ENV)
+    if path:
+        return path
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'chaosencrypt', 'sweep')
+
+
+def build_grid(precisions: Sequence[int], prime_sets: Sequence[Sequence[int]], base_ks: Sequence[int],
+               chunk_sizes: Sequence[int], modes: Sequence[str],
+               skipped: Optional[List[Dict]] = None) -> List[Dict]:
+    """Return every combination of the parameter values as a list of cells.
+
+    Args:
+        precisions, prime_sets, base_ks, chunk_sizes, modes: Values of each axis
+        skipped: If given, invalid combinations (e.g. width-4 below
+            precision 10) are appended to it with an 'error' instead of
+            raising
+
+    Raises:
+        ValueError: If a mode is unknown, or a combination is invalid and
+            skipped is None
+    """
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"Mode must be one of: {', '.join(MODES)}")
+    cells = []
+    for precision, primes, base_k, chunk_size, mode in itertools.product(
+            precisions, prime_sets, base_ks, chunk_sizes, modes):
+        cell = dict(zip(GRID_KEYS, (precision, list(primes), base_k, chunk_size, mode)))
+        options = MODES[mode]
+        try:
+            validate_input(precision=precision, primes=list(primes), secret='sweep', chunk_size=chunk_size,
+                           base_k=base_k, framing=FRAMING_COMPACT,
+                           keystream_width=options.get('keystream_width', 1),
+                           chaotic_map=options.get('chaotic_map', MAP_DECIMAL))
+        except ValueError as e:
+            if skipped is None:
+                raise
+            skipped.append(dict(cell, error=str(e)))
+            continue
+        cells.append(cell)
+    return cells
+
+
+def cell_engine(cell: Dict, secret: str) -> ChaosEncrypt:
+    """Return an engine for a grid cell."""
+    return ChaosEncrypt(precision=cell['precision'], primes=cell['primes'], shared_secret=secret,
+                        chunk_size=cell['chunk_size'], base_k=cell['base_k'], use_mac=False,
+                        framing=FRAMING_COMPACT, **MODES[cell['mode']])
+
+
+def cache_key(cell: Dict, settings: Dict, secret: str) -> str:
+    """Return the content address of a cell's result: sha256 of its canonical JSON inputs."""
+    payload = {
+        'version': SWEEP_VERSION,
+        'cell': cell,
+        'settings': settings,
+        'secret': hashlib.sha256(secret.encode()).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed store of cell results, one JSON file per key.
+
+    Files are written to a temporary name and renamed, so a crash or a
+    concurrent sweep never leaves a partial result behind.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or default_cache_dir()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the stored result for key, or None if it is missing or unreadable."""
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, result: Dict):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(result, f, sort_keys=True)
+        os.replace(temporary, path)
+
+
+def _factorize(n: int) -> Dict[int, int]:
+    # Trial division; moduli and Carmichael factors here are 2- and 5-smooth
+    factors: Dict[int, int] = {}
+    d = 2
+    while d * d <= n:
+        while n % d == 0:
+            factors[d] = factors.get(d, 0) + 1
+            n //= d
+        d += 1
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+def multiplicative_order(a: int, n: int) -> int:
+    """Return the smallest t > 0 with a**t = 1 (mod n), for a coprime to n."""
+    if n == 1:
+        return 1
+    carmichael = 1
+    for p, e in _factorize(n).items():
+        if p == 2:
+            part = 1 if e == 1 else 2 if e == 2 else 2 ** (e - 2)
+        else:
+            part = (p - 1) * p ** (e - 1)
+        carmichael = carmichael * part // math.gcd(carmichael, part)
+    order = carmichael
+    for p in _factorize(carmichael):
+        while order % p == 0 and pow(a, order // p, n) == 1:
+            order //= p
+    return order
+
+
+def orbit_cycle_length(state: int, multiplier: int, modulus: int) -> Optional[int]:
+    """Return the period of state, state*m, state*m**2, ... mod modulus.
+
+    The orbit lives in the multiples of g = gcd(state, modulus), where it
+    has the period of multiplier modulo modulus / g. Returns None if the
+    multiplier shares a factor with that modulus, when the orbit collapses
+    instead of cycling.
+    """
+    reduced = modulus // math.gcd(state, modulus)
+    if math.gcd(multiplier, reduced) != 1:
+        return None
+    return multiplicative_order(multiplier % reduced, reduced)
+
+
+def cycle_stats(engine: ChaosEncrypt, n_chunks: int) -> Dict:
+    """Measure the keystream orbits of the first n_chunks chunks.
+
+    short_chunks counts chunks whose keystream repeats within the chunk,
+    i.e. whose orbit is shorter than the chunk's keystream steps.
+    """
+    lengths = []
+    for chunk_index in range(n_chunks):
+        k = engine.derive_k(chunk_index)
+        state = engine.warm_state(engine.derive_seed(chunk_index), k)
+        lengths.append(orbit_cycle_length(state, engine.primes[k % len(engine.primes)], engine.modulus))
+    periodic = [length for length in lengths if length is not None]
+    steps = -(-engine.chunk_size // engine.keystream_width)
+    return {
+        'chunks': n_chunks,
+        'min': min(periodic) if periodic else None,
+        'median': statistics.median(periodic) if periodic else None,
+        'short_chunks': sum(length is None or length < steps for length in lengths),
+    }
+
+
+def echo_corpus(variants: int) -> List[List[str]]:
+    """Return groups of structurally identical texts, one group per template."""
+    return [[template.format(CSE_NAMES[i % len(CSE_NAMES)], 100 + 37 * i) for i in range(variants)]
+            for template in CSE_TEMPLATES]
+
+
+def echo_strength(engine: ChaosEncrypt, variants: int, window: int) -> Dict:
+    """Measure the Chaotic Structural Echo of a parameter set.
+
+    Texts built from the same template are structurally similar. The echo
+    strength is their mean ciphertext cosine similarity minus that of texts
+    from different templates; it is near 0 when ciphertexts hide structure.
+    """
+    groups = echo_corpus(variants)
+    windows = b''.join(ciphertext_window(engine, text, window).ljust(window, b'\0')
+                       for group in groups for text in group)
+    vectors = normalize_rows(np.frombuffer(windows, dtype=np.uint8).reshape(-1, window).astype(np.float64))
+    similarity = vectors @ vectors.T
+    labels = np.repeat(np.arange(len(groups)), variants)
+    same = labels[:, None] == labels[None, :]
+    pairs = ~np.eye(len(labels), dtype=bool)
+    within = float(similarity[same & pairs].mean())
+    between = float(similarity[~same].mean())
+    return {'within': within, 'between': between, 'strength': within - between}
+
+
+def evaluate_cell(cell: Dict, secret: str, settings: Dict) -> Dict:
+    """Compute every metric of one grid cell.
+
+    The entropy, health and statistical tests run on the keystream of
+    consecutive chunks (the ciphertext of sample_bytes zero bytes).
+    """
+    engine = cell_engine(cell, secret)
+    sample_bytes = settings['sample_bytes']
+    chunk_size = cell['chunk_size']
+    stream = bytearray()
+    for chunk_index in range(-(-sample_bytes // chunk_size)):
+        length = min(chunk_size, sample_bytes - chunk_index * chunk_size)
+        stream += engine.encrypt_chunk(bytes(length), chunk_index)
+
+    monitor = KeystreamHealth(entropy_interval=1, on_failure=lambda failure: None)
+    monitor.update(bytes(stream))
+    monitor.flush()
+    health = monitor.stats()
+    n_chunks = min(settings['cycle_chunks'], -(-sample_bytes // chunk_size))
+    return {
+        'cycle_length': cycle_stats(engine, n_chunks),
+        'entropy': {key: health['entropy'][key] for key in ('shannon', 'min_entropy')},
+        'health_failures': sum(health['failures'].values()),
+        'nist': run_tests(bytes(stream)),
+        'cse': echo_strength(engine, settings['cse_variants'], settings['cse_window']),
+    }
+
+
+def _evaluate(cell: Dict, secret: str, settings: Dict) -> Dict:
+    start = time.perf_counter()
+    metrics = evaluate_cell(cell, secret, settings)
+    return {'metrics': metrics, 'seconds': time.perf_counter() - start}
+
+
+def run_sweep(cells: List[Dict], secret: str, cache: Optional[ResultCache] = None, workers: int = 1,
+              settings: Optional[Dict] = None,
+              progress: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """Evaluate a grid, reusing cached cells and computing the rest across processes.
+
+    Args:
+        cells: Cells from build_grid
+        secret: Shared secret of every engine
+        cache: Result cache; None computes every cell and stores nothing
+        workers: Number of worker processes (1 runs in-process)
+        settings: Overrides of DEFAULT_SETTINGS
+        progress: Optional callback receiving each result as it completes
+
+    Returns:
+        One result per cell, in grid order: the cell's parameters plus
+        'key', 'cached', 'seconds' and 'metrics'
+
+    Raises:
+        ValueError: If a setting is unknown or the sample is too short
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    if set(settings) != set(DEFAULT_SETTINGS):
+        raise ValueError(f"Settings must be among: {', '.join(DEFAULT_SETTINGS)}")
+    if settings['sample_bytes'] < MIN_BITS // 8:
+        raise ValueError(f"Sample must be at least {MIN_BITS // 8} bytes")
+    progress = progress or (lambda result: None)
+
+    results: List[Optional[Dict]] = [None] * len(cells)
+    pending = []
+    for i, cell in enumerate(cells):
+        key = cache_key(cell, settings, secret)
+        stored = cache.get(key) if cache is not None else None
+        if stored is not None:
+            results[i] = dict(cell, key=key, cached=True, **stored)
+            progress(results[i])
+        else:
+            pending.append((i, key))
+
+    def record(i: int, key: str, computed: Dict):
+        if cache is not None:
+            cache.put(key, computed)
+        results[i] = dict(cells[i], key=key, cached=False, **computed)
+        progress(results[i])
+
+    if workers <= 1 or len(pending) <= 1:
+        for i, key in pending:
+            record(i, key, _evaluate(cells[i], secret, settings))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_evaluate, cells[i], secret, settings): (i, key) for i, key in pending}
+            for future in as_completed(futures):
+                record(*futures[future], future.result())
+    return results
+
+
+def _format(value, spec: str) -> str:
+    return '-' if value is None else format(value, spec)
+
+
+def format_table(results: List[Dict]) -> str:
+    """Return a plain-text summary table with one row per cell."""
+    lines = [f"{'precision':>9} {'primes':>18} {'base_k':>6} {'chunk':>7} {'mode':>15} "
+             f"{'cycle min':>10} {'short':>5} {'shannon':>7} {'min-H':>5} {'health':>6} "
+             f"{'nist':>5} {'cse':>7} {'cached':>6}"]
+    for r in results:
+        m = r['metrics']
+        cycles = m['cycle_length']
+        primes = ','.join(map(str, r['primes']))
+        lines.append(
+            f"{r['precision']:>9} {primes:>18} {r['base_k']:>6} {r['chunk_size']:>7} {r['mode']:>15} "
+            f"{_format(cycles.get('min'), '.3g'):>10} {_format(cycles.get('short_chunks'), 'd'):>5} "
+            f"{m['entropy']['shannon']:>7.4f} {m['entropy']['min_entropy']:>5.2f} {m['health_failures']:>6} "
+            f"{m['nist']['passed']:>3}/{m['nist']['tests']} {m['cse']['strength']:>7.4f} "
+            f"{'yes' if r['cached'] else 'no':>6}")
+    return '\n'.join(lines)
@@ -0,0 +1,277 @@
+import json
+import os
+import time
+import warnings
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from .backends import NUMPY_MIN_LENGTH, NumpyBackend, available_backends, select_backend
+
+PROFILE_VERSION = 1
+PROFILE_ENV = 'CHAOSENCRYPT_PROFILE'
+# Set to 1 to ignore any profile, e.g. for reproducible benchmarks
+NO_PROFILE_ENV = 'CHAOSENCRYPT_NO_PROFILE'
+
+DEFAULT_PAYLOAD_SIZES = (1024, 64 * 1024, 1024 * 1024)
+KEYSTREAM_LENGTHS = (16, 32, 64, 128, 256, 1024, 4096, 65536)
+BLOCK_SIZES = (1024, 4096, 16384)
+CHUNK_SIZES = (1024, 16 * 1024, 64 * 1024, 1024 * 1024)
+BATCH_CHUNKS = (64, 256, 1024)
+# Each measurement repeats until it has run for at least this long
+MIN_MEASURE_SECONDS = 0.02
+
+_cache: Dict[Tuple[str, int], Dict] = {}
+_tuned_backends: Dict[Tuple, object] = {}
+
+
+def default_profile_path() -> str:
+    """Return $CHAOSENCRYPT_PROFILE or the per-user profile location."""
+    path = os.environ.get(PROFILE_ENV)
+    if path:
+        return path
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(config_home, 'chaosencrypt', 'profile.json')
+
+
+def load_profile(path: Optional[str] = None) -> Dict:
+    """Return the tuning profile, or an empty dict if there is none.
+
+    The file is re-read only when its modification time changes. Unreadable
+    or incompatible profiles are ignored with a warning.
+    """
+    if path is None:
+        if os.environ.get(NO_PROFILE_ENV) == '1':
+            return {}
+        path = default_profile_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    key = (path, mtime)
+    profile = _cache.get(key)
+    if profile is None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+            if not isinstance(profile, dict) or profile.get('version') != PROFILE_VERSION:
+                raise ValueError("unsupported profile version")
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Ignoring tuning profile '{path}': {e}")
+            profile = {}
+        _cache.clear()
+        _cache[key] = profile
+    return profile
+
+
+def save_profile(profile: Dict, path: Optional[str] = None) -> str:
+    """Write a profile as JSON, creating its directory, and return the path."""
+    path = path or default_profile_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return path
+
+
+def tuned_value(key: str, default):
+    """Return a top-level tuned setting (e.g. 'workers', 'batch_chunks') or default."""
+    value = load_profile().get(key)
+    return default if value is None else value
+
+
+def tuned_backend(precision: int):
+    """Return the backend tuned for a precision, or the automatic choice.
+
+    Backends are interchangeable (identical keystreams), so a stale or
+    foreign profile can only cost speed; entries naming a backend that is
+    unavailable here are ignored.
+    """
+    modulus = 10 ** precision
+    entry = load_profile().get('backends', {}).get(str(precision))
+    if not entry or entry.get('backend') not in available_backends(modulus):
+        return select_backend(modulus)
+    if entry['backend'] != 'numpy':
+        return select_backend(modulus, entry['backend'])
+
+    key = (entry.get('block_size'), entry.get('min_length'))
+    backend = _tuned_backends.get(key)
+    if backend is None:
+        backend = NumpyBackend(block_size=entry.get('block_size') or 4096,
+                               min_length=entry.get('min_length', NUMPY_MIN_LENGTH))
+        _tuned_backends[key] = backend
+    return backend
+
+
+def measure(func: Callable[[], object], min_seconds: float = MIN_MEASURE_SECONDS) -> float:
+    """Return the mean seconds per call of func, repeating until min_seconds elapse."""
+    func()  # warm caches such as power tables
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls
+
+
+def _tune_backend(precision: int, primes: Sequence[int]) -> Dict:
+    """Pick the fastest backend for a precision and, for NumPy, its block size and crossover."""
+    modulus = 10 ** precision
+    state = 123456789 % modulus
+    multiplier = primes[0]
+    timings: Dict[str, Dict[int, float]] = {}
+    for name in available_backends(modulus):
+        if name == 'numpy':
+            continue
+        backend = select_backend(modulus, name)
+        timings[name] = {n: measure(lambda: backend.keystream(state, multiplier, n, modulus))
+                         for n in KEYSTREAM_LENGTHS}
+
+    best_numpy = None
+    if 'numpy' in available_backends(modulus):
+        for block_size in BLOCK_SIZES:
+            # min_length=0 times the vectorised path at every length
+            backend = NumpyBackend(block_size=block_size, min_length=0)
+            timing = {n: measure(lambda: backend.keystream(state, multiplier, n, modulus))
+                      for n in KEYSTREAM_LENGTHS}
+            if best_numpy is None or timing[KEYSTREAM_LENGTHS[-1]] < best_numpy[1][KEYSTREAM_LENGTHS[-1]]:
+                best_numpy = (block_size, timing)
+
+    # Large keystreams dominate throughput, so rank by the longest length
+    longest = KEYSTREAM_LENGTHS[-1]
+    best = min(timings, key=lambda name: timings[name][longest])
+    if best_numpy is None or timings[best][longest] <= best_numpy[1][longest]:
+        return {'backend': best, 'bytes_per_second': longest / timings[best][longest]}
+
+    block_size, timing = best_numpy
+    scalar = timings[best]
+    # Below the crossover the scalar loop beats NumPy's per-call overhead
+    min_length = next((n for n in KEYSTREAM_LENGTHS if timing[n] < scalar[n]), longest)
+    return {
+        'backend': 'numpy',
+        'block_size': block_size,
+        'min_length': min_length,
+        'bytes_per_second': longest / timing[longest],
+    }
+
+
+def _encrypt_payloads(params: Dict, payloads: Sequence[bytes]) -> int:
+    from .core import ChaosEncrypt
+
+    encryptor = ChaosEncrypt(**params)
+    for payload in payloads:
+        encryptor.encrypt_bytes(payload)
+    return len(payloads)
+
+
+def _tune_chunk_size(params: Dict, sizes: Sequence[int]) -> Dict:
+    """Measure encrypt_bytes throughput per chunk size; a recommendation only, as it changes output."""
+    from .core import ChaosEncrypt
+
+    results = {}
+    for chunk_size in CHUNK_SIZES:
+        encryptor = ChaosEncrypt(**dict(params, chunk_size=chunk_size, framing='compact'))
+        seconds = sum(measure(lambda: encryptor.encrypt_bytes(bytes(size))) for size in sizes)
+        results[chunk_size] = sum(sizes) / seconds
+    best = max(results, key=results.get)
+    return {'chunk_size': best, 'framing': 'compact',
+            'bytes_per_second': {str(k): v for k, v in results.items()}}
+
+
+def _tune_workers(params: Dict, payload_size: int, max_workers: int) -> Dict:
+    """Time a fixed batch of payloads across process pools of increasing size."""
+    candidates = sorted({1, max_workers} | {2 ** i for i in range(1, 8) if 2 ** i < max_workers})
+    from concurrent.futures import ProcessPoolExecutor
+
+    payloads = [bytes(payload_size)] * (4 * max_workers)
+    results = {}
+    for workers in candidates:
+        start = time.perf_counter()
+        if workers == 1:
+            _encrypt_payloads(params, payloads)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                groups = [payloads[i::workers] for i in range(workers)]
+                list(executor.map(_encrypt_payloads, [params] * workers, groups))
+        results[workers] = len(payloads) * payload_size / (time.perf_counter() - start)
+    best = max(results, key=results.get)
+    return {'workers': best, 'bytes_per_second': {str(k): v for k, v in results.items()}}
+
+
+def _tune_batch_chunks(params: Dict, payload_size: int) -> Dict:
+    """Time AsyncChaosEncrypt.encrypt for each candidate batch_chunks."""
+    import asyncio
+    from .async_api import AsyncChaosEncrypt
+    from .core import ChaosEncrypt
+
+    encryptor = ChaosEncrypt(**params)
+    text = 'a' * payload_size
+    results = {}
+    for batch_chunks in BATCH_CHUNKS:
+        engine = AsyncChaosEncrypt(encryptor, batch_chunks=batch_chunks)
+        results[batch_chunks] = payload_size / measure(lambda: asyncio.run(engine.encrypt(text)))
+    best = max(results, key=results.get)
+    return {'batch_chunks': best, 'bytes_per_second': {str(k): v for k, v in results.items()}}
+
+
+def tune(precisions: Sequence[int] = (12,), primes: Sequence[int] = (9973,),
+         sizes: Sequence[int] = DEFAULT_PAYLOAD_SIZES, chunk_size: int = 1024,
+         max_workers: Optional[int] = None,
+         progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """Benchmark this host and return a tuning profile.
+
+    Only settings that leave ciphertexts unchanged are applied automatically
+    when the profile is loaded: the keystream backend (per precision, with
+    NumPy block size and crossover length), worker count and async batch
+    size. The best chunk size is recorded under 'recommended' only.
+
+    Args:
+        precisions: Precisions to tune backends for
+        primes: Prime list used for the measurements
+        sizes: Representative payload sizes in bytes
+        chunk_size: Chunk size used when tuning workers and batch size
+        max_workers: Largest worker count tried (default: CPU count)
+        progress: Optional callback receiving a line per completed stage
+
+    Returns:
+        Profile dictionary, ready for save_profile
+    """
+    import platform
+
+    progress = progress or (lambda message: None)
+    max_workers = max_workers or os.cpu_count() or 1
+    params = {'shared_secret': 'tune', 'primes': list(primes), 'chunk_size': chunk_size}
+    median_size = sorted(sizes)[len(sizes) // 2]
+
+    profile = {
+        'version': PROFILE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'backends': {},
+    }
+    for precision in precisions:
+        profile['backends'][str(precision)] = _tune_backend(precision, primes)
+        progress(f"precision {precision}: {profile['backends'][str(precision)]['backend']}")
+
+    params['precision'] = precisions[0]
+    workers = _tune_workers(params, median_size, max_workers)
+    profile['workers'] = workers['workers']
+    progress(f"workers: {workers['workers']}")
+
+    batch = _tune_batch_chunks(params, median_size)
+    profile['batch_chunks'] = batch['batch_chunks']
+    progress(f"batch chunks: {batch['batch_chunks']}")
+
+    recommended = _tune_chunk_size(params, sizes)
+    profile['recommended'] = {'chunk_size': recommended['chunk_size'], 'framing': recommended['framing']}
+    progress(f"recommended chunk size: {recommended['chunk_size']}")
+
+    profile['measurements'] = {
+        'workers': workers['bytes_per_second'],
+        'batch_chunks': batch['bytes_per_second'],
+        'chunk_size': recommended['bytes_per_second'],
+    }
+    return profile
@@ -0,0 +1,101 @@
+import unittest
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.chaosencrypt_cli import ChaosEncrypt
+from src.async_api import AsyncChaosEncrypt
+
+class _BufferWriter:
+    """Minimal stand-in for asyncio.StreamWriter collecting written bytes."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.buffer.extend(data)
+
+    async def drain(self):
+        self.drains += 1
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+class TestAsyncChaosEncrypt(unittest.TestCase):
+    def setUp(self):
+        self.encryptor = ChaosEncrypt(shared_secret="test_secret")
+        self.plaintext = "Grüße aus dem Chaos — 混沌. " * 200
+
+    def test_matches_sync_encrypt(self):
+        async def run():
+            async_encryptor = AsyncChaosEncrypt(self.encryptor, batch_chunks=7, max_in_flight=2)
+            ciphertext, mac = await async_encryptor.encrypt(self.plaintext)
+            self.assertEqual((ciphertext, mac), self.encryptor.encrypt(self.plaintext))
+            self.assertEqual(await async_encryptor.decrypt(ciphertext, mac), self.plaintext)
+            with self.assertRaises(ValueError):
+                await async_encryptor.decrypt(ciphertext, mac + 1)
+        asyncio.run(run())
+
+    def test_executors(self):
+        async def run(executor):
+            async_encryptor = AsyncChaosEncrypt(self.encryptor, executor=executor, batch_chunks=32)
+            ciphertext, mac = await async_encryptor.encrypt(self.plaintext)
+            return await async_encryptor.decrypt(ciphertext, mac)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(asyncio.run(run(executor)), self.plaintext)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(asyncio.run(run(executor)), self.plaintext)
+            self.encryptor = ChaosEncrypt(shared_secret="test_secret", framing='compact')
+            self.assertEqual(asyncio.run(run(executor)), self.plaintext)
+
+    def test_streams(self):
+        async def run():
+            async_encryptor = AsyncChaosEncrypt(self.encryptor, batch_chunks=5, max_in_flight=2)
+            encrypted = _BufferWriter()
+            # A tiny read size splits multi-byte characters across reads
+            mac = await async_encryptor.encrypt_stream(_reader(self.plaintext.encode('utf-8')), encrypted, read_size=37)
+            self.assertEqual((bytes(encrypted.buffer), mac), self.encryptor.encrypt(self.plaintext))
+            self.assertGreater(encrypted.drains, 1)
+
+            decrypted = _BufferWriter()
+            await async_encryptor.decrypt_stream(_reader(bytes(encrypted.buffer)), decrypted, mac)
+            self.assertEqual(decrypted.buffer.decode('utf-8'), self.plaintext)
+
+            with self.assertRaises(ValueError):
+                await async_encryptor.decrypt_stream(_reader(bytes(encrypted.buffer)), _BufferWriter(), mac + 1)
+            with self.assertRaises(ValueError):
+                await async_encryptor.decrypt_stream(_reader(bytes(encrypted.buffer[:-3])), _BufferWriter())
+        asyncio.run(run())
+
+    def test_multibyte_characters_split_across_batches(self):
+        encryptor = ChaosEncrypt(shared_secret="test_secret", chunk_size=15)
+        ciphertext, mac = encryptor.encrypt_bytes("é".encode('utf-8') * 50)
+
+        async def run():
+            async_encryptor = AsyncChaosEncrypt(encryptor, batch_chunks=1, max_in_flight=2)
+            self.assertEqual(await async_encryptor.decrypt(ciphertext, mac), "é" * 50)
+            decrypted = _BufferWriter()
+            await async_encryptor.decrypt_stream(_reader(ciphertext), decrypted, mac)
+            self.assertEqual(decrypted.buffer.decode('utf-8'), "é" * 50)
+            # Invalid UTF-8 fails cleanly, with every outstanding batch retrieved
+            corrupted = encryptor.encrypt_bytes(b'\xff' * 60)[0]
+            with self.assertRaises(ValueError):
+                await async_encryptor.decrypt(corrupted)
+            with self.assertRaises(ValueError):
+                await async_encryptor.decrypt_stream(_reader(corrupted), _BufferWriter())
+        asyncio.run(run())
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            AsyncChaosEncrypt(self.encryptor, batch_chunks=0)
+        with self.assertRaises(ValueError):
+            AsyncChaosEncrypt(self.encryptor, max_in_flight=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
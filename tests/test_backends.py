@@ -0,0 +1,84 @@
+import unittest
+from src.backends import (
+    BINARY_MODULUS, NumpyBackend, PYTHON_BACKEND, Uint64Backend, available_backends, gmpy2, select_backend
+)
+from src.chaosencrypt_cli import ChaosEncrypt
+
+class TestBackends(unittest.TestCase):
+    def test_numpy_matches_python(self):
+        backend = NumpyBackend(block_size=128)
+        for precision in (1, 4, 10, 15):
+            modulus = 10 ** precision
+            for multiplier in (9973, 9941, 7):
+                for length in (0, 1, 63, 64, 127, 128, 129, 1000):
+                    state = 123456789012345 % modulus
+                    self.assertEqual(
+                        backend.keystream(state, multiplier, length, modulus),
+                        PYTHON_BACKEND.keystream(state, multiplier, length, modulus)
+                    )
+
+    def test_multi_byte_extraction(self):
+        modulus = 10 ** 12
+        state = 123456789012 % modulus
+        for width in (1, 2, 3, 4):
+            steps = [state * pow(9973, i, modulus) % modulus for i in range(200)]
+            expected = b''.join((s % 256 ** width).to_bytes(width, 'little') for s in steps)
+            for length in (0, 1, 65, 199, 200):
+                for name in available_backends(modulus):
+                    backend = select_backend(modulus, name)
+                    self.assertEqual(backend.keystream(state, 9973, length, modulus, width),
+                                     expected[:length])
+
+    def test_uint64_binary_map(self):
+        backend = Uint64Backend(block_size=100)
+        state = 0x0123456789ABCDEF
+        steps = [state * pow(9973, i, BINARY_MODULUS) % BINARY_MODULUS for i in range(300)]
+        for width in range(1, 9):
+            # Top bytes of each state, most significant first
+            expected = b''.join((s >> (64 - 8 * width)).to_bytes(width, 'big') for s in steps)
+            for length in (0, 1, 99, 100, 101, 300):
+                self.assertEqual(backend.keystream(state, 9973, length, BINARY_MODULUS, width),
+                                 expected[:length])
+                self.assertEqual(PYTHON_BACKEND.keystream(state, 9973, length, BINARY_MODULUS, width),
+                                 expected[:length])
+        self.assertEqual(select_backend(BINARY_MODULUS).name, 'uint64')
+        self.assertNotIn('uint64', available_backends(10 ** 12))
+
+    @unittest.skipUnless(gmpy2 is not None, "gmpy2 not installed")
+    def test_gmpy2_matches_python(self):
+        backend = select_backend(10 ** 40, 'gmpy2')
+        for precision in (5, 20, 40):
+            modulus = 10 ** precision
+            state = 31415926535897932384626433832795 % modulus
+            self.assertEqual(
+                backend.keystream(state, 9973, 500, modulus),
+                PYTHON_BACKEND.keystream(state, 9973, 500, modulus)
+            )
+
+    def test_automatic_selection(self):
+        self.assertEqual(select_backend(10 ** 10).name, 'numpy')
+        self.assertIn(select_backend(10 ** 20).name, ('gmpy2', 'python'))
+        self.assertNotIn('numpy', available_backends(10 ** 20))
+        self.assertIn('python', available_backends())
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            select_backend(10 ** 10, 'cuda')
+        with self.assertRaises(ValueError):
+            select_backend(10 ** 20, 'numpy')
+
+    def test_ciphertext_identical_across_backends(self):
+        text = "Backends must agree byte for byte. " * 20
+        for precision in (10, 15, 20):
+            results = set()
+            for name in available_backends(10 ** precision):
+                encryptor = ChaosEncrypt(precision=precision, shared_secret="s",
+                                         chunk_size=256, backend=name)
+                ciphertext, mac = encryptor.encrypt(text)
+                self.assertEqual(encryptor.decrypt(ciphertext, mac), text)
+                results.add((ciphertext, mac))
+            self.assertEqual(len(results), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
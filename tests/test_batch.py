@@ -0,0 +1,124 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+from click.testing import CliRunner
+from src.chaosencrypt_cli import cli
+from src.batch import collect_jobs, load_completed, run_batch
+
+PARAMS = {'precision': 12, 'primes': [9973], 'chunk_size': 16, 'base_k': 6,
+          'dynamic_k': True, 'xor': True, 'mac': True}
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, 'plain')
+        os.makedirs(os.path.join(self.source, 'nested'))
+        self.files = {
+            'a.txt': "First file",
+            'b.txt': "Second file with ünïcödé",
+            os.path.join('nested', 'c.txt'): "Nested file " * 50,
+        }
+        for name, content in self.files.items():
+            with open(os.path.join(self.source, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        self.shared_secret = "test_secret"
+        self.runner = CliRunner()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_manifest(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_cli_round_trip(self):
+        encrypted = os.path.join(self.temp_dir, 'encrypted')
+        decrypted = os.path.join(self.temp_dir, 'decrypted')
+        result = self.runner.invoke(cli, [
+            'encrypt-batch', '--secret', self.shared_secret,
+            '--output-dir', encrypted, '--workers', '2', self.source
+        ])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('3 ok, 0 failed, 0 skipped', result.output)
+        entries = self._read_manifest(os.path.join(encrypted, 'results.jsonl'))
+        self.assertEqual(sorted(e['status'] for e in entries), ['ok'] * 3)
+
+        result = self.runner.invoke(cli, [
+            'decrypt-batch', '--secret', self.shared_secret,
+            '--output-dir', decrypted, os.path.join(encrypted, '**', '*.enc')
+        ])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('3 ok', result.output)
+        for content in self.files.values():
+            matches = [e for e in self._read_manifest(os.path.join(decrypted, 'results.jsonl'))
+                       if open(e['output'], encoding='utf-8').read() == content]
+            self.assertEqual(len(matches), 1)
+
+    def test_decrypt_batch_on_encrypt_batch_directory(self):
+        encrypted = os.path.join(self.temp_dir, 'encrypted')
+        decrypted = os.path.join(self.temp_dir, 'decrypted')
+        result = self.runner.invoke(cli, [
+            'encrypt-batch', '--secret', self.shared_secret, '--output-dir', encrypted, self.source
+        ])
+        self.assertIn('3 ok, 0 failed', result.output)
+        result = self.runner.invoke(cli, [
+            'decrypt-batch', '--secret', self.shared_secret, '--output-dir', decrypted, encrypted
+        ])
+        self.assertIn('Processed 3 files: 3 ok, 0 failed', result.output)
+        for name, content in self.files.items():
+            with open(os.path.join(decrypted, name), encoding='utf-8') as f:
+                self.assertEqual(f.read(), content)
+
+    def test_resume_skips_completed(self):
+        encrypted = os.path.join(self.temp_dir, 'encrypted')
+        results_path = os.path.join(encrypted, 'results.jsonl')
+        jobs = collect_jobs(self.source, encrypted, 'encrypt', PARAMS)
+        counts = run_batch(jobs[:2], self.shared_secret, 'encrypt', results_path)
+        self.assertEqual(counts['ok'], 2)
+        # Simulate a crash that tore the last manifest line
+        with open(results_path, 'a') as f:
+            f.write('{"input": ')
+
+        self.assertEqual(len(load_completed(results_path)), 2)
+        counts = run_batch(jobs, self.shared_secret, 'encrypt', results_path, resume=True)
+        self.assertEqual(counts, {'ok': 1, 'error': 0, 'skipped': 2})
+        # The torn line was dropped rather than glued onto the new record
+        self.assertEqual(len(self._read_manifest(results_path)), 3)
+        self.assertEqual(len(load_completed(results_path)), 3)
+
+    def test_manifest_source_with_overrides(self):
+        manifest = os.path.join(self.temp_dir, 'jobs.jsonl')
+        output = os.path.join(self.temp_dir, 'out', 'custom.enc')
+        with open(manifest, 'w') as f:
+            f.write(json.dumps({'input': os.path.join(self.source, 'a.txt'), 'output': output,
+                                'primes': [9973, 9967]}) + '\n')
+            f.write(json.dumps({'input': os.path.join(self.source, 'missing.txt')}) + '\n')
+        jobs = collect_jobs(manifest, os.path.join(self.temp_dir, 'out'), 'encrypt', PARAMS)
+        self.assertEqual(jobs[0]['params']['primes'], [9973, 9967])
+        self.assertEqual(jobs[0]['output'], output)
+
+        counts = run_batch(jobs, self.shared_secret, 'encrypt', os.path.join(self.temp_dir, 'results.jsonl'))
+        self.assertEqual(counts, {'ok': 1, 'error': 1, 'skipped': 0})
+        self.assertTrue(os.path.exists(output + '.mac'))
+
+    def test_invalid_entry_with_pad_pools(self):
+        manifest = os.path.join(self.temp_dir, 'jobs.jsonl')
+        with open(manifest, 'w') as f:
+            f.write(json.dumps({'input': os.path.join(self.source, 'a.txt'), 'chunk_size': 0}) + '\n')
+            f.write(json.dumps({'input': os.path.join(self.source, 'b.txt')}) + '\n')
+        jobs = collect_jobs(manifest, os.path.join(self.temp_dir, 'out'), 'encrypt', PARAMS)
+        results_path = os.path.join(self.temp_dir, 'results.jsonl')
+        counts = run_batch(jobs, self.shared_secret, 'encrypt', results_path, pad_chunks=8)
+        self.assertEqual(counts, {'ok': 1, 'error': 1, 'skipped': 0})
+        errors = [e for e in self._read_manifest(results_path) if e['status'] == 'error']
+        self.assertEqual(errors[0]['input'], os.path.join(self.source, 'a.txt'))
+
+    def test_invalid_source(self):
+        with self.assertRaises(ValueError):
+            collect_jobs(os.path.join(self.temp_dir, 'nope'), self.temp_dir, 'encrypt', PARAMS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -60,6 +60,39 @@ class TestChaosEncrypt(unittest.TestCase):
         keystream = self.encryptor.generate_keystream(10, 123, 5)
         self.assertEqual(len(keystream), 10)
 
+    def test_keystream_jump_ahead(self):
+        # Starting at an offset matches slicing a longer keystream
+        keystream = self.encryptor.generate_keystream(300, 123, 5)
+        self.assertEqual(self.encryptor.generate_keystream(100, 123, 5, offset=200), keystream[200:])
+
+    def test_large_chunks(self):
+        with patch('src.core.SUB_CHUNK_SIZE', 1000):
+            encryptor = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=5000, framing='compact')
+            plaintext = "Large chunk payload. " * 600
+            ciphertext, mac = encryptor.encrypt(plaintext)
+            self.assertEqual(encryptor.decrypt(ciphertext, mac), plaintext)
+            # Sub-chunked keystream equals one continuous keystream per chunk
+            seed, k = encryptor.derive_seed(0), encryptor.derive_k(0)
+            data = plaintext.encode('utf-8')[:5000]
+            keystream = encryptor.generate_keystream(5000, seed, k)
+            self.assertEqual(encryptor.encrypt_chunk(data, 0), bytes(a ^ b for a, b in zip(data, keystream)))
+
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=70000)
+
+    def test_chunk_length_starting_with_compact_magic(self):
+        # A 52800-byte chunk's length field would start with 0xCE, the
+        # compact MAGIC; only compact framing may carry it
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=52800)
+        data = b'a' * 52800
+        encryptor = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=52800, framing='compact')
+        self.assertEqual(encryptor.decrypt_bytes(*encryptor.encrypt_bytes(data)), data)
+        encryptor = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=1024)
+        ciphertext, mac = encryptor.encrypt_bytes(data)
+        self.assertLess(ciphertext[0], 0xCE)
+        self.assertEqual(encryptor.decrypt_bytes(ciphertext, mac), data)
+
     def test_encrypt_decrypt(self):
         # Test encryption and decryption
         decrypted_message = self.encryptor.decrypt(self.ciphertext, self.mac)
@@ -71,6 +104,54 @@ class TestChaosEncrypt(unittest.TestCase):
         decrypted_message = encryptor_no_mac.decrypt(ciphertext, mac)
         self.assertEqual(decrypted_message, self.plaintext)
 
+    def test_encrypt_decrypt_bytes(self):
+        # Test binary payloads, including invalid UTF-8
+        data = bytes(range(256)) * 3
+        for framing in ('length', 'compact'):
+            encryptor = ChaosEncrypt(shared_secret=self.shared_secret, framing=framing)
+            ciphertext, mac = encryptor.encrypt_bytes(data)
+            self.assertEqual(encryptor.decrypt_bytes(ciphertext, mac), data)
+            self.assertEqual(encryptor.encrypt_bytes(bytearray(data)), (ciphertext, mac))
+            self.assertEqual(encryptor.encrypt_bytes(memoryview(data)), (ciphertext, mac))
+            with self.assertRaises(ValueError):
+                encryptor.decrypt(ciphertext, mac)
+
+        # Text ciphertexts decrypt to their UTF-8 encoding
+        self.assertEqual(self.encryptor.decrypt_bytes(self.ciphertext, self.mac), self.plaintext.encode('utf-8'))
+
+    def test_semantic_chunking(self):
+        # Chunks are lossless, bounded, and end on token boundaries
+        text = "Hello,  wörld!\n\tSupercalifragilisticexpialidocious tokens… ünïcödé 123"
+        for chunk_size in (1, 4, 8, 16, 1024):
+            encryptor = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=chunk_size)
+            chunks = encryptor._split_into_chunks(text)
+            self.assertEqual(''.join(chunks), text)
+            self.assertTrue(all(0 < len(c.encode('utf-8')) <= max(chunk_size, 4) for c in chunks))
+            ciphertext, mac = encryptor.encrypt(text)
+            self.assertEqual(encryptor.decrypt(ciphertext, mac), text)
+
+        encryptor = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=8)
+        self.assertEqual(encryptor._split_into_chunks("ab cd, efghijklmnop q"),
+                         ["ab cd, ", "efghijkl", "mnop q"])
+
+        # The constructor argument is honoured and chunks are produced lazily
+        plain = ChaosEncrypt(shared_secret=self.shared_secret, chunk_size=8, use_semantic_chunking=False)
+        self.assertEqual(plain._split_into_chunks("ab cd, efghijklmnop q"),
+                         ["ab cd, e", "fghijklm", "nop q"])
+        chunks = encryptor.iter_chunks("word " * 10 ** 6)
+        self.assertEqual(next(chunks), "word ")
+
+    def test_ascii_semantic_fast_path(self):
+        # The ASCII boundary scan must agree with the token walk
+        import random
+        rng = random.Random(0)
+        alphabet = [chr(i) for i in range(128)]
+        for _ in range(500):
+            encryptor = ChaosEncrypt(chunk_size=rng.choice([1, 2, 5, 16, 33]))
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+            self.assertEqual(list(encryptor._iter_ascii_token_chunks(text)),
+                             list(encryptor._iter_token_chunks(text)))
+
     def test_decrypt_mac_fail(self):
         # Test MAC verification failure during decryption
         incorrect_mac = (self.mac + 1) % (int("1" + "0" * 64 + "67"))
@@ -197,6 +278,35 @@ class TestCliFunctions(unittest.TestCase):
         # Clean up
         os.remove(self.temp_output_file.name + '.decrypted')
 
+    def test_binary_cli_file(self):
+        # Test binary encrypt/decrypt through files
+        data = bytes(range(256)) * 4
+        with open(self.temp_input_file.name, 'wb') as f:
+            f.write(data)
+        result = self.runner.invoke(cli, [
+            'encrypt',
+            '--secret', self.shared_secret,
+            '--binary',
+            '--input-file', self.temp_input_file.name,
+            '--output-file', self.temp_output_file.name
+        ])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Success: Encrypted data written', result.output)
+
+        decrypted_file = self.temp_output_file.name + '.decrypted'
+        result = self.runner.invoke(cli, [
+            'decrypt',
+            '--secret', self.shared_secret,
+            '--binary',
+            '--input-file', self.temp_output_file.name,
+            '--output-file', decrypted_file
+        ])
+        self.assertEqual(result.exit_code, 0)
+        with open(decrypted_file, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        os.remove(decrypted_file)
+        os.remove(self.temp_output_file.name + '.mac')
+
     def test_decrypt_cli_message_and_file(self):
         # Test that providing both ciphertext and input file raises error
         result = self.runner.invoke(cli, [
@@ -241,6 +351,13 @@ class TestCliFunctions(unittest.TestCase):
         with self.assertRaises(ValueError):
             validate_input(precision=12, primes=[9973], secret="test_secret", chunk_size=-1, base_k=6, mac_value=None)
 
+        # Test large chunks with compact framing
+        validate_input(precision=12, primes=[9973], secret="test_secret", chunk_size=4 * 1024 * 1024, base_k=6, framing='compact')
+        with self.assertRaises(ValueError):
+            validate_input(precision=12, primes=[9973], secret="test_secret", chunk_size=4 * 1024 * 1024, base_k=6)
+        with self.assertRaises(ValueError):
+            validate_input(precision=12, primes=[9973], secret="test_secret", chunk_size=16 * 1024 * 1024, base_k=6, framing='compact')
+
         # Test invalid base k
         with self.assertRaises(ValueError):
             validate_input(precision=12, primes=[9973], secret="test_secret", chunk_size=16, base_k=0, mac_value=None)
@@ -0,0 +1,215 @@
+import unittest
+import tempfile
+import shutil
+import random
+import json
+import io
+import os
+from unittest import mock
+import numpy as np
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.chunk_store import DATA_FILE, MANIFEST_FILE, ChunkStore, cut_points, gear_hashes, gear_table, iter_chunks
+
+SIZES = {'min_size': 1024, 'avg_size': 4096, 'max_size': 16384}
+
+
+class TestContentDefinedChunking(unittest.TestCase):
+    def setUp(self):
+        self.encryptor = ChaosEncrypt(shared_secret="cdc_secret")
+        self.table = gear_table(self.encryptor)
+        self.data = random.Random(7).randbytes(200000)
+
+    def test_gear_hash_matches_rolling_definition(self):
+        data = self.data[:3000]
+        h = 0
+        expected = []
+        for byte in data:
+            h = ((h << 1) + int(self.table[byte])) & 0xFFFFFFFFFFFFFFFF
+            expected.append(h)
+        np.testing.assert_array_equal(gear_hashes(data, self.table), np.array(expected, dtype=np.uint64))
+
+    def test_table_is_keyed(self):
+        other = gear_table(ChaosEncrypt(shared_secret="other"))
+        self.assertFalse((self.table == other).any())
+
+    def test_chunk_sizes(self):
+        cuts = cut_points(self.data, self.table, **SIZES)
+        self.assertEqual(cuts[-1], len(self.data))
+        sizes = np.diff([0] + cuts)
+        self.assertTrue((sizes[:-1] >= 1024).all() and (sizes <= 16384).all())
+
+    def test_streaming_matches_whole_input(self):
+        chunks = list(iter_chunks(io.BytesIO(self.data), self.table, **SIZES))
+        self.assertEqual(b''.join(chunks), self.data)
+        self.assertEqual(np.cumsum([len(c) for c in chunks]).tolist(), cut_points(self.data, self.table, **SIZES))
+
+    def test_boundaries_resynchronise_after_edit(self):
+        edited = self.data[:50000] + b'edit' + self.data[50000:]
+        old = set(cut_points(self.data, self.table, **SIZES))
+        new = set(cut - 4 for cut in cut_points(edited, self.table, **SIZES) if cut > 50004)
+        self.assertGreaterEqual(len(new & old), len(new) - 2)
+
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'store')
+        self.encryptor = ChaosEncrypt(shared_secret="cdc_secret")
+        self.rng = random.Random(11)
+        self.data = bytearray(self.rng.randbytes(300000))
+        self.store = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.store.write(bytes(self.data))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _fresh_lengths(self):
+        return [len(c) for c in iter_chunks(io.BytesIO(bytes(self.data)), self.store.table, **SIZES)]
+
+    def test_round_trip(self):
+        self.assertEqual(self.store.read(), bytes(self.data))
+        self.assertEqual(self.store.read(1000, 20000), bytes(self.data[1000:21000]))
+        reopened = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.assertEqual(reopened.read(), bytes(self.data))
+        self.assertTrue(reopened.verify())
+
+    def test_edits_touch_only_nearby_chunks(self):
+        for _ in range(60):
+            offset = self.rng.randrange(len(self.data) + 1)
+            delete = self.rng.randrange(min(len(self.data) - offset, 200) + 1)
+            insert = self.rng.randbytes(self.rng.randrange(300))
+            before = {chunk[0] for chunk in self.store.chunks}
+            stats = self.store.edit(offset, delete, insert)
+            self.data[offset:offset + delete] = insert
+            self.assertLessEqual(stats['encrypted'], 4)
+            self.assertGreaterEqual(len(before & {chunk[0] for chunk in self.store.chunks}),
+                                    len(self.store.chunks) - 4)
+        self.assertEqual([chunk[2] for chunk in self.store.chunks], self._fresh_lengths())
+        self.assertEqual(self.store.read(), bytes(self.data))
+
+    def test_edit_at_both_ends(self):
+        self.store.edit(0, 0, b'head')
+        self.store.edit(len(self.store), 0, b'tail')
+        self.store.edit(10, 5)
+        self.data[:0] = b'head'
+        self.data += b'tail'
+        del self.data[10:15]
+        self.assertEqual(self.store.read(), bytes(self.data))
+
+    def test_edit_outside_plaintext(self):
+        with self.assertRaises(ValueError):
+            self.store.edit(len(self.data), 1)
+
+    def test_write_reuses_unchanged_chunks(self):
+        self.data[150000:150003] = b'new'
+        stats = self.store.write(bytes(self.data))
+        self.assertLessEqual(stats['encrypted'], 2)
+        self.assertEqual(self.store.read(), bytes(self.data))
+
+    def test_chunk_ids_are_never_reused(self):
+        ids = {chunk[0] for chunk in self.store.chunks}
+        self.store.edit(100000, 10, b'replacement')
+        new_ids = {chunk[0] for chunk in self.store.chunks} - ids
+        self.assertTrue(new_ids)
+        self.assertGreater(min(new_ids), max(ids))
+
+    def test_compact(self):
+        self.store.edit(100000, 10, b'replacement')
+        self.assertGreater(self.store.dead_bytes, 0)
+        self.store.compact()
+        self.assertEqual(self.store.dead_bytes, 0)
+        self.assertEqual(os.path.getsize(self.store.data_path), len(self.data) - 10 + 11)
+        reopened = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.data[100000:100010] = b'replacement'
+        self.assertEqual(reopened.read(), bytes(self.data))
+
+    def test_interrupted_compact_keeps_the_store_readable(self):
+        self.store.edit(100000, 10, b'replacement')
+        self.data[100000:100010] = b'replacement'
+        # Crash before the manifest naming the compacted file is committed
+        with mock.patch.object(ChunkStore, '_write_manifest', side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                self.store.compact()
+        reopened = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.assertEqual(reopened.read(), bytes(self.data))
+        self.assertEqual(sorted(os.listdir(self.path)), [DATA_FILE, MANIFEST_FILE])
+        # Crash after the commit, before the old file is deleted
+        with mock.patch('src.chunk_store.os.unlink', side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                reopened.compact()
+        reopened = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.assertEqual(reopened.read(), bytes(self.data))
+        self.assertEqual(reopened.dead_bytes, 0)
+        self.assertEqual(len(os.listdir(self.path)), 2)
+
+    def test_tampering_is_detected(self):
+        entry = self.store.chunks[3]
+        with open(self.store.data_path, 'r+b') as f:
+            f.seek(entry[1])
+            byte = f.read(1)
+            f.seek(entry[1])
+            f.write(bytes([byte[0] ^ 1]))
+        self.assertFalse(self.store.verify())
+        with self.assertRaises(ValueError):
+            self.store.read()
+
+    def test_manifest_tampering_is_detected(self):
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['chunks'][1], manifest['chunks'][2] = manifest['chunks'][2], manifest['chunks'][1]
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        with self.assertRaises(ValueError):
+            ChunkStore(self.path, self.encryptor, **SIZES)
+
+    def test_interrupted_update_is_rolled_back(self):
+        size = os.path.getsize(self.store.data_path)
+        with open(self.store.data_path, 'ab') as f:
+            f.write(b'uncommitted')
+        reopened = ChunkStore(self.path, self.encryptor, **SIZES)
+        self.assertEqual(os.path.getsize(self.store.data_path), size)
+        self.assertEqual(reopened.read(), bytes(self.data))
+
+    def test_parameters_are_checked(self):
+        with self.assertRaises(ValueError):
+            ChunkStore(self.path, self.encryptor, min_size=1024, avg_size=8192, max_size=16384)
+        with self.assertRaises(ValueError):
+            ChunkStore(self.path, ChaosEncrypt(shared_secret="wrong"), **SIZES)
+        with self.assertRaises(ValueError):
+            ChunkStore(os.path.join(self.temp_dir, 'other'), self.encryptor, min_size=32)
+        with self.assertRaises(ValueError):
+            ChunkStore(os.path.join(self.temp_dir, 'other'), ChaosEncrypt(shared_secret="s", use_xor=False))
+
+    def test_without_mac(self):
+        encryptor = ChaosEncrypt(shared_secret="cdc_secret", use_mac=False)
+        store = ChunkStore(os.path.join(self.temp_dir, 'nomac'), encryptor, **SIZES)
+        store.write(bytes(self.data))
+        store.edit(5, 5, b'abc')
+        self.data[5:10] = b'abc'
+        self.assertEqual(ChunkStore(store.path, encryptor, **SIZES).read(), bytes(self.data))
+
+    def test_cli_round_trip(self):
+        runner = CliRunner()
+        input_path = os.path.join(self.temp_dir, 'input.bin')
+        output_path = os.path.join(self.temp_dir, 'output.bin')
+        store_path = os.path.join(self.temp_dir, 'cli_store')
+        options = ['--secret', 'cli_secret', '--min-size', '1024', '--avg-size', '4096', '--max-size', '16384']
+        with open(input_path, 'wb') as f:
+            f.write(self.data)
+        result = runner.invoke(cli, ['encrypt-cdc', *options, store_path, input_path])
+        self.assertIn('0 unchanged', result.output)
+        with open(input_path, 'r+b') as f:
+            f.seek(123456)
+            f.write(b'changed')
+        result = runner.invoke(cli, ['encrypt-cdc', *options, store_path, input_path])
+        self.assertIn('1 encrypted', result.output)
+        result = runner.invoke(cli, ['decrypt-cdc', *options, store_path, output_path])
+        self.assertIn('Success', result.output)
+        with open(input_path, 'rb') as f, open(output_path, 'rb') as g:
+            self.assertEqual(f.read(), g.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import asyncio
+import os
+from click.testing import CliRunner
+from src.async_api import AsyncChaosEncrypt
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.compression import (CODECS, choose_codec, iter_blocks, iter_compress, iter_decompress,
+                             rechunk)
+
+LOG = ''.join(f"2025-03-{i % 28 + 1:02d} 12:{i % 60:02d}:00 INFO worker-{i % 7} "
+              f"request {i} served in {i % 97} ms\n" for i in range(5000))
+
+class TestCompression(unittest.TestCase):
+    def test_round_trip_each_codec(self):
+        legacy = ChaosEncrypt(shared_secret="zip_secret", framing='compact', chunk_size=1024)
+        for codec in CODECS:
+            encryptor = ChaosEncrypt(shared_secret="zip_secret", framing='compact', chunk_size=1024,
+                                     compression=codec)
+            ciphertext, mac = encryptor.encrypt(LOG)
+            self.assertEqual(encryptor.ciphertext_codec(ciphertext), codec)
+            self.assertLess(len(ciphertext) * 5, len(LOG))
+            self.assertEqual(encryptor.decrypt(ciphertext, mac), LOG)
+            # The header records the codec, so any engine reverses it
+            self.assertEqual(legacy.decrypt(ciphertext), LOG)
+            data = LOG.encode() + bytes(range(256))
+            self.assertEqual(legacy.decrypt_bytes(encryptor.encrypt_bytes(data)[0]), data)
+
+    def test_auto(self):
+        self.assertIn(choose_codec(LOG.encode()), CODECS)
+        self.assertIsNone(choose_codec(os.urandom(100000)))
+        self.assertIsNone(choose_codec(b''))
+        encryptor = ChaosEncrypt(shared_secret="zip_secret", framing='compact', compression='auto')
+        ciphertext, _ = encryptor.encrypt_bytes(os.urandom(5000))
+        self.assertIsNone(encryptor.ciphertext_codec(ciphertext))
+        self.assertEqual(encryptor.decrypt(encryptor.encrypt(LOG)[0]), LOG)
+        self.assertEqual(encryptor.decrypt(encryptor.encrypt('')[0]), '')
+
+    def test_streaming(self):
+        data = LOG.encode() * 4
+        pieces = list(iter_compress(iter_blocks(data, 4096), 'zlib'))
+        self.assertGreater(len(pieces), 1)
+        chunks = list(rechunk(pieces, 1000))
+        self.assertTrue(all(len(chunk) == 1000 for chunk in chunks[:-1]))
+        self.assertEqual(b''.join(iter_decompress(chunks, 'zlib')), data)
+
+    def test_corrupt_streams(self):
+        for codec in CODECS:
+            stream = b''.join(iter_compress([LOG.encode()], codec))
+            with self.assertRaises(ValueError):
+                b''.join(iter_decompress([stream[:-5]], codec))
+            with self.assertRaises(ValueError):
+                b''.join(iter_decompress([stream, b'extra'], codec))
+            with self.assertRaises(ValueError):
+                b''.join(iter_decompress([b'\x00' * 20 + stream], codec))
+
+    def test_requires_compact_framing(self):
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret="zip_secret", compression='zlib')
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret="zip_secret", framing='compact', compression='zstd')
+
+    def test_async(self):
+        encryptor = ChaosEncrypt(shared_secret="zip_secret", framing='compact', compression='bz2')
+
+        async def run():
+            async_encryptor = AsyncChaosEncrypt(encryptor)
+            ciphertext, mac = await async_encryptor.encrypt(LOG)
+            return await async_encryptor.decrypt(ciphertext, mac)
+        self.assertEqual(asyncio.run(run()), LOG)
+
+    def test_cli(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['encrypt', '--secret', 'zip_secret', '--framing', 'compact',
+                                     '--compress', 'zlib', LOG[:2000]])
+        output_lines = result.output.split('\n')
+        self.assertTrue(output_lines[1].startswith('ce0110'))
+        result = runner.invoke(cli, ['decrypt', '--secret', 'zip_secret',
+                                     '--mac-value', output_lines[-2], output_lines[1]])
+        self.assertIn(LOG[:2000], result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
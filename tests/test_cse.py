@@ -0,0 +1,119 @@
+import unittest
+import tempfile
+import shutil
+import csv
+import os
+import numpy as np
+from unittest.mock import patch
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.cse import (
+    block_rows, ciphertext_window, cosine_similarity, iter_similarity_blocks,
+    read_corpus, run_cse, vectorize
+)
+
+PARAMS = {'precision': 12, 'primes': [9973], 'chunk_size': 16, 'base_k': 6,
+          'dynamic_k': True, 'xor': True, 'mac': False}
+TEXTS = [
+    "The quantum computer achieved superposition.",
+    "Cosmic radiation affected the quantum processor.",
+    "Bananas are yellow.",
+    "",
+    "The spacecraft entered orbit around the distant moon after a long journey.",
+]
+
+class TestCse(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_window_is_ciphertext_prefix(self):
+        encryptor = ChaosEncrypt(shared_secret="cse_secret", chunk_size=16)
+        for text in TEXTS:
+            ciphertext, _ = encryptor.encrypt(text)
+            payload = b''.join(encryptor.iter_frames(ciphertext))
+            self.assertEqual(ciphertext_window(encryptor, text), payload[:64])
+
+    def test_vectors_are_zero_padded(self):
+        vectors = vectorize(TEXTS, PARAMS, "cse_secret", window=64)
+        self.assertEqual(vectors.shape, (len(TEXTS), 64))
+        self.assertFalse(vectors[2, len(TEXTS[2]):].any())
+        self.assertFalse(vectors[3].any())
+        with patch('src.cse.TEXTS_PER_TASK', 2):
+            np.testing.assert_array_equal(vectorize(TEXTS, PARAMS, "cse_secret", workers=2), vectors)
+
+    def test_blocked_matches_direct(self):
+        vectors = np.random.default_rng(0).integers(0, 256, size=(301, 64)).astype(np.float64)
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = unit @ unit.T
+        for budget, workers in ((1 << 30, 1), (4096, 1), (1 << 14, 3)):
+            np.testing.assert_allclose(cosine_similarity(vectors, budget, workers), expected, atol=1e-12)
+
+    def test_block_rows_respect_budget(self):
+        self.assertEqual(block_rows(1000, 1000 * 8 * 2 * 10, workers=1), 10)
+        self.assertEqual(block_rows(1000, 1, workers=4), 1)
+        self.assertEqual(block_rows(10, 1 << 30), 10)
+        with self.assertRaises(ValueError):
+            block_rows(10, 0)
+        vectors = np.ones((100, 8))
+        sizes = [len(block) for _, block in iter_similarity_blocks(vectors, 100 * 8 * 2 * 7)]
+        self.assertEqual(sizes, [7] * 14 + [2])
+
+    def test_csv_format(self):
+        output = os.path.join(self.temp_dir, 'matrix.csv')
+        self.assertEqual(run_cse(TEXTS, PARAMS, "cse_secret", output, memory_budget=4096), len(TEXTS))
+        with open(output, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], [''] + [f'S{i}' for i in range(len(TEXTS))])
+        self.assertEqual([row[0] for row in rows[1:]], [f'S{i}' for i in range(len(TEXTS))])
+        matrix = np.array([[float(v) for v in row[1:]] for row in rows[1:]])
+        expected = cosine_similarity(vectorize(TEXTS, PARAMS, "cse_secret"))
+        np.testing.assert_array_equal(matrix, expected)
+        self.assertAlmostEqual(matrix[0, 0], 1.0)
+        self.assertEqual(matrix[3, 3], 0.0)
+
+    def test_npy_output(self):
+        output = os.path.join(self.temp_dir, 'matrix.npy')
+        vectors_path = os.path.join(self.temp_dir, 'vectors.npy')
+        run_cse(TEXTS, PARAMS, "cse_secret", output, workers=2, vectors_path=vectors_path)
+        vectors = np.load(vectors_path)
+        self.assertEqual(vectors.dtype, np.uint8)
+        np.testing.assert_allclose(np.load(output), cosine_similarity(vectors.astype(np.float64)),
+                                   atol=1e-12)
+        with self.assertRaises(ValueError):
+            run_cse(TEXTS, PARAMS, "cse_secret", os.path.join(self.temp_dir, 'matrix.txt'))
+
+    def test_read_corpus(self):
+        path = os.path.join(self.temp_dir, 'corpus.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("first\nsecond ünïcödé\n")
+        self.assertEqual(read_corpus(path), ["first", "second ünïcödé"])
+        corpus_dir = os.path.join(self.temp_dir, 'docs')
+        os.makedirs(os.path.join(corpus_dir, 'sub'))
+        for name, text in (('b.txt', 'bee'), ('a.txt', 'ay\nmore'), ('sub/c.txt', 'sea')):
+            with open(os.path.join(corpus_dir, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.assertEqual(read_corpus(corpus_dir), ['ay\nmore', 'bee', 'sea'])
+
+    def test_cli(self):
+        corpus = os.path.join(self.temp_dir, 'corpus.txt')
+        with open(corpus, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(TEXTS[:3]) + '\n')
+        output = os.path.join(self.temp_dir, 'matrix.csv')
+        runner = CliRunner()
+        result = runner.invoke(cli, ['cse', '--secret', 'cse_secret', '--workers', '1',
+                                     '--output', output, corpus])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('3 texts', result.output)
+        with open(output) as f:
+            self.assertEqual(f.readline().strip(), ',S0,S1,S2')
+
+        result = runner.invoke(cli, ['cse', '--secret', 'cse_secret', '--memory-budget', '0',
+                                     '--output', output, corpus])
+        self.assertIn('Memory budget must be positive', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
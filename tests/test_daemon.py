@@ -0,0 +1,145 @@
+import unittest
+import tempfile
+import threading
+import socket
+import os
+import json
+from unittest import mock
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.daemon import SOCKET_NAME, ChaosEncryptServer, DaemonClient, default_socket_path, encode_config
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, 'chaosencrypt.sock')
+        self.server = ChaosEncryptServer(self.socket_path, max_engines=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.shared_secret = "test_secret"
+        self.config = encode_config(secret=self.shared_secret)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.rmdir(self.temp_dir)
+
+    def test_round_trip_matches_library(self):
+        plaintext = "This is a test message."
+        with DaemonClient(self.socket_path) as client:
+            ciphertext, mac = client.encrypt(self.config, plaintext)
+            self.assertEqual((ciphertext, mac), ChaosEncrypt(shared_secret=self.shared_secret).encrypt(plaintext))
+            self.assertEqual(client.decrypt(self.config, ciphertext, mac), plaintext)
+
+    def test_pipelined_requests(self):
+        messages = [f"message number {i}" for i in range(100)]
+        with DaemonClient(self.socket_path) as client:
+            results = client.encrypt_many(self.config, messages, window=16)
+            self.assertEqual(client.decrypt_many(self.config, results), messages)
+
+    def test_errors_are_reported(self):
+        with DaemonClient(self.socket_path) as client:
+            ciphertext, mac = client.encrypt(self.config, "Test message")
+            with self.assertRaises(ValueError):
+                client.decrypt(self.config, ciphertext, mac + 1)
+            with self.assertRaises(ValueError):
+                client.encrypt(encode_config(secret=""), "Test message")
+            # The connection stays usable after an error
+            self.assertEqual(client.decrypt(self.config, ciphertext, mac), "Test message")
+
+    def test_pipelined_error_keeps_connection_in_step(self):
+        messages = [f"message number {i}" for i in range(10)]
+        with DaemonClient(self.socket_path) as client:
+            items = client.encrypt_many(self.config, messages)
+            items[4] = (items[4][0], items[4][1] + 1)
+            with self.assertRaises(ValueError):
+                client.decrypt_many(self.config, items, window=8)
+            self.assertEqual(client.encrypt(self.config, "zzz"), ChaosEncrypt(shared_secret=self.shared_secret).encrypt("zzz"))
+
+    def test_socket_path_is_checked(self):
+        with self.assertRaises(ValueError):
+            ChaosEncryptServer(self.socket_path)
+        notes = os.path.join(self.temp_dir, 'notes.txt')
+        with open(notes, 'w') as f:
+            f.write('keep me')
+        with self.assertRaises(ValueError):
+            ChaosEncryptServer(notes)
+        with open(notes) as f:
+            self.assertEqual(f.read(), 'keep me')
+        os.unlink(notes)
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.temp_dir, 'stale.sock')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = ChaosEncryptServer(path)
+        server.server_close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_default_socket_path_is_private(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': '/run/user/1000'}, clear=True):
+            self.assertEqual(default_socket_path(), os.path.join('/run/user/1000', SOCKET_NAME))
+        with mock.patch.dict(os.environ, {}, clear=True), \
+                mock.patch('tempfile.gettempdir', return_value=self.temp_dir):
+            path = default_socket_path()
+            self.assertEqual(os.path.dirname(path), os.path.join(self.temp_dir, f"chaosencrypt-{os.getuid()}"))
+            server = ChaosEncryptServer(path)
+            server.server_close()
+            self.assertEqual(os.stat(os.path.dirname(path)).st_mode & 0o777, 0o700)
+            os.chmod(os.path.dirname(path), 0o755)
+            with self.assertRaises(ValueError):
+                ChaosEncryptServer(path)
+            os.rmdir(os.path.dirname(path))
+
+    def test_client_refuses_foreign_socket(self):
+        with mock.patch('src.daemon.os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(PermissionError):
+                DaemonClient(self.socket_path)
+
+    def test_malformed_requests(self):
+        params = json.loads(self.config)
+        configs = [b'[]', b'null', b'"text"', json.dumps(dict(params, primes=5)).encode(),
+                   json.dumps(dict(params, precision=None)).encode(), json.dumps(dict(params, chunk_size=[1])).encode()]
+        with DaemonClient(self.socket_path) as client:
+            ciphertext, mac = client.encrypt(self.config, "Test message")
+            for config in configs:
+                with self.assertRaises(ValueError):
+                    client.encrypt(config, "Test message")
+            for bad_mac in (-1, 1 << 256):
+                with self.assertRaises(ValueError):
+                    client.decrypt(self.config, ciphertext, bad_mac)
+            self.assertEqual(client.decrypt(self.config, ciphertext, mac), "Test message")
+
+    def test_engine_cache_is_bounded(self):
+        with DaemonClient(self.socket_path) as client:
+            for secret in ("a", "b", "c"):
+                client.encrypt(encode_config(secret=secret), "Test message")
+        self.assertEqual(len(self.server.engines._engines), 2)
+
+    def test_cli_socket_mode(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            'encrypt',
+            '--secret', self.shared_secret,
+            '--socket', self.socket_path,
+            'Test message'
+        ])
+        self.assertEqual(result.exit_code, 0)
+        output_lines = result.output.split('\n')
+        ciphertext = output_lines[1]
+        mac = output_lines[-2]
+
+        result = runner.invoke(cli, [
+            'decrypt',
+            '--secret', self.shared_secret,
+            '--socket', self.socket_path,
+            '--mac-value', mac,
+            ciphertext
+        ])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Decrypted message:\nTest message\n', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+import random
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.framing import (decode_varint, encode_varint, pack_compact, pack_header, pack_lengths,
+                         split_compact, unpack_lengths, FLAG_BINARY_MAP, MAGIC)
+
+class TestFraming(unittest.TestCase):
+    def setUp(self):
+        self.shared_secret = "test_secret"
+        self.plaintext = "Grüße aus dem Chaos — 混沌. This is a test message. " * 20
+
+    def test_varint_round_trip(self):
+        for value in [0, 1, 127, 128, 300, 2 ** 32, 2 ** 70]:
+            encoded = encode_varint(value)
+            self.assertEqual(decode_varint(encoded + b'\xff', 0), (value, len(encoded)))
+        with self.assertRaises(ValueError):
+            encode_varint(-1)
+        with self.assertRaises(ValueError):
+            decode_varint(b'\x80', 0)
+
+    def test_length_table_round_trip(self):
+        rng = random.Random(0)
+        cases = [[], [5], [16, 16, 16, 3], [16, 15, 13, 16, 1], [0, 2, 0]]
+        cases.append([rng.randint(1, 1024) for _ in range(500)])
+        for lengths in cases:
+            table = pack_lengths(lengths)
+            unpacked, offset = unpack_lengths(table + bytes(sum(lengths)), 0)
+            self.assertEqual(unpacked.tolist(), lengths)
+            self.assertEqual(offset, len(table))
+
+    def test_ascii_text_has_no_per_chunk_overhead(self):
+        table = pack_lengths([16] * 1000 + [7])
+        self.assertLess(len(table), 8)
+
+    def test_split_compact(self):
+        chunks = [b'abc', b'', b'defgh', b'i']
+        flags, views = split_compact(pack_compact(chunks))
+        self.assertEqual(flags, 0)
+        self.assertEqual([bytes(v) for v in views], chunks)
+
+    def test_malformed_ciphertexts(self):
+        ciphertext = pack_compact([b'abc', b'def'])
+        with self.assertRaises(ValueError):
+            split_compact(ciphertext[:-1])
+        with self.assertRaises(ValueError):
+            split_compact(bytes([MAGIC, 99, 0]) + ciphertext[3:])
+        with self.assertRaises(ValueError):
+            split_compact(pack_header(flags=1 << 20) + ciphertext[3:])
+
+    def test_malformed_length_tables(self):
+        encryptor = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact')
+        header = pack_header()
+        tables = [
+            encode_varint(2 ** 40) + encode_varint(1) + encode_varint(1) + b'\x00',   # huge count
+            encode_varint(2 ** 70) + encode_varint(1) + encode_varint(1) + b'\x00',   # beyond int64
+            encode_varint(3) + encode_varint(2 ** 70) + encode_varint(1) + b'\x00',   # huge length
+            encode_varint(3) + encode_varint(4) + encode_varint(1) + b'\xff',         # bad width
+            encode_varint(3) + encode_varint(4) + encode_varint(1) + b'\x00',         # payload too short
+        ]
+        for table in tables:
+            with self.assertRaises(ValueError):
+                encryptor.decrypt_bytes(header + table + b'abcd')
+            with self.assertRaises(ValueError):
+                split_compact(header + table + b'abcd')
+
+    def test_compact_round_trip(self):
+        compact = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact')
+        legacy = ChaosEncrypt(shared_secret=self.shared_secret)
+        ciphertext, mac = compact.encrypt(self.plaintext)
+        legacy_ciphertext, _ = legacy.encrypt(self.plaintext)
+
+        self.assertEqual(compact.decrypt(ciphertext, mac), self.plaintext)
+        # Either engine reads either framing
+        self.assertEqual(legacy.decrypt(ciphertext, mac), self.plaintext)
+        self.assertEqual(compact.decrypt(legacy_ciphertext), self.plaintext)
+        # Each chunk saves at least one of its two length bytes
+        n_chunks = len(legacy._split_into_chunks(self.plaintext))
+        self.assertGreaterEqual(len(legacy_ciphertext) - len(ciphertext), n_chunks)
+        self.assertEqual(compact.encrypt("")[0], pack_compact([]))
+
+    def test_keystream_width(self):
+        legacy = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact')
+        legacy_ciphertext, _ = legacy.encrypt(self.plaintext)
+        data = bytes(range(256)) * 600
+        for width in (2, 3, 4):
+            wide = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact', chunk_size=70000,
+                                keystream_width=width)
+            ciphertext, mac = wide.encrypt_bytes(data)
+            self.assertEqual(split_compact(ciphertext)[0], width - 1)
+            # Sub-chunk keystreams start mid-step when 64 KiB is not a multiple of the width
+            self.assertEqual(wide.decrypt_bytes(ciphertext, mac), data)
+            # The header carries the width, so any engine decrypts either kind
+            self.assertEqual(legacy.decrypt_bytes(ciphertext), data)
+            self.assertEqual(wide.decrypt(legacy_ciphertext), self.plaintext)
+            self.assertEqual(wide.generate_keystream(10, 5, 3, offset=7),
+                             wide.generate_keystream(17, 5, 3)[7:])
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, keystream_width=2)
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, framing='compact', keystream_width=5)
+
+    def test_binary_map(self):
+        binary = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact', chunk_size=4096,
+                              chaotic_map='binary64', keystream_width=4)
+        decimal = ChaosEncrypt(shared_secret=self.shared_secret, framing='compact')
+        ciphertext, mac = binary.encrypt(self.plaintext)
+        self.assertEqual(split_compact(ciphertext)[0], FLAG_BINARY_MAP | 3)
+        self.assertEqual(binary.decrypt(ciphertext, mac), self.plaintext)
+        # The header identifies the variant, so a mismatched engine refuses it
+        with self.assertRaises(ValueError):
+            decimal.decrypt(ciphertext)
+        with self.assertRaises(ValueError):
+            binary.decrypt(decimal.encrypt(self.plaintext)[0])
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, framing='compact', chaotic_map='binary64',
+                         primes=[9973, 2])
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, chaotic_map='binary64')
+
+    def test_cli_binary_map(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['encrypt', '--secret', self.shared_secret, '--framing', 'compact',
+                                     '--map', 'binary64', '--width', '2', 'Test message'])
+        output_lines = result.output.split('\n')
+        self.assertTrue(output_lines[1].startswith('ce0109'))
+        result = runner.invoke(cli, ['decrypt', '--secret', self.shared_secret,
+                                     '--mac-value', output_lines[-2], output_lines[1]])
+        self.assertIn('Decrypted message:\nTest message\n', result.output)
+
+    def test_invalid_framing(self):
+        with self.assertRaises(ValueError):
+            ChaosEncrypt(shared_secret=self.shared_secret, framing='varint')
+
+    def test_cli_compact(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['encrypt', '--secret', self.shared_secret, '--framing', 'compact', 'Test message'])
+        self.assertEqual(result.exit_code, 0)
+        output_lines = result.output.split('\n')
+        self.assertTrue(output_lines[1].startswith('ce01'))
+        result = runner.invoke(cli, ['decrypt', '--secret', self.shared_secret,
+                                     '--mac-value', output_lines[-2], output_lines[1]])
+        self.assertIn('Decrypted message:\nTest message\n', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
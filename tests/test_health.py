@@ -0,0 +1,111 @@
+import unittest
+import pickle
+import random
+import json
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.health import (
+    HealthTestError, KeystreamHealth, adaptive_proportion_cutoff, mcv_min_entropy,
+    repetition_count_cutoff
+)
+
+def _reference(data, rct_cutoff, apt_cutoff, window):
+    """Sample-by-sample SP 800-90B repetition count and adaptive proportion tests."""
+    rct_failures, run, previous, failed = 0, 0, None, False
+    for sample in data:
+        if sample == previous:
+            run += 1
+        else:
+            previous, run, failed = sample, 1, False
+        if run >= rct_cutoff and not failed:
+            rct_failures, failed = rct_failures + 1, True
+    apt_failures = sum(1 for start in range(0, len(data) - window + 1, window)
+                       if data[start:start + window].count(data[start]) >= apt_cutoff)
+    return rct_failures, apt_failures
+
+class TestKeystreamHealth(unittest.TestCase):
+    def test_cutoffs_match_sp800_90b_tables(self):
+        # SP 800-90B section 4.4, alpha = 2**-20, window 512
+        self.assertEqual(repetition_count_cutoff(8.0), 4)
+        self.assertEqual(repetition_count_cutoff(4.0), 6)
+        self.assertEqual([adaptive_proportion_cutoff(h) for h in (1, 2, 4, 8)], [311, 177, 62, 13])
+
+    def test_matches_reference_across_batches(self):
+        rng = random.Random(0)
+        for trial in range(50):
+            data = bytes(rng.choice(b'ab') if rng.random() < 0.8 else rng.randrange(256)
+                         for _ in range(rng.randint(1, 2000)))
+            failures = []
+            monitor = KeystreamHealth(min_entropy=2.0, window=rng.choice((8, 12, 64)),
+                                      batch_size=rng.choice((1, 5, 100)), on_failure=failures.append)
+            pos = 0
+            while pos < len(data):
+                size = rng.randint(1, 200)
+                monitor.update(data[pos:pos + size])
+                pos += size
+            monitor.flush()
+            expected = _reference(data, monitor.rct_cutoff, monitor.apt_cutoff, monitor.window)
+            self.assertEqual((monitor.failures['repetition_count'],
+                              monitor.failures['adaptive_proportion']), expected)
+            self.assertEqual(len(failures), sum(expected))
+
+    def test_random_keystream_is_healthy(self):
+        monitor = KeystreamHealth(entropy_interval=1)
+        monitor.update(random.Random(1).randbytes(1 << 20))
+        stats = monitor.stats()
+        self.assertTrue(stats['healthy'])
+        self.assertEqual(stats['samples'], 1 << 20)
+        self.assertGreater(stats['entropy']['shannon'], 7.99)
+        self.assertGreater(stats['entropy']['min_entropy'], 7.5)
+        json.dumps(stats)
+
+    def test_stuck_keystream_raises(self):
+        monitor = KeystreamHealth(batch_size=64)
+        monitor.update(bytes(10))
+        with self.assertRaises(HealthTestError) as ctx:
+            monitor.update(bytes(60))
+        self.assertEqual(ctx.exception.failure['test'], 'repetition_count')
+        self.assertIsInstance(ctx.exception, ValueError)
+
+    def test_entropy_floor(self):
+        failures = []
+        monitor = KeystreamHealth(batch_size=4096, entropy_floor=6.5, entropy_interval=1,
+                                  on_failure=failures.append)
+        # 64 distinct values, no repeats: passes RCT/APT but has 6 bits per byte
+        monitor.update(bytes(range(0, 256, 4)) * 64)
+        self.assertEqual([f['test'] for f in failures], ['entropy'])
+        self.assertTrue(5.5 < mcv_min_entropy(monitor.counts) <= 6.0)
+
+    def test_engine_integration(self):
+        encryptor = ChaosEncrypt(shared_secret="health_secret", chunk_size=1024, framing='compact')
+        failures = []
+        encryptor.health_monitor = KeystreamHealth(on_failure=failures.append)
+        encryptor.encrypt_bytes(bytes(100000))
+        encryptor.health_monitor.flush()
+        self.assertEqual(encryptor.health_monitor.stats()['samples'], 100000)
+        # Pickling (e.g. into worker processes) keeps the configuration
+        copy = pickle.loads(pickle.dumps(encryptor.health_monitor))
+        self.assertEqual(copy.rct_cutoff, encryptor.health_monitor.rct_cutoff)
+
+    def test_detects_all_zero_chunk_keystream(self):
+        # A warm state divisible by 256 keeps every keystream byte at zero
+        encryptor = ChaosEncrypt(shared_secret="health_secret", chunk_size=64, framing='compact')
+        index = next(i for i in range(10000)
+                     if encryptor.warm_state(encryptor.derive_seed(i), encryptor.derive_k(i)) % 256 == 0)
+        encryptor.health_monitor = KeystreamHealth(batch_size=64)
+        with self.assertRaises(HealthTestError):
+            encryptor.encrypt_chunk(bytes(64), index)
+
+    def test_cli(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['health', '--secret', 'cli_secret', '--chunk-size', '4096',
+                                     '--bytes', '65536', '--primes', '2'])
+        self.assertEqual(result.exit_code, 0)
+        stats = json.loads(result.output[:result.output.rindex('}') + 1])
+        self.assertEqual(stats['samples'], 65536)
+        self.assertGreater(stats['failures']['repetition_count'], 0)
+        self.assertIn('FAILED', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import subprocess
+import sys
+from benchmarks.bench_import import CASES, _child_env, parse_budgets, print_report, run
+
+class TestImportTime(unittest.TestCase):
+    def test_no_heavy_imports(self):
+        # Only the deterministic module checks; the millisecond budgets are
+        # left to make bench-import, as timings vary between machines
+        results = run({}, repeats=1)
+        self.assertEqual({r['case'] for r in results}, set(CASES))
+        failed = [r for r in results if not r['ok']]
+        if failed:
+            print_report(results)
+        self.assertEqual(failed, [])
+
+    def test_engine_does_not_load_cli(self):
+        code = ("import sys, src.core\n"
+                "e = src.core.ChaosEncrypt(shared_secret='s', framing='compact')\n"
+                "assert e.decrypt_bytes(e.encrypt_bytes(bytes(5000))[0]) == bytes(5000)\n"
+                "print(sorted(m for m in ('click', 'src.chaosencrypt_cli') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], env=_child_env(), capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_package_exports(self):
+        import src
+        from src.core import ChaosEncrypt
+        from src.chaosencrypt_cli import encrypt
+        self.assertIs(src.ChaosEncrypt, ChaosEncrypt)
+        self.assertIs(src.encrypt, encrypt)
+        self.assertTrue(set(src.__all__) <= set(dir(src)))
+        with self.assertRaises(AttributeError):
+            src.missing
+
+    def test_python_m(self):
+        result = subprocess.run([sys.executable, '-m', 'src', '--help'], env=_child_env(),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('encrypt', result.stdout)
+
+    def test_parse_budgets(self):
+        self.assertEqual(parse_budgets(['cli_help=10'])['cli_help'], 10.0)
+        with self.assertRaises(ValueError):
+            parse_budgets(['unknown=1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import tempfile
+import shutil
+import mmap
+import os
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.inplace import (
+    TRAILER_SIZE, decrypt_file_inplace, encrypt_file_inplace, xor_region
+)
+
+GRANULE = mmap.ALLOCATIONGRANULARITY
+
+class TestInplace(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'archive.bin')
+        self.data = os.urandom(3 * GRANULE + 1234)
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+        self.encryptor = ChaosEncrypt(shared_secret="inplace_secret", chunk_size=1000,
+                                      framing='compact')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_matches_unframed_chunk_payloads(self):
+        mac = encrypt_file_inplace(self.encryptor, self.path, region_size=GRANULE)
+        expected = b''.join(
+            self.encryptor.encrypt_chunk(self.data[start:start + 1000], start // 1000)
+            for start in range(0, len(self.data), 1000)
+        )
+        self.assertEqual(self._read(), expected)
+        self.assertEqual(mac, self.encryptor.calculate_mac(expected))
+        with open(self.path + '.mac') as f:
+            self.assertEqual(int(f.read()), mac)
+
+    def test_sidecar_round_trip(self):
+        encrypt_file_inplace(self.encryptor, self.path, region_size=GRANULE)
+        self.assertEqual(os.path.getsize(self.path), len(self.data))
+        decrypt_file_inplace(self.encryptor, self.path, region_size=GRANULE)
+        self.assertEqual(self._read(), self.data)
+        self.assertFalse(os.path.exists(self.path + '.mac'))
+
+    def test_trailer_round_trip_parallel(self):
+        encrypt_file_inplace(self.encryptor, self.path, mac_mode='trailer',
+                             workers=2, region_size=GRANULE)
+        self.assertEqual(os.path.getsize(self.path), len(self.data) + TRAILER_SIZE)
+        decrypt_file_inplace(self.encryptor, self.path, mac_mode='trailer',
+                             workers=2, region_size=GRANULE)
+        self.assertEqual(self._read(), self.data)
+
+    def test_regions_are_independent(self):
+        # Processing regions in any order gives the same result
+        for offset in (2 * GRANULE, 0, 3 * GRANULE, GRANULE):
+            xor_region(self.encryptor, self.path, offset, min(GRANULE, len(self.data) - offset))
+        encrypted = self._read()
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+        encrypt_file_inplace(self.encryptor, self.path, region_size=4 * GRANULE)
+        self.assertEqual(self._read(), encrypted)
+
+    def test_tampering_leaves_file_untouched(self):
+        encrypt_file_inplace(self.encryptor, self.path, mac_mode='trailer')
+        with open(self.path, 'r+b') as f:
+            f.seek(10)
+            byte = f.read(1)
+            f.seek(10)
+            f.write(bytes([byte[0] ^ 1]))
+        tampered = self._read()
+        with self.assertRaises(ValueError):
+            decrypt_file_inplace(self.encryptor, self.path, mac_mode='trailer')
+        self.assertEqual(self._read(), tampered)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            encrypt_file_inplace(ChaosEncrypt(use_xor=False), self.path)
+        with self.assertRaises(ValueError):
+            encrypt_file_inplace(self.encryptor, self.path, mac_mode='header')
+        with self.assertRaises(ValueError):
+            encrypt_file_inplace(self.encryptor, self.path, region_size=GRANULE + 1)
+        with self.assertRaises(ValueError):
+            decrypt_file_inplace(self.encryptor, self.path)
+
+    def test_empty_file(self):
+        open(self.path, 'wb').close()
+        encrypt_file_inplace(self.encryptor, self.path)
+        decrypt_file_inplace(self.encryptor, self.path)
+        self.assertEqual(self._read(), b'')
+
+    def test_cli(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['encrypt-file', '--secret', 'cli_secret', '--chunk-size', '4096',
+                                     '--mac-mode', 'trailer', '--workers', '1', self.path])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('MAC:', result.output)
+        self.assertNotEqual(self._read()[:len(self.data)], self.data)
+
+        result = runner.invoke(cli, ['decrypt-file', '--secret', 'wrong', '--chunk-size', '4096',
+                                     '--mac-mode', 'trailer', self.path])
+        self.assertIn('MAC verification failed', result.output)
+
+        result = runner.invoke(cli, ['decrypt-file', '--secret', 'cli_secret', '--chunk-size', '4096',
+                                     '--mac-mode', 'trailer', self.path])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self._read(), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import os
+from benchmarks.bench_memory import DEFAULT_BUDGETS, parse_budgets, print_report, run
+
+class TestMemoryBudget(unittest.TestCase):
+    @unittest.skipUnless(os.path.exists('/proc/self/status'), "needs /proc for RSS sampling")
+    def test_default_budgets(self):
+        results = run([64 * 1024], DEFAULT_BUDGETS)
+        self.assertEqual({r['case'] for r in results}, set(DEFAULT_BUDGETS))
+        over = [r for r in results if not r['ok']]
+        if over:
+            print_report(results)
+        self.assertEqual(over, [])
+
+    def test_budget_enforced(self):
+        results = run([16 * 1024], parse_budgets(['encrypt=0.5']), include_cli=False)
+        by_case = {r['case']: r for r in results}
+        self.assertFalse(by_case['encrypt']['ok'])
+        self.assertGreater(by_case['encrypt']['bytes_per_unit'], 1.0)
+        self.assertEqual(by_case['similarities']['unit'], 'cell')
+
+    def test_parse_budgets(self):
+        self.assertEqual(parse_budgets(['decrypt=2'])['decrypt'], 2.0)
+        with self.assertRaises(ValueError):
+            parse_budgets(['unknown=1'])
+        with self.assertRaises(ValueError):
+            parse_budgets(['encrypt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
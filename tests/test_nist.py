@@ -0,0 +1,35 @@
+import unittest
+import os
+import numpy as np
+from src.nist import (approximate_entropy, block_frequency, cumulative_sums, frequency, igamc, run_tests,
+                      runs)
+
+# Worked example of SP 800-22 section 2 (first 100 bits of e's expansion)
+EXAMPLE = np.array([int(c) for c in
+                    '11001001000011111101101010100010001000010110100011'
+                    '00001000110100110001001100011001100010100010111000'], dtype=np.uint8)
+
+class TestNist(unittest.TestCase):
+    def test_reference_p_values(self):
+        self.assertAlmostEqual(frequency(EXAMPLE), 0.109599, places=6)
+        self.assertAlmostEqual(block_frequency(EXAMPLE, 10), 0.706438, places=6)
+        self.assertAlmostEqual(runs(EXAMPLE), 0.500798, places=6)
+        self.assertAlmostEqual(cumulative_sums(EXAMPLE), 0.219194, places=6)
+        self.assertAlmostEqual(approximate_entropy(EXAMPLE, 2), 0.235301, places=6)
+
+    def test_igamc(self):
+        self.assertAlmostEqual(igamc(1, 1), np.exp(-1), places=12)
+        self.assertAlmostEqual(igamc(5, 3), 0.815263, places=6)
+        self.assertEqual(igamc(3, 0), 1.0)
+
+    def test_run_tests(self):
+        result = run_tests(os.urandom(64 * 1024))
+        self.assertEqual(result['tests'], 5)
+        self.assertGreaterEqual(result['passed'], 3)
+        self.assertEqual(run_tests(bytes(4096))['passed'], 0)
+        with self.assertRaises(ValueError):
+            run_tests(bytes(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from src.chaosencrypt_cli import ChaosEncrypt
+from src.backends import mulmod_u64
+from src.orbit_break import OrbitBreakSimulator, sweep_orbit_break
+
+class TestOrbitBreak(unittest.TestCase):
+    def setUp(self):
+        self.encryptor = ChaosEncrypt(primes=[9973, 9941, 9929])
+        self.simulator = OrbitBreakSimulator(self.encryptor, max_k=20)
+
+    def test_mulmod_matches_python(self):
+        modulus = 10 ** 15
+        rng = np.random.default_rng(1)
+        a = rng.integers(0, modulus, size=200, dtype=np.uint64)
+        b = rng.integers(0, modulus, size=200, dtype=np.uint64)
+        result = mulmod_u64(a, b, modulus)
+        expected = [(int(x) * int(y)) % modulus for x, y in zip(a, b)]
+        self.assertEqual([int(r) for r in result], expected)
+
+    def test_orbits_match_chaotic_step(self):
+        seeds = self.simulator._as_array([12345, 987654321])
+        orbits = self.simulator.orbits(seeds)
+        for row, seed in enumerate([12345, 987654321]):
+            state = seed
+            for step in range(self.simulator.max_k + 1):
+                state = self.encryptor.chaotic_step(state, step)
+                self.assertEqual(int(orbits[row, step]), state)
+
+    def test_detect_recovers_k(self):
+        rng = np.random.default_rng(7)
+        seeds = self.simulator.random_seeds(500, rng)
+        ks = rng.integers(1, 21, size=500)
+        offsets = rng.integers(0, 1000, size=500)
+        detected = self.simulator.detect(seeds, self.simulator.transmit(seeds, ks, offsets))
+        np.testing.assert_array_equal(detected, ks)
+
+        # Vectorised results agree with the scalar reference
+        for i in range(20):
+            self.assertEqual(
+                self.simulator.simulate_session(int(seeds[i]), int(ks[i]), int(offsets[i])),
+                detected[i]
+            )
+
+    def test_high_precision_object_path(self):
+        simulator = OrbitBreakSimulator(ChaosEncrypt(precision=40), max_k=10)
+        self.assertFalse(simulator.use_uint64)
+        report = simulator.measure(200, seed=3)
+        self.assertEqual(report['accuracy'], 1.0)
+        self.assertEqual(report['missed'], 0)
+
+    def test_invalid_k(self):
+        seeds = self.simulator._as_array([1])
+        with self.assertRaises(ValueError):
+            self.simulator.transmit(seeds, [21], [0])
+
+    def test_sweep(self):
+        results = sweep_orbit_break([8, 12], [[9973], [9973, 9967]], n_sessions=100, max_k=8, seed=0)
+        self.assertEqual(len(results), 4)
+        for result in results:
+            self.assertGreaterEqual(result['accuracy'], 0.99)
+            self.assertGreater(result['mean_latency_steps'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import pickle
+import tempfile
+import shutil
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.chaosencrypt_cli import ChaosEncrypt
+from src.pad_pool import PadPool
+from src.batch import collect_jobs, run_batch
+
+PARAMS = {'precision': 12, 'primes': [9973], 'chunk_size': 16, 'base_k': 6,
+          'dynamic_k': True, 'xor': True, 'mac': True}
+
+
+def _encrypt_with(engine, text):
+    return engine.encrypt(text)
+
+
+class TestPadPool(unittest.TestCase):
+    def setUp(self):
+        self.encryptor = ChaosEncrypt(shared_secret="pool_secret", chunk_size=32)
+        self.pool = PadPool.create(self.encryptor, n_chunks=8)
+        self.text = "Pads are computed once per secret. " * 10
+
+    def tearDown(self):
+        self.pool.close()
+        self.pool.unlink()
+
+    def _attached(self, encryptor=None):
+        encryptor = encryptor or ChaosEncrypt(shared_secret="pool_secret", chunk_size=32)
+        encryptor.pad_pool = PadPool.attach(self.pool.name, encryptor)
+        self.addCleanup(encryptor.pad_pool.close)
+        return encryptor
+
+    def test_pads_match_generated_keystream(self):
+        for chunk_index in range(12):
+            k = self.encryptor.derive_k(chunk_index)
+            seed = self.encryptor.derive_seed(chunk_index)
+            for length in (1, 17, 32):
+                self.assertEqual(
+                    self.pool.keystream(self.encryptor, chunk_index, length),
+                    self.encryptor.generate_keystream(length, seed, k)
+                )
+        self.assertIsNone(self.pool.keystream(self.encryptor, 0, 33))
+
+    def test_ciphertext_unchanged(self):
+        expected = self.encryptor.encrypt(self.text)
+        engine = self._attached()
+        self.assertEqual(engine.encrypt(self.text), expected)
+        self.assertEqual(engine.decrypt(*expected), self.text)
+
+    def test_attached_view_is_read_only(self):
+        engine = self._attached()
+        with self.assertRaises(TypeError):
+            engine.pad_pool._view[0] = 0
+        with self.assertRaises(ValueError):
+            engine.pad_pool.invalidate()
+
+    def test_attach_rejects_other_parameters(self):
+        with self.assertRaises(ValueError):
+            PadPool.attach(self.pool.name, ChaosEncrypt(shared_secret="other", chunk_size=32))
+
+    def test_invalidation(self):
+        engine = self._attached()
+        self.assertIsNotNone(engine.pooled_keystream(0, 16))
+
+        # An engine with other parameters does not use the pads
+        other = ChaosEncrypt(shared_secret="changed", chunk_size=32)
+        other.pad_pool = engine.pad_pool
+        self.assertIsNone(other.pooled_keystream(0, 16))
+
+        # So does the owner rebuilding the segment for another secret
+        self.pool.rebuild(ChaosEncrypt(shared_secret="rotated", chunk_size=32))
+        self.assertFalse(engine.pad_pool.is_valid())
+        self.assertIsNone(engine.pooled_keystream(0, 16))
+        self.assertEqual(engine.decrypt(*self.encryptor.encrypt(self.text)), self.text)
+
+    def test_size_bound_and_lru(self):
+        with PadPool.create(self.encryptor, n_chunks=1000, max_bytes=4096, local_pads=4) as pool:
+            self.assertLessEqual(pool.nbytes, 4096)
+            self.assertLess(pool.count, 1000)
+            for chunk_index in range(pool.count, pool.count + 6):
+                pool.keystream(self.encryptor, chunk_index, 16)
+            self.assertEqual(list(pool._local), list(range(pool.count + 2, pool.count + 6)))
+
+        with self.assertRaises(ValueError):
+            PadPool.create(self.encryptor, n_chunks=4, max_bytes=32)
+        with self.assertRaises(ValueError):
+            PadPool.create(ChaosEncrypt(use_xor=False), n_chunks=4)
+
+    def test_worker_processes(self):
+        engine = self._attached()
+        expected = self.encryptor.encrypt(self.text)
+        self.assertEqual(pickle.loads(pickle.dumps(engine)).pad_pool.name, self.pool.name)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(_encrypt_with, [engine] * 4, [self.text] * 4))
+        self.assertEqual(results, [expected] * 4)
+
+    def test_batch_with_pad_pool(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source = os.path.join(temp_dir, 'plain')
+        os.makedirs(source)
+        for i in range(5):
+            with open(os.path.join(source, f'{i}.txt'), 'w', encoding='utf-8') as f:
+                f.write(self.text * (i + 1))
+
+        outputs = {}
+        for pad_chunks in (0, 16):
+            out = os.path.join(temp_dir, f'enc{pad_chunks}')
+            jobs = collect_jobs(source, out, 'encrypt', PARAMS)
+            counts = run_batch(jobs, 'secret', 'encrypt', os.path.join(out, 'results.jsonl'),
+                               workers=2, pad_chunks=pad_chunks)
+            self.assertEqual(counts['ok'], 5)
+            outputs[pad_chunks] = sorted(
+                open(os.path.join(out, name)).read() for name in os.listdir(out) if name != 'results.jsonl'
+            )
+        self.assertEqual(outputs[0], outputs[16])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import pickle
+import numpy as np
+from src.core import ChaosEncrypt
+from src.prng import BLOCK_SIZE, DEFAULT_ENGINE_OPTIONS, ChaosRandom
+
+
+class TestChaosRandom(unittest.TestCase):
+    def setUp(self):
+        self.rng = ChaosRandom(42)
+
+    def test_reproducible(self):
+        self.assertEqual(ChaosRandom(42).randbytes(1000), self.rng.randbytes(1000))
+        self.assertNotEqual(ChaosRandom(43).randbytes(1000), ChaosRandom(42).randbytes(1000))
+        self.assertNotEqual(ChaosRandom('42').randbytes(64), ChaosRandom(42).randbytes(64))
+
+    def test_stream_is_engine_keystream(self):
+        engine = ChaosEncrypt(shared_secret=self.rng.engine.shared_secret, **DEFAULT_ENGINE_OPTIONS)
+        self.assertEqual(self.rng.randbytes(5000), engine.generate_keystream(5000, engine.derive_seed(0), engine.derive_k(0)))
+
+    def test_read_sizes_do_not_change_stream(self):
+        expected = ChaosRandom(42).randbytes(2 * BLOCK_SIZE)
+        parts = [self.rng.randbytes(n) for n in (3, 1, 70000, 8, BLOCK_SIZE - 20000, 50000)]
+        self.assertEqual(b''.join(parts), expected[:sum(map(len, parts))])
+
+    def test_seek_and_jumpahead(self):
+        expected = ChaosRandom(42).randbytes(2 * BLOCK_SIZE + 100)
+        self.rng.seek(BLOCK_SIZE - 10)
+        self.assertEqual(self.rng.randbytes(20), expected[BLOCK_SIZE - 10:BLOCK_SIZE + 10])
+        self.rng.jumpahead(BLOCK_SIZE)
+        self.assertEqual(self.rng.tell(), 2 * BLOCK_SIZE + 10)
+        self.assertEqual(self.rng.randbytes(90), expected[2 * BLOCK_SIZE + 10:])
+        self.rng.seek(5)
+        self.assertEqual(self.rng.randbytes(5), expected[5:10])
+        with self.assertRaises(ValueError):
+            self.rng.seek(-1)
+
+    def test_random_matches_random_floats(self):
+        values = [self.rng.random() for _ in range(1000)]
+        self.assertTrue(all(0.0 <= v < 1.0 for v in values))
+        self.assertEqual(ChaosRandom(42).random_floats(1000).tolist(), values)
+        self.assertAlmostEqual(float(np.mean(ChaosRandom(1).random_floats(100000))), 0.5, delta=0.01)
+
+    def test_random_random_methods(self):
+        self.assertLess(self.rng.getrandbits(13), 1 << 13)
+        self.assertEqual(self.rng.getrandbits(0), 0)
+        self.assertIn(self.rng.randrange(10, 20), range(10, 20))
+        self.assertIn(self.rng.choice('abc'), 'abc')
+        items = list(range(50))
+        self.rng.shuffle(items)
+        self.assertEqual(sorted(items), list(range(50)))
+        self.assertIsInstance(self.rng.gauss(), float)
+        self.assertEqual(len(self.rng.sample(range(100), 10)), 10)
+        with self.assertRaises(TypeError):
+            ChaosRandom([1, 2])
+
+    def test_fill(self):
+        for dtype in (np.uint8, np.int16, np.uint32, np.uint64):
+            out = np.zeros((40, 25), dtype=dtype)
+            self.assertIs(self.rng.fill(out), out)
+            self.assertTrue(out.any())
+        flags = self.rng.fill(np.empty(10000, dtype=bool))
+        self.assertAlmostEqual(flags.mean(), 0.5, delta=0.05)
+        floats = self.rng.fill(np.empty(10000, dtype=np.float32))
+        self.assertTrue(((floats >= 0) & (floats < 1)).all())
+        with self.assertRaises(ValueError):
+            self.rng.fill(np.zeros((10, 10))[:, ::2])
+        with self.assertRaises(ValueError):
+            self.rng.fill(np.zeros(10, dtype=np.complex128))
+
+    def test_fill_integers_are_stream_bytes(self):
+        out = self.rng.fill(np.empty(100, dtype=np.uint32))
+        self.assertEqual(out.tobytes(), ChaosRandom(42).randbytes(400))
+
+    def test_spawn(self):
+        position = self.rng.tell()
+        children = self.rng.spawn(3)
+        self.assertEqual(self.rng.tell(), position)
+        streams = [child.randbytes(256) for child in children]
+        self.assertEqual(len(set(streams) | {ChaosRandom(42).randbytes(256)}), 4)
+        self.assertEqual([c.randbytes(256) for c in ChaosRandom(42).spawn(3)], streams)
+        self.assertNotEqual(self.rng.spawn(1)[0].randbytes(256), streams[0])
+
+    def test_state(self):
+        self.rng.randbytes(1234)
+        state = self.rng.getstate()
+        expected = self.rng.randbytes(100)
+        self.rng.setstate(state)
+        self.assertEqual(self.rng.randbytes(100), expected)
+        self.rng.setstate(state)
+        self.assertEqual(pickle.loads(pickle.dumps(self.rng)).randbytes(100), expected)
+
+    def test_engine_options(self):
+        rng = ChaosRandom(42, primes=[9973, 9967], keystream_width=2)
+        self.assertEqual(list(rng.engine.primes), [9973, 9967])
+        self.assertNotEqual(rng.randbytes(64), self.rng.randbytes(64))
+
+
+if __name__ == '__main__':
+    unittest.main()
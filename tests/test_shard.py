@@ -0,0 +1,181 @@
+import unittest
+import tempfile
+import shutil
+import os
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.framing import FLAG_SHARDED_MAC, parse_header
+from src.shard import (
+    MANIFEST_NAME, encrypt_file_sharded, encrypt_shard_file, load_manifest, merge_files, merge_segments,
+    plan_shards, segment_path
+)
+
+
+def _encrypt_shards(encryptor, manifest, data):
+    results = [encryptor.encrypt_shard(data[s['offset']:s['offset'] + s['length']], s['start_chunk'])
+               for s in manifest['shards']]
+    return [segment for segment, _ in results], [mac for _, mac in results]
+
+
+class TestPlanShards(unittest.TestCase):
+    def test_shards_cover_whole_chunks(self):
+        manifest = plan_shards(10500, 1000, shards=3)
+        self.assertEqual(manifest['chunks'], 11)
+        self.assertEqual([(s['offset'], s['length'], s['start_chunk'], s['chunks']) for s in manifest['shards']],
+                         [(0, 4000, 0, 4), (4000, 4000, 4, 4), (8000, 2500, 8, 3)])
+
+    def test_shard_size(self):
+        manifest = plan_shards(5000, 1000, shard_size=2000)
+        self.assertEqual([s['length'] for s in manifest['shards']], [2000, 2000, 1000])
+
+    def test_more_shards_than_chunks(self):
+        self.assertEqual(len(plan_shards(2500, 1000, shards=8)['shards']), 3)
+
+    def test_empty_payload(self):
+        manifest = plan_shards(0, 1000, shards=4)
+        self.assertEqual(manifest['shards'], [{'index': 0, 'offset': 0, 'length': 0, 'start_chunk': 0, 'chunks': 0}])
+
+    def test_invalid_arguments(self):
+        for kwargs in ({}, {'shards': 2, 'shard_size': 2000}, {'shards': 0}, {'shard_size': 1500}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    plan_shards(5000, 1000, **kwargs)
+
+
+class TestShardedEncryption(unittest.TestCase):
+    def setUp(self):
+        self.encryptor = ChaosEncrypt(shared_secret="shard_secret", chunk_size=1000, framing='compact')
+        self.data = os.urandom(10500)
+
+    def test_merge_matches_whole_encryption(self):
+        manifest = plan_shards(len(self.data), 1000, shards=3)
+        ciphertext, mac = merge_segments(self.encryptor, manifest, *_encrypt_shards(self.encryptor, manifest,
+                                                                                     self.data))
+        expected, _ = self.encryptor.encrypt_bytes(self.data)
+        flags = parse_header(ciphertext)[0]
+        self.assertEqual(flags, parse_header(expected)[0] | FLAG_SHARDED_MAC)
+        self.assertEqual(ciphertext[3:], expected[3:])
+        self.assertEqual(self.encryptor.decrypt_bytes(ciphertext, mac), self.data)
+        self.assertEqual(mac, self.encryptor.sharded_mac(ciphertext))
+
+    def test_mac_does_not_depend_on_layout(self):
+        merged = []
+        for kwargs in ({'shards': 1}, {'shards': 4}, {'shard_size': 2000}):
+            manifest = plan_shards(len(self.data), 1000, **kwargs)
+            merged.append(merge_segments(self.encryptor, manifest,
+                                         *_encrypt_shards(self.encryptor, manifest, self.data)))
+        self.assertEqual(merged[0], merged[1])
+        self.assertEqual(merged[0], merged[2])
+
+    def test_tampering_is_detected(self):
+        manifest = plan_shards(len(self.data), 1000, shards=3)
+        segments, macs = _encrypt_shards(self.encryptor, manifest, self.data)
+        ciphertext, mac = merge_segments(self.encryptor, manifest, segments, macs)
+        tampered = bytearray(ciphertext)
+        tampered[-1] ^= 1
+        with self.assertRaises(ValueError):
+            self.encryptor.decrypt_bytes(bytes(tampered), mac)
+        # Swapping two equal-length chunks changes their indices' tags
+        swapped = ciphertext[:-2500 - 2000] + ciphertext[-2500 - 1000:-2500] + ciphertext[-2500 - 2000:-2500 - 1000] \
+            + ciphertext[-2500:]
+        self.assertFalse(self.encryptor.verify_mac(swapped, mac))
+
+    def test_merge_checks_segments(self):
+        manifest = plan_shards(len(self.data), 1000, shards=3)
+        segments, macs = _encrypt_shards(self.encryptor, manifest, self.data)
+        with self.assertRaises(ValueError):
+            merge_segments(self.encryptor, manifest, segments[:2], macs[:2])
+        with self.assertRaises(ValueError):
+            merge_segments(self.encryptor, manifest, [segments[0][:-1]] + segments[1:], macs)
+        with self.assertRaises(ValueError):
+            merge_segments(self.encryptor, manifest, segments, [None] + macs[1:])
+        other = ChaosEncrypt(shared_secret="shard_secret", chunk_size=500, framing='compact')
+        with self.assertRaises(ValueError):
+            merge_segments(other, manifest, segments, macs)
+
+    def test_engine_requirements(self):
+        for kwargs in ({}, {'framing': 'compact', 'compression': 'zlib'}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    ChaosEncrypt(shared_secret="s", **kwargs).encrypt_shard(b'data', 0)
+        with self.assertRaises(ValueError):
+            self.encryptor.encrypt_shard(b'data', -1)
+
+    def test_without_mac(self):
+        encryptor = ChaosEncrypt(shared_secret="s", chunk_size=1000, framing='compact', use_mac=False)
+        manifest = plan_shards(len(self.data), 1000, shards=2)
+        ciphertext, mac = merge_segments(encryptor, manifest, *_encrypt_shards(encryptor, manifest, self.data))
+        self.assertIsNone(mac)
+        self.assertEqual(encryptor.decrypt_bytes(ciphertext), self.data)
+
+
+class TestShardFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, 'input.bin')
+        self.output_path = os.path.join(self.temp_dir, 'output.enc')
+        self.segments = os.path.join(self.temp_dir, 'segments')
+        self.data = os.urandom(50000)
+        with open(self.input_path, 'wb') as f:
+            f.write(self.data)
+        self.encryptor = ChaosEncrypt(shared_secret="shard_secret", chunk_size=4096, framing='compact')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _decrypt_output(self, mac):
+        with open(self.output_path, 'rb') as f:
+            return self.encryptor.decrypt_bytes(f.read(), mac)
+
+    def test_processes_as_nodes(self):
+        mac = encrypt_file_sharded(self.encryptor, self.input_path, self.output_path, self.segments,
+                                   shards=4, workers=3)
+        self.assertEqual(self._decrypt_output(mac), self.data)
+        with open(self.output_path + '.mac') as f:
+            self.assertEqual(int(f.read()), mac)
+        self.assertEqual(len(load_manifest(os.path.join(self.segments, MANIFEST_NAME))['shards']), 4)
+
+    def test_shards_in_any_order(self):
+        manifest = plan_shards(len(self.data), 4096, shards=3)
+        os.makedirs(self.segments)
+        for index in (2, 0, 1):
+            encrypt_shard_file(self.encryptor, manifest, index, self.input_path, self.segments)
+        mac = merge_files(self.encryptor, manifest, self.segments, self.output_path)
+        self.assertEqual(self._decrypt_output(mac), self.data)
+
+    def test_missing_segment(self):
+        manifest = plan_shards(len(self.data), 4096, shards=3)
+        os.makedirs(self.segments)
+        encrypt_shard_file(self.encryptor, manifest, 0, self.input_path, self.segments)
+        with self.assertRaises(ValueError):
+            merge_files(self.encryptor, manifest, self.segments, self.output_path)
+        self.assertFalse(os.path.exists(self.output_path))
+        self.assertTrue(os.path.exists(segment_path(self.segments, 0)))
+
+    def test_cli_round_trip(self):
+        runner = CliRunner()
+        manifest_path = os.path.join(self.temp_dir, 'manifest.json')
+        options = ['--secret', 'cli_secret', '--chunk-size', '4096']
+        result = runner.invoke(cli, ['shard-plan', '--chunk-size', '4096', '--shards', '3',
+                                     '--output', manifest_path, self.input_path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        for index in ('1', '0', '2'):
+            result = runner.invoke(cli, ['shard-encrypt', *options, '--index', index, '--segments', self.segments,
+                                         manifest_path, self.input_path])
+            self.assertEqual(result.exit_code, 0, result.output)
+        result = runner.invoke(cli, ['shard-merge', *options, '--segments', self.segments,
+                                     manifest_path, self.output_path])
+        self.assertIn('MAC:', result.output)
+        decrypted_path = os.path.join(self.temp_dir, 'decrypted.bin')
+        result = runner.invoke(cli, ['shard-decrypt', *options, self.output_path, decrypted_path])
+        self.assertIn('Success', result.output)
+        with open(decrypted_path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+        result = runner.invoke(cli, ['shard-decrypt', '--secret', 'wrong', '--chunk-size', '4096',
+                                     self.output_path, decrypted_path])
+        self.assertIn('MAC verification failed', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
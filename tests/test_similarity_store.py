@@ -0,0 +1,112 @@
+import unittest
+import tempfile
+import shutil
+import random
+import json
+import os
+import numpy as np
+from unittest.mock import patch
+from src.semantic_clustering import SemanticClustering
+from src.similarity_store import MATRIX_FILE, SimilarityStore, condensed_index
+
+def _corpus(n, seed=0):
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(200)] + ["the", "a", "of", "and"] * 20
+    clustering = SemanticClustering()
+    return [clustering.encrypt(' '.join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+                               + rng.choice(['.', '!', '']))
+            for _ in range(n)]
+
+class TestSimilarityStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'store')
+        self.clustering = SemanticClustering()
+        self.texts = _corpus(120)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self, texts):
+        return np.array(self.clustering.calculate_similarities(texts))
+
+    def test_incremental_matches_full_recompute(self):
+        store = SimilarityStore(self.path)
+        self.assertEqual(store.add(self.texts[:50]), list(range(50)))
+        store.add(self.texts[50:51])
+        store.add(self.texts[51:])
+        np.testing.assert_array_equal(store.matrix(), self._expected(self.texts))
+        self.assertEqual(store.similarity(7, 90),
+                         self.clustering.calculate_similarity(self.texts[90], self.texts[7]))
+
+    def test_sparse_only_index(self):
+        with patch('src.similarity_store.DENSE_MAX_FEATURES', 0), \
+                patch('src.similarity_store.ROW_BLOCK', 7):
+            store = SimilarityStore(self.path)
+            store.add(self.texts)
+        np.testing.assert_array_equal(store.matrix(), self._expected(self.texts))
+
+    def test_condensed_layout_is_append_only(self):
+        store = SimilarityStore(self.path)
+        store.add(self.texts[:4])
+        with open(os.path.join(self.path, MATRIX_FILE), 'rb') as f:
+            before = f.read()
+        store.add(self.texts[4:6])
+        with open(os.path.join(self.path, MATRIX_FILE), 'rb') as f:
+            after = f.read()
+        self.assertEqual(after[:len(before)], before)
+        condensed = np.frombuffer(after, dtype=np.float64)
+        self.assertEqual(len(condensed), condensed_index(6, 0))
+        self.assertEqual(condensed[condensed_index(5, 2)],
+                         self.clustering.calculate_similarity(self.texts[5], self.texts[2]))
+
+    def test_reopen_and_interrupted_add(self):
+        SimilarityStore(self.path).add(self.texts[:60])
+        # Simulate an add that appended data but died before committing
+        with open(os.path.join(self.path, MATRIX_FILE), 'ab') as f:
+            f.write(b'\xff' * 100)
+        with open(os.path.join(self.path, 'words.ids'), 'ab') as f:
+            f.write(b'\xff' * 12)
+        store = SimilarityStore(self.path)
+        self.assertEqual(len(store), 60)
+        store.add(self.texts[60:])
+        np.testing.assert_array_equal(SimilarityStore(self.path).matrix(), self._expected(self.texts))
+
+    def test_remove_and_compact(self):
+        store = SimilarityStore(self.path)
+        store.add(self.texts[:100])
+        store.remove([0, 42, 99])
+        keep = [i for i in range(100) if i not in (0, 42, 99)]
+        self.assertEqual(store.ids, keep)
+        expected = self._expected([self.texts[i] for i in keep])
+        np.testing.assert_array_equal(store.matrix(), expected)
+        with self.assertRaises(ValueError):
+            store.similarity(0, 1)
+        with self.assertRaises(ValueError):
+            store.remove([42])
+
+        self.assertEqual(store.compact(), keep)
+        store = SimilarityStore(self.path)
+        self.assertEqual(store.ids, list(range(97)))
+        np.testing.assert_array_equal(store.matrix(), expected)
+        store.add(self.texts[100:])
+        texts = [self.texts[i] for i in keep] + self.texts[100:]
+        np.testing.assert_array_equal(store.matrix(), self._expected(texts))
+
+    def test_empty_texts_and_custom_weights(self):
+        clustering = SemanticClustering(n_gram_size=3, word_weight=0.5, char_weight=0.5)
+        texts = ['', '', 'w1 w2', 'w1 .', '. !']
+        store = SimilarityStore(self.path, n_gram_size=3, word_weight=0.5, char_weight=0.5)
+        store.add(texts)
+        np.testing.assert_array_equal(store.matrix(), np.array(clustering.calculate_similarities(texts)))
+
+    def test_parameter_mismatch(self):
+        SimilarityStore(self.path).add(self.texts[:3])
+        with self.assertRaises(ValueError):
+            SimilarityStore(self.path, n_gram_size=3)
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            self.assertEqual(json.load(f)['count'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import json
+import os
+import tempfile
+from click.testing import CliRunner
+from src.chaosencrypt_cli import cli
+from src.sweep import (ResultCache, build_grid, cache_key, format_table, multiplicative_order,
+                       orbit_cycle_length, run_sweep)
+
+SETTINGS = {'sample_bytes': 16 * 1024, 'cycle_chunks': 8}
+
+def brute_force_cycle(state, multiplier, modulus):
+    x = state * multiplier % modulus
+    n = 1
+    while x != state:
+        x = x * multiplier % modulus
+        n += 1
+    return n
+
+class TestSweep(unittest.TestCase):
+    def test_cycle_length(self):
+        for modulus in (10, 1000, 10 ** 4, 2 ** 12):
+            for state in (1, 2, 25, 48, 125, 999, 0):
+                for multiplier in (3, 7, 9973):
+                    self.assertEqual(orbit_cycle_length(state % modulus, multiplier, modulus),
+                                     brute_force_cycle(state % modulus, multiplier, modulus))
+        self.assertIsNone(orbit_cycle_length(3, 5, 10))
+        self.assertEqual(multiplicative_order(9973, 2 ** 64), 2 ** 62)
+
+    def test_grid(self):
+        skipped = []
+        cells = build_grid([8, 12], [[9973], [9973, 9967]], [6], [64], ['dynamic-k', 'width-4'],
+                           skipped=skipped)
+        self.assertEqual(len(cells), 6)
+        self.assertEqual([(c['precision'], c['mode']) for c in skipped], [(8, 'width-4')] * 2)
+        with self.assertRaises(ValueError):
+            build_grid([8], [[9973]], [6], [64], ['width-4'])
+        with self.assertRaises(ValueError):
+            build_grid([12], [[9973]], [6], [64], ['nonexistent'])
+
+    def test_cache_key(self):
+        cell = build_grid([12], [[9973]], [6], [64], ['dynamic-k'])[0]
+        key = cache_key(cell, SETTINGS, 'secret')
+        self.assertEqual(key, cache_key(dict(reversed(list(cell.items()))), dict(SETTINGS), 'secret'))
+        self.assertNotEqual(key, cache_key(cell, SETTINGS, 'other'))
+        self.assertNotEqual(key, cache_key(dict(cell, base_k=7), SETTINGS, 'secret'))
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            cells = build_grid([12], [[9973]], [6], [64, 256], ['dynamic-k'])
+            first = run_sweep(cells, 'secret', cache, settings=SETTINGS)
+            self.assertFalse(any(r['cached'] for r in first))
+            metrics = first[0]['metrics']
+            self.assertEqual(metrics['nist']['tests'], 5)
+            self.assertGreater(metrics['entropy']['shannon'], 7.5)
+            self.assertGreater(metrics['cycle_length']['min'], 256)
+
+            extended = build_grid([12], [[9973]], [6], [64, 256], ['dynamic-k', 'binary64'])
+            second = run_sweep(extended, 'secret', cache, workers=2, settings=SETTINGS)
+            self.assertEqual([r['cached'] for r in second], [True, False, True, False])
+            self.assertEqual(second[0]['metrics'], json.loads(json.dumps(metrics)))
+            self.assertEqual(second[1]['metrics']['cycle_length']['min'], 2 ** 62)
+            self.assertIn('binary64', format_table(second))
+
+            # A torn file is recomputed
+            with open(cache.path(first[0]['key']), 'w') as f:
+                f.write('{')
+            self.assertFalse(run_sweep(cells[:1], 'secret', cache, settings=SETTINGS)[0]['cached'])
+        with self.assertRaises(ValueError):
+            run_sweep(cells, 'secret', settings={'sample_bytes': 10})
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.jsonl')
+            args = ['sweep', '--secret', 'secret', '--precision', '12', '--chunk-size', '64',
+                    '--mode', 'dynamic-k', '--mode', 'static-k', '--bytes', '16384',
+                    '--workers', '1', '--cache-dir', directory, '--output', output]
+            result = CliRunner().invoke(cli, args)
+            self.assertIn('2 cells: 2 computed, 0 cached', result.output)
+            with open(output) as f:
+                self.assertEqual(len(f.readlines()), 2)
+            result = CliRunner().invoke(cli, args)
+            self.assertIn('2 cells: 0 computed, 2 cached', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
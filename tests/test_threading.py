@@ -0,0 +1,94 @@
+import unittest
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.core import ChaosEncrypt, MAP_BINARY64
+from src.backends import NumpyBackend, Uint64Backend
+
+CONFIGS = [
+    {'chunk_size': 16},
+    {'chunk_size': 4096, 'framing': 'compact'},
+    {'chunk_size': 4096, 'framing': 'compact', 'keystream_width': 4, 'precision': 16},
+    {'chunk_size': 4096, 'framing': 'compact', 'chaotic_map': MAP_BINARY64, 'primes': [9973, 10007]},
+    {'chunk_size': 1024, 'framing': 'compact', 'compression': 'zlib'},
+]
+
+
+class TestEncryptParallel(unittest.TestCase):
+    def setUp(self):
+        self.text = "Threads share one engine and its tables. " * 1000
+        self.data = bytes(range(256)) * 200
+
+    def test_matches_serial_encryption(self):
+        for config in CONFIGS:
+            engine = ChaosEncrypt(shared_secret="threads", **config)
+            for workers in (1, 4):
+                with self.subTest(config=config, workers=workers):
+                    self.assertEqual(engine.encrypt_parallel(self.text, workers=workers), engine.encrypt(self.text))
+                    self.assertEqual(engine.encrypt_parallel(self.data, workers=workers),
+                                     engine.encrypt_bytes(self.data))
+
+    def test_given_executor(self):
+        engine = ChaosEncrypt(shared_secret="threads", chunk_size=512, framing='compact')
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            ciphertext, mac = engine.encrypt_parallel(self.data, executor=pool)
+        self.assertEqual(engine.decrypt_bytes(ciphertext, mac), self.data)
+
+    def test_empty_input(self):
+        engine = ChaosEncrypt(shared_secret="threads")
+        self.assertEqual(engine.encrypt_parallel("", workers=4), engine.encrypt(""))
+
+
+class TestSharedEngine(unittest.TestCase):
+    def test_concurrent_use(self):
+        engine = ChaosEncrypt(shared_secret="shared", chunk_size=2048, framing='compact')
+        texts = [f"message {i} " * (50 + 37 * i) for i in range(16)]
+        expected = [engine.encrypt(text) for text in texts]
+        results = [None] * len(texts)
+        barrier = threading.Barrier(8)
+
+        def work(worker):
+            barrier.wait()
+            for i in range(worker, len(texts), 8):
+                ciphertext, mac = engine.encrypt(texts[i])
+                results[i] = (ciphertext, mac, engine.decrypt(ciphertext, mac))
+
+        threads = [threading.Thread(target=work, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for text, (ciphertext, mac), result in zip(texts, expected, results):
+            self.assertEqual(result, (ciphertext, mac, text))
+
+    def test_configuration_is_read_only(self):
+        engine = ChaosEncrypt(shared_secret="shared")
+        for name, value in (('shared_secret', 'other'), ('chunk_size', 32), ('primes', [7])):
+            with self.subTest(name=name):
+                with self.assertRaises(AttributeError):
+                    setattr(engine, name, value)
+        self.assertFalse(hasattr(engine, '__dict__'))
+        self.assertIsInstance(engine.primes, tuple)
+
+    def test_runtime_attributes_are_assignable(self):
+        engine = ChaosEncrypt(shared_secret="shared")
+        engine.pad_pool = None
+        engine.health_monitor = None
+
+    def test_pickle_round_trip(self):
+        engine = ChaosEncrypt(shared_secret="shared", chunk_size=64, framing='compact')
+        ciphertext, mac = engine.encrypt("pickled engines rebuild their KDF")
+        clone = pickle.loads(pickle.dumps(engine))
+        self.assertEqual(clone.derive_seed(3), engine.derive_seed(3))
+        self.assertEqual(clone.decrypt(ciphertext, mac), "pickled engines rebuild their KDF")
+        with self.assertRaises(AttributeError):
+            clone.chunk_size = 16
+
+    def test_backend_tables_are_read_only(self):
+        tables = [NumpyBackend().power_table(9973, 10 ** 12), Uint64Backend().power_table(9973)]
+        for table, _ in tables:
+            self.assertFalse(table.flags.writeable)
+
+
+if __name__ == '__main__':
+    unittest.main()
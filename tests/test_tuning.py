@@ -0,0 +1,92 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+from unittest.mock import patch
+from click.testing import CliRunner
+from src.chaosencrypt_cli import ChaosEncrypt, cli
+from src.async_api import AsyncChaosEncrypt
+from src.tuning import (
+    NO_PROFILE_ENV, PROFILE_ENV, PROFILE_VERSION, load_profile, save_profile, tune, tuned_value
+)
+
+class TestTuning(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'profile.json')
+        env = patch.dict(os.environ, {PROFILE_ENV: self.path})
+        env.start()
+        self.addCleanup(env.stop)
+        os.environ.pop(NO_PROFILE_ENV, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, profile):
+        save_profile(dict({'version': PROFILE_VERSION}, **profile), self.path)
+
+    def test_tune_profile(self):
+        profile = tune(precisions=[8, 20], sizes=[1024, 4096], max_workers=1)
+        self.assertEqual(profile['version'], PROFILE_VERSION)
+        self.assertEqual(set(profile['backends']), {'8', '20'})
+        self.assertNotEqual(profile['backends']['20']['backend'], 'numpy')
+        self.assertEqual(profile['workers'], 1)
+        self.assertIn(profile['recommended']['chunk_size'], (1024, 16384, 65536, 1048576))
+        save_profile(profile)
+        self.assertEqual(load_profile(), json.loads(json.dumps(profile)))
+
+    def test_profile_applied_without_changing_output(self):
+        text = "Tuning never changes ciphertexts. " * 20
+        expected = ChaosEncrypt(shared_secret="s", backend='numpy').encrypt(text)
+
+        self._write({'backends': {'12': {'backend': 'python'}}, 'batch_chunks': 7, 'workers': 3})
+        encryptor = ChaosEncrypt(shared_secret="s")
+        self.assertEqual(encryptor.backend.name, 'python')
+        self.assertEqual(encryptor.encrypt(text), expected)
+        self.assertEqual(AsyncChaosEncrypt(encryptor).batch_chunks, 7)
+        self.assertEqual(AsyncChaosEncrypt(encryptor, batch_chunks=2).batch_chunks, 2)
+        self.assertEqual(tuned_value('workers', 1), 3)
+        # An explicit backend wins over the profile
+        self.assertEqual(ChaosEncrypt(backend='numpy').backend.name, 'numpy')
+
+        self._write({'backends': {'12': {'backend': 'numpy', 'block_size': 256, 'min_length': 16}}})
+        encryptor = ChaosEncrypt(shared_secret="s")
+        self.assertEqual((encryptor.backend.block_size, encryptor.backend.min_length), (256, 16))
+        self.assertEqual(encryptor.encrypt(text), expected)
+
+    def test_unusable_profiles_ignored(self):
+        # A backend that cannot handle the precision falls back to automatic selection
+        self._write({'backends': {'30': {'backend': 'numpy'}}})
+        self.assertNotEqual(ChaosEncrypt(precision=30).backend.name, 'numpy')
+
+        with open(self.path, 'w') as f:
+            json.dump({'version': 99, 'workers': 5}, f)
+        with self.assertWarns(UserWarning):
+            self.assertEqual(load_profile(), {})
+
+        self._write({'workers': 5})
+        with patch.dict(os.environ, {NO_PROFILE_ENV: '1'}):
+            self.assertEqual(tuned_value('workers', 1), 1)
+        self.assertEqual(tuned_value('workers', 1), 5)
+
+    def test_cli(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ['tune', '--precision', '8', '--sizes', '1024',
+                                     '--max-workers', '1', '--dry-run'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIn('"backends"', result.output)
+
+        output = os.path.join(self.temp_dir, 'custom.json')
+        result = runner.invoke(cli, ['tune', '--precision', '8', '--sizes', '1024',
+                                     '--max-workers', '1', '--output', output])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(load_profile(output)['workers'], 1)
+
+        result = runner.invoke(cli, ['tune', '--precision', '0'])
+        self.assertIn('Error', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()